@@ -1,23 +1,44 @@
 import os
 import streamlit as st
-import plotly.express as px
 import pandas as pd
 from dotenv import load_dotenv
 import numpy as np
-from datetime import datetime
+import time
 from graphs.plotting import (plot_bar_graph, plot_line_graph, plot_scatter_plot, 
                              plot_histogram, plot_pie_chart, plot_correlation_matrix, 
                              plot_time_series, plot_box_plot, plot_time_patterns,
-                             plot_time_decomposition)
-from graphs.utils import (suggest_plot_type, get_column_type, is_categorical, is_numeric,
-                        detect_timeseries_columns, extract_time_features)
-from io import StringIO
+                             plot_time_decomposition, plot_time_heatmap, plot_time_percentiles,
+                             ANNOTATE_MAX_COLUMNS)
+from graphs.utils import (suggest_plot_type, detect_timeseries_columns, extract_time_features,
+                        DEFAULT_SAMPLE_SIZE)
+from graphs.ingestion import compact_dataset, load_uploaded_file, get_dataset_cache, stream_uploaded_file
+from graphs.streaming import DEFAULT_CHUNK_ROWS
+from graphs.profiling import get_dataset_profile
+from graphs.decimation import DEFAULT_POINT_BUDGET
+from graphs.inspector import (DEFAULT_PAGE_SIZE, approx_categorical_summary, categorical_summary,
+                              filter_columns, paginate, prefetch, summarize_value_counts)
+from graphs.sketches import APPROX_ROW_THRESHOLD, MAX_EXACT_DUPLICATE_ROWS
+from graphs.engine import datetime_statistics, duplicate_rows
+from graphs.statistics import get_numeric_statistics, summary_table
+from graphs.datetimes import to_datetime_column
+from graphs.rollups import AGGREGATIONS
+from graphs.decomposition import DECOMPOSITION_METHODS
+from graphs.log_config import configure_logging
+from graphs.instrumentation import chrome_trace, start_recording, stop_recording
+from graphs.pushdown import value_counts as column_value_counts
+from graphs.bars import BAR_AGGREGATIONS, DEFAULT_TOP_N
+from graphs.correlation import (DEFAULT_TOP_PAIRS, MAX_HEATMAP_COLUMNS, block_overview, cluster_order,
+                                column_values, correlation_matrix, correlation_tile, threshold_matrix,
+                                top_correlated_pairs)
 import logging
 
 # Get logger for this module
 logger = logging.getLogger(__name__)
 
-logging.basicConfig(level=logging.INFO)
+# Reruns kept for the performance panel's trace download
+MAX_PERF_TRACES = 20
+
+configure_logging()
 
 # Load API key from .env file
 load_dotenv()
@@ -36,12 +57,94 @@ page = st.sidebar.radio("Go to",
     ["Home", "Data Analysis", "Feature Analysis", "Time Series", 
      "Correlations", "Visualizations", "Statistics"])
 
+# Per-rerun timings, shown in the sidebar performance panel when it is enabled
+if 'perf_panel' not in st.session_state:
+    st.session_state.perf_panel = False
+if 'perf_traces' not in st.session_state:
+    st.session_state.perf_traces = []
+recorder = start_recording(f"rerun: {page}") if st.session_state.perf_panel else None
+if recorder is None:
+    # Drop a recorder left behind by a rerun that raised
+    stop_recording()
+
+def section(name: str):
+    """Attribute the rest of the rerun, up to the next section, to name in the performance panel"""
+    if recorder is not None:
+        recorder.section(name)
+
 # Load API key and data globally
 if 'data' not in st.session_state:
     st.session_state.data = None
+if 'dataset_key' not in st.session_state:
+    st.session_state.dataset_key = None
+if 'upload_id' not in st.session_state:
+    st.session_state.upload_id = None
+if 'streamed' not in st.session_state:
+    st.session_state.streamed = None
+if 'inference_sample_size' not in st.session_state:
+    st.session_state.inference_sample_size = DEFAULT_SAMPLE_SIZE
+if 'inference_exact' not in st.session_state:
+    st.session_state.inference_exact = False
+if 'approximate' not in st.session_state:
+    st.session_state.approximate = False
+if 'raw_data' not in st.session_state:
+    st.session_state.raw_data = None
+if 'compact' not in st.session_state:
+    st.session_state.compact = True
+if 'compact_exclude' not in st.session_state:
+    st.session_state.compact_exclude = []
+if 'compaction_id' not in st.session_state:
+    st.session_state.compaction_id = None
+
+def dataset_loaded() -> bool:
+    return st.session_state.data is not None or st.session_state.streamed is not None
+
+def streamed_summary():
+    """Running-aggregate summary of a streamed upload, or None for uploads loaded in full"""
+    return st.session_state.streamed.summary if st.session_state.streamed is not None else None
+
+def page_data(columns=None) -> pd.DataFrame:
+    """Rows of the loaded dataset; a streamed upload builds a frame of only the given columns"""
+    if st.session_state.streamed is not None:
+        return st.session_state.streamed.frame(columns)
+    return st.session_state.data
+
+# Approximate mode answers distinct counts, quantiles and top values from sketches
+if dataset_loaded():
+    st.session_state.approximate = st.sidebar.checkbox(
+        "Approximate mode (sketch-based statistics)", value=st.session_state.approximate,
+        help=f"On by default for datasets over {APPROX_ROW_THRESHOLD:,} rows")
+
+def column_picker(key: str, columns):
+    """Searchable, paginated column selector: (columns on this page, columns on the next page)"""
+    col1, col2, col3 = st.columns([3, 1, 1])
+    with col1:
+        query = st.text_input("Search columns:", key=f"{key}_query")
+    matches = filter_columns(columns, query)
+    with col2:
+        page_size = st.selectbox("Per page:", [DEFAULT_PAGE_SIZE, 25, 50], key=f"{key}_page_size")
+    _, n_pages = paginate(matches, 1, page_size)
+    with col3:
+        page_number = st.number_input(f"Page (of {n_pages}):", min_value=1, max_value=n_pages,
+                                      value=1, key=f"{key}_page")
+    page_cols, _ = paginate(matches, page_number, page_size)
+    next_cols = paginate(matches, page_number + 1, page_size)[0] if page_number < n_pages else []
+    st.caption(f"Showing {len(page_cols)} of {len(matches)} matching columns")
+    return page_cols, next_cols
+
+def current_profile():
+    """Column profile of the loaded dataset, computed once per upload"""
+    if streamed_summary() is not None:
+        # Streamed uploads are profiled from their running aggregates
+        return streamed_summary().profile
+    return get_dataset_profile(st.session_state.data, st.session_state.dataset_key,
+                               st.session_state.inference_sample_size,
+                               st.session_state.inference_exact,
+                               st.session_state.approximate)
 
 # Home Page
 if page == "Home":
+    section("Home")
     st.title("📊 Data Analysis Platform")
     st.markdown("""
     Welcome to the Data Analysis Platform. This tool helps you:
@@ -58,45 +161,154 @@ if page == "Home":
         else:
             st.warning("Please enter a valid API Key.")
 
+    # Type inference settings used when profiling uploaded columns
+    with st.expander("Type Inference Settings"):
+        st.session_state.inference_sample_size = st.number_input(
+            "Rows sampled per column:", min_value=100, step=500,
+            value=st.session_state.inference_sample_size)
+        st.session_state.inference_exact = st.checkbox(
+            "Exact mode (parse every row, slow on large files)",
+            value=st.session_state.inference_exact)
+
     # Data Upload Section
     st.header("📁 Upload Your Data")
     uploaded_file = st.file_uploader("Upload your data file (CSV, Excel):", type=["csv", "xlsx"])
+    streaming = st.checkbox("Streaming mode for large CSV files (read in chunks, never load the full table)")
+    chunk_rows = DEFAULT_CHUNK_ROWS
+    if streaming:
+        chunk_rows = st.number_input("Rows per chunk:", min_value=10_000, step=50_000,
+                                     value=DEFAULT_CHUNK_ROWS)
     
     if uploaded_file:
         try:
-            if uploaded_file.name.endswith(".csv"):
-                st.session_state.data = pd.read_csv(uploaded_file)
-            else:
-                st.session_state.data = pd.read_excel(uploaded_file)
+            section("Home: load upload")
+            stream = streaming and uploaded_file.name.endswith(".csv")
+            # Only hash and look up the upload when it changes, not on every rerun
+            if st.session_state.upload_id != (uploaded_file.file_id, stream):
+                if stream:
+                    start = time.perf_counter()
+                    # A lazy handle: pages build frames of the columns they use from the stored copy
+                    st.session_state.streamed = stream_uploaded_file(uploaded_file, chunk_rows=chunk_rows)
+                    st.session_state.data = None
+                    st.session_state.raw_data = None
+                    st.session_state.dataset_key = st.session_state.streamed.key
+                    st.session_state.ingest_info = time.perf_counter() - start
+                else:
+                    result = load_uploaded_file(uploaded_file)
+                    st.session_state.data = result.data
+                    st.session_state.raw_data = result.data
+                    st.session_state.dataset_key = result.key
+                    st.session_state.streamed = None
+                    st.session_state.ingest_info = result
+                    st.session_state.compact_exclude = []
+                    st.session_state.compaction_id = None
+                # Each new dataset starts in the approximate mode its size calls for
+                rows = st.session_state.streamed.rows if stream else len(st.session_state.data)
+                st.session_state.approximate = rows > APPROX_ROW_THRESHOLD
+                st.session_state.upload_id = (uploaded_file.file_id, stream)
+                current_profile()
             st.success("Data loaded successfully!")
+
+            section("Home: memory optimization")
+            # Streamed uploads stay memory-mapped; compacting would load them in full
+            if st.session_state.streamed is None:
+                raw = st.session_state.raw_data
+                with st.expander("Memory Optimization"):
+                    st.session_state.compact = st.checkbox(
+                        "Optimize column types (downcast numbers, categories, dates)",
+                        value=st.session_state.compact)
+                    st.session_state.compact_exclude = st.multiselect(
+                        "Keep original type for:", list(raw.columns),
+                        default=st.session_state.compact_exclude,
+                        disabled=not st.session_state.compact)
+                    raw_key = st.session_state.ingest_info.key
+                    compaction_id = (st.session_state.upload_id, st.session_state.compact,
+                                     tuple(st.session_state.compact_exclude))
+                    if st.session_state.compaction_id != compaction_id:
+                        if st.session_state.compact:
+                            raw_profile = get_dataset_profile(raw, raw_key,
+                                                              st.session_state.inference_sample_size,
+                                                              st.session_state.inference_exact,
+                                                              st.session_state.approximate)
+                            data, key = compact_dataset(raw, raw_key, raw_profile,
+                                                        st.session_state.compact_exclude)
+                        else:
+                            data, key = raw, raw_key
+                        st.session_state.data = data
+                        st.session_state.dataset_key = key
+                        st.session_state.compaction_id = compaction_id
+                        current_profile()
+                    report = st.session_state.data.attrs.get("compaction")
+                    if report is not None:
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            st.metric("Memory Before", f"{report.before_bytes / 1e6:.1f} MB")
+                        with col2:
+                            saved = 1 - report.after_bytes / report.before_bytes if report.before_bytes else 0.0
+                            st.metric("Memory After", f"{report.after_bytes / 1e6:.1f} MB",
+                                      delta=f"-{saved:.0%}", delta_color="inverse")
+                        st.dataframe(report.to_frame())
+
+            info = st.session_state.ingest_info
+            col1, col2, col3 = st.columns(3)
+            if st.session_state.streamed is not None:
+                summary = streamed_summary()
+                with col1:
+                    st.metric("Rows Streamed", f"{summary.rows:,}")
+                with col2:
+                    st.metric("Chunks", summary.chunks)
+                with col3:
+                    st.metric("Ingest Time", f"{info:.2f}s")
+            else:
+                cache = get_dataset_cache()
+                with col1:
+                    st.metric("Dataset Cache", "Hit" if info.cache_hit else "Miss")
+                with col2:
+                    st.metric("Parse Time", f"{info.parse_seconds:.2f}s")
+                with col3:
+                    st.metric("Cache Usage", 
+                            f"{cache.used_bytes / 1e6:.1f} / {cache.budget_bytes / 1e6:.0f} MB")
         except Exception as e:
             st.error(f"Error loading file: {e}")
 
 # Enhanced Data Analysis Page
 elif page == "Data Analysis":
+    section("Data Analysis")
     st.title("🔍 Data Analysis")
-    if st.session_state.data is not None:
+    if dataset_loaded():
+        profile = current_profile()
+        summary = streamed_summary()
         tab1, tab2, tab3 = st.tabs(["Overview", "Data Quality", "Data Types"])
         
         with tab1:
+            section("Data Analysis: overview")
             st.subheader("Data Preview")
-            st.dataframe(st.session_state.data.head())
+            preview = summary.preview if summary is not None else st.session_state.data
+            st.dataframe(preview.head())
             
             col1, col2 = st.columns(2)
             with col1:
-                st.metric("Total Rows", st.session_state.data.shape[0])
-                st.metric("Total Columns", st.session_state.data.shape[1])
+                st.metric("Total Rows", profile.rows)
+                st.metric("Total Columns", len(profile.columns))
             with col2:
-                st.metric("Missing Values", st.session_state.data.isnull().sum().sum())
-                st.metric("Duplicate Rows", st.session_state.data.duplicated().sum())
+                st.metric("Missing Values", profile.total_nulls)
+                if summary is not None:
+                    duplicates = summary.duplicates
+                    st.metric("Duplicate Rows", duplicates if summary.duplicates_exact else f"≈{duplicates}")
+                else:
+                    duplicates = duplicate_rows(st.session_state.data, st.session_state.approximate)
+                    # Counted exactly from row hashes below MAX_EXACT_DUPLICATE_ROWS, even in approximate mode
+                    estimated = st.session_state.approximate and len(st.session_state.data) > MAX_EXACT_DUPLICATE_ROWS
+                    st.metric("Duplicate Rows", f"≈{duplicates}" if estimated else duplicates)
         
         with tab2:
+            section("Data Analysis: data quality")
             st.subheader("Missing Values Analysis")
             missing_df = pd.DataFrame({
-                'Column': st.session_state.data.columns,
-                'Missing Values': st.session_state.data.isnull().sum(),
-                'Missing Percentage': (st.session_state.data.isnull().sum() / len(st.session_state.data) * 100)
-            })
+                'Column': list(profile.columns),
+                'Missing Values': [col.null_count for col in profile.columns.values()],
+                'Missing Percentage': [col.null_ratio * 100 for col in profile.columns.values()]
+            }, index=list(profile.columns))
             st.dataframe(missing_df)
             
             if st.button("Handle Missing Values"):
@@ -105,45 +317,51 @@ elif page == "Data Analysis":
                 # Add missing value handling logic here
         
         with tab3:
+            section("Data Analysis: data types")
             st.subheader("Data Types Information")
-            dtypes_df = pd.DataFrame(st.session_state.data.dtypes, columns=['Data Type'])
+            dtypes_df = pd.DataFrame(preview.dtypes.astype(str), columns=['Data Type'])
             st.dataframe(dtypes_df)
 
 # Updated Feature Analysis Page
 elif page == "Feature Analysis":
+    section("Feature Analysis")
     st.title("🎯 Feature Analysis")
-    if st.session_state.data is not None:
+    if dataset_loaded():
+        profile = current_profile()
         col1, col2 = st.columns(2)
         
         with col1:
             st.subheader("Numerical Features")
-            num_cols = st.session_state.data.select_dtypes(include=['number']).columns
+            section("Feature Analysis: numerical")
+            num_cols = profile.numeric_columns
             if len(num_cols) > 0:
                 selected_num = st.selectbox("Select numerical feature:", num_cols)
+                frame = page_data([selected_num])
                 st.write("Statistical Summary:")
-                st.write(st.session_state.data[selected_num].describe())
+                st.write(frame[selected_num].describe())
                 
                 # Suggest appropriate plots
-                suggested_plots = suggest_plot_type(st.session_state.data[selected_num])
+                suggested_plots = suggest_plot_type(frame[selected_num],
+                                                    x_profile=profile[selected_num])
                 plot_type = st.selectbox("Select Plot Type:", suggested_plots)
                 
                 if plot_type == "Box Plot":
-                    fig = plot_box_plot(st.session_state.data, selected_num)
+                    fig = plot_box_plot(frame, selected_num)
                 elif plot_type == "Histogram":
-                    fig = plot_histogram(st.session_state.data, selected_num)
+                    fig = plot_histogram(frame, selected_num)
                 st.plotly_chart(fig)
         
         with col2:
             st.subheader("Categorical Features")
+            section("Feature Analysis: categorical")
             # Filter for categorical columns based on cardinality
-            cat_cols = [col for col in st.session_state.data.columns 
-                       if is_categorical(st.session_state.data[col])]
+            cat_cols = profile.categorical_columns
             
             if len(cat_cols) > 0:
                 selected_cat = st.selectbox("Select categorical feature:", cat_cols)
                 
                 # Show category statistics
-                value_counts = st.session_state.data[selected_cat].value_counts().reset_index()
+                value_counts = column_value_counts(page_data([selected_cat])[selected_cat]).reset_index()
                 value_counts.columns = [selected_cat, 'count']
                 
                 st.write("Category Distribution:")
@@ -154,16 +372,18 @@ elif page == "Feature Analysis":
                     fig = plot_pie_chart(value_counts, selected_cat, 'count')
                 except ValueError as e:
                     st.warning(str(e))
-                    fig = plot_bar_graph(value_counts, selected_cat, 'count')
+                    fig = plot_bar_graph(value_counts, selected_cat, 'count', agg='sum', error_bars=False)
                 
                 st.plotly_chart(fig)
 
 # Update the Time Series page section
 elif page == "Time Series":
+    section("Time Series")
     st.title("📅 Time Series Analysis")
-    if st.session_state.data is not None:
+    if dataset_loaded():
         # Detect time series columns
-        date_cols = detect_timeseries_columns(st.session_state.data)
+        profile = current_profile()
+        date_cols = detect_timeseries_columns(st.session_state.data, profile)
         
         if date_cols:
             try:
@@ -174,40 +394,56 @@ elif page == "Time Series":
                 )
                 
                 date_col = st.selectbox("Select date column:", date_cols)
-                metric_col = st.selectbox("Select metric:", 
-                    st.session_state.data.select_dtypes(include=['number']).columns)
+                metric_col = st.selectbox("Select metric:", profile.numeric_columns)
                 
                 if not metric_col:
                     st.warning("No numeric columns found for analysis")
                 else:
+                    section(f"Time Series: {analysis_type}")
+                    frame = page_data([date_col, metric_col])
                     if analysis_type == "Time Series Plot":
-                        freq = st.selectbox("Select frequency:", 
-                            ["Daily", "Weekly", "Monthly", "Quarterly", "Yearly"])
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            freq = st.selectbox("Select frequency:", 
+                                ["Daily", "Weekly", "Monthly", "Quarterly", "Yearly"])
+                        with col2:
+                            agg = st.selectbox("Aggregation:", list(AGGREGATIONS))
                         freq_map = {
-                            "Daily": "D", "Weekly": "W", "Monthly": "M",
-                            "Quarterly": "Q", "Yearly": "Y"
+                            "Daily": "D", "Weekly": "W", "Monthly": "ME",
+                            "Quarterly": "QE", "Yearly": "YE"
                         }
-                        fig = plot_time_series(st.session_state.data, date_col, 
-                                             metric_col, freq_map[freq])
+                        fig = plot_time_series(frame, date_col, 
+                                             metric_col, freq_map[freq], agg)
                         st.plotly_chart(fig)
                     
                     elif analysis_type == "Patterns Analysis":
                         try:
-                            fig = plot_time_patterns(st.session_state.data, date_col, metric_col)
+                            fig = plot_time_patterns(frame, date_col, metric_col)
                             st.plotly_chart(fig)
+                            st.plotly_chart(plot_time_heatmap(frame, date_col, metric_col))
+                            period = st.selectbox("Percentiles by:", ["hour", "weekday", "month"])
+                            st.plotly_chart(plot_time_percentiles(frame, date_col,
+                                                                  metric_col, period))
                         except Exception as e:
                             st.error(f"Error creating patterns plot: {str(e)}")
                     
                     elif analysis_type == "Decomposition":
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            method = st.radio("Method:", list(DECOMPOSITION_METHODS), horizontal=True,
+                                              format_func=lambda m: m.upper() if m == 'stl' else m.capitalize())
+                        with col2:
+                            period = st.number_input("Period in grid steps (0 = detect):", min_value=0, value=0)
                         try:
-                            fig = plot_time_decomposition(st.session_state.data, date_col, metric_col)
+                            fig = plot_time_decomposition(frame, date_col, metric_col,
+                                                          period or None, method)
                             st.plotly_chart(fig)
                         except Exception as e:
                             st.error(f"Error creating decomposition plot: {str(e)}")
                     
                     elif analysis_type == "Time Features":
                         st.subheader("Time-based Features")
-                        time_features = extract_time_features(st.session_state.data[date_col])
+                        time_features = extract_time_features(to_datetime_column(frame, date_col))
                         st.write(time_features.head())
                         
                         if st.button("Download Time Features"):
@@ -228,29 +464,56 @@ elif page == "Time Series":
 
 # New Correlations Page
 elif page == "Correlations":
+    section("Correlations")
     st.title("🔗 Correlation Analysis")
-    if st.session_state.data is not None:
-        # Find all numeric columns including those that can be converted
-        numeric_cols = []
-        for col in st.session_state.data.columns:
-            try:
-                if is_numeric(st.session_state.data[col]):
-                    numeric_cols.append(col)
-                    if not pd.api.types.is_numeric_dtype(st.session_state.data[col]):
-                        # Convert column to numeric if it's not already
-                        st.session_state.data[col] = pd.to_numeric(st.session_state.data[col])
-            except Exception as e:
-                logger.warning(f"Could not convert column {col} to numeric: {e}")
+    if dataset_loaded():
+        # Numeric and numeric-like text columns; the correlation service parses the latter
+        numeric_cols = current_profile().numeric_like_columns
         
         if len(numeric_cols) > 1:  # Need at least 2 columns for correlation
-            # Create correlation matrix
-            corr_matrix = st.session_state.data[numeric_cols].corr()
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                method = st.radio("Method:", ["pearson", "spearman"], horizontal=True,
+                                  format_func=str.capitalize)
+            with col2:
+                threshold = st.slider("Minimum |r|:", 0.0, 1.0, 0.0, 0.05)
+            with col3:
+                cluster = st.checkbox("Cluster related columns", value=len(numeric_cols) > ANNOTATE_MAX_COLUMNS)
+            # Computed once per dataset and method, then served from cache on reruns
+            section("Correlations: matrix")
+            frame = page_data(numeric_cols)
+            corr_matrix = correlation_matrix(frame, numeric_cols, method)
             
             # Display correlation heatmap
-            fig = plot_correlation_matrix(corr_matrix)
-            st.plotly_chart(fig)
+            section("Correlations: heatmap")
+            heatmap = corr_matrix
+            if cluster:
+                order = cluster_order(corr_matrix)
+                heatmap = heatmap.loc[order, order]
+            heatmap = threshold_matrix(heatmap, threshold)
+            if len(heatmap) <= MAX_HEATMAP_COLUMNS:
+                st.plotly_chart(plot_correlation_matrix(heatmap))
+            else:
+                # Too wide to draw cell by cell: a block overview plus zoomable full-resolution tiles
+                st.plotly_chart(plot_correlation_matrix(block_overview(heatmap), 'Correlation Overview (strongest pair per block)'))
+                n_tiles = int(np.ceil(len(heatmap) / MAX_HEATMAP_COLUMNS))
+                with st.expander("Zoom into a tile"):
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        row_tile = st.number_input(f"Row tile (of {n_tiles}):", min_value=1, max_value=n_tiles, value=1)
+                    with col2:
+                        col_tile = st.number_input(f"Column tile (of {n_tiles}):", min_value=1, max_value=n_tiles, value=1)
+                    tile = correlation_tile(heatmap, row_tile - 1, col_tile - 1)
+                    st.plotly_chart(plot_correlation_matrix(tile, f'Correlation Tile {row_tile}, {col_tile}'))
+            
+            # Strongest pairs, readable even when the heatmap is not
+            section("Correlations: top pairs")
+            st.subheader("Strongest Correlations")
+            top_k = st.number_input("Number of pairs:", min_value=1, max_value=500, value=DEFAULT_TOP_PAIRS)
+            st.dataframe(top_correlated_pairs(corr_matrix, top_k, threshold).round(3))
             
             # Feature pair analysis
+            section("Correlations: feature pair")
             st.subheader("Feature Pair Analysis")
             col1, col2 = st.columns(2)
             with col1:
@@ -259,7 +522,11 @@ elif page == "Correlations":
                 feat2 = st.selectbox("Select second feature:", numeric_cols)
             
             if feat1 and feat2:
-                fig = plot_scatter_plot(st.session_state.data, feat1, feat2)
+                pair_data = frame
+                if not all(pd.api.types.is_numeric_dtype(pair_data[col]) for col in (feat1, feat2)):
+                    # Plot parsed copies of text columns instead of converting the session data
+                    pair_data = pd.DataFrame({col: column_values(pair_data[col]) for col in (feat1, feat2)})
+                fig = plot_scatter_plot(pair_data, feat1, feat2)
                 st.plotly_chart(fig)
                 
                 # Display correlation coefficient
@@ -272,47 +539,76 @@ elif page == "Correlations":
 
 # Updated Visualizations Page
 elif page == "Visualizations":
+    section("Visualizations")
     st.title("📈 Data Visualizations")
-    if st.session_state.data is not None:
+    if dataset_loaded():
         # First, let user select columns
+        profile = current_profile()
         col1, col2 = st.columns(2)
         with col1:
-            x_column = st.selectbox("Select X-axis column:", st.session_state.data.columns)
+            x_column = st.selectbox("Select X-axis column:", list(profile.columns))
         with col2:
             y_column = st.selectbox("Select Y-axis column (optional):", 
-                                  ['None'] + list(st.session_state.data.columns))
+                                  ['None'] + list(profile.columns))
+        frame = page_data([x_column] if y_column == 'None' else [x_column, y_column])
         
         # Get suggested plot types based on data
         if y_column == 'None':
-            suggested_plots = suggest_plot_type(st.session_state.data[x_column])
+            suggested_plots = suggest_plot_type(frame[x_column],
+                                                x_profile=profile[x_column])
         else:
             suggested_plots = suggest_plot_type(
-                st.session_state.data[x_column], 
-                st.session_state.data[y_column]
+                frame[x_column], 
+                frame[y_column],
+                x_profile=profile[x_column],
+                y_profile=profile[y_column]
             )
         
         if suggested_plots:
+            section("Visualizations: plot")
             plot_type = st.selectbox("Suggested Plot Types:", suggested_plots)
             
             try:
                 if plot_type == "Pie Chart":
                     # Create a DataFrame with value counts for the pie chart
-                    value_counts = st.session_state.data[x_column].value_counts()
+                    value_counts = column_value_counts(frame[x_column])
                     plot_data = pd.DataFrame({
                         'category': value_counts.index,
                         'count': value_counts.values
                     })
                     fig = plot_pie_chart(plot_data, 'category', 'count')
                 elif plot_type == "Bar Graph":
-                    fig = plot_bar_graph(st.session_state.data, x_column, 
-                                       y_column if y_column != 'None' else x_column)
-                elif plot_type == "Scatter Plot":
-                    fig = plot_scatter_plot(st.session_state.data, x_column, y_column)
+                    # Without a numeric Y column, bars count the rows of each category
+                    numeric_y = (y_column != 'None' and
+                                 pd.api.types.is_numeric_dtype(frame[y_column]))
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        agg = st.selectbox("Aggregation:", BAR_AGGREGATIONS if numeric_y else ['count'])
+                    with col2:
+                        top_n = st.number_input("Top categories:", min_value=1, max_value=500,
+                                                value=DEFAULT_TOP_N)
+                    with col3:
+                        error_bars = st.checkbox("Error bars (±1 SE)", value=True,
+                                                 disabled=agg not in ('mean', 'sum'))
+                    fig = plot_bar_graph(frame, x_column,
+                                         y_column if y_column != 'None' else x_column,
+                                         agg, int(top_n), error_bars)
+                elif plot_type in ("Scatter Plot", "Line Graph"):
+                    max_points = st.number_input("Max points drawn:", min_value=500, step=1000,
+                                                 value=DEFAULT_POINT_BUDGET)
+                    if plot_type == "Scatter Plot":
+                        mode = st.radio("Large data rendering:", ["sample", "density"],
+                                        horizontal=True)
+                        fig = plot_scatter_plot(frame, x_column, y_column,
+                                                max_points, mode)
+                    else:
+                        fig = plot_line_graph(frame, x_column, y_column,
+                                              max_points)
                 elif plot_type == "Box Plot":
-                    fig = plot_box_plot(st.session_state.data, 
+                    fig = plot_box_plot(frame, 
                                       y_column if y_column != 'None' else x_column)
                 elif plot_type == "Histogram":
-                    fig = plot_histogram(st.session_state.data, x_column)
+                    fig = plot_histogram(frame, x_column)
                 
                 st.plotly_chart(fig, use_container_width=True)
             except Exception as e:
@@ -322,113 +618,116 @@ elif page == "Visualizations":
 
 # Statistics Page
 elif page == "Statistics":
+    section("Statistics")
     st.title("📊 Statistical Analysis")
-    if st.session_state.data is not None:
+    if dataset_loaded():
+        profile = current_profile()
         tabs = st.tabs(["Numerical Stats", "Categorical Stats", "Datetime Stats", "Distribution"])
         
         with tabs[0]:
+            section("Statistics: numerical")
             st.subheader("Numerical Statistics")
-            num_cols = st.session_state.data.select_dtypes(include=['number']).columns
+            num_cols = profile.numeric_columns
             
             if len(num_cols) > 0:
-                # Enhanced numerical statistics
-                num_stats = st.session_state.data[num_cols].agg([
-                    'count', 'mean', 'std', 'min', 
-                    lambda x: x.quantile(0.25),
-                    'median',
-                    lambda x: x.quantile(0.75),
-                    'max', 'skew', 'kurtosis'
-                ]).round(2)
-                
-                num_stats.index = ['Count', 'Mean', 'Std Dev', 'Min', '25%', 'Median', 
-                                 '75%', 'Max', 'Skewness', 'Kurtosis']
-                
-                st.dataframe(num_stats)
+                # Enhanced numerical statistics, one vectorized pass shared by both views
+                if streamed_summary() is not None:
+                    num_stats = streamed_summary().numeric_table()
+                    st.caption("Streamed dataset: quantiles and unique counts are approximate")
+                else:
+                    num_stats = get_numeric_statistics(st.session_state.data, num_cols,
+                                                       approximate=st.session_state.approximate)
+                    if st.session_state.approximate:
+                        st.caption("Approximate mode: quantiles and unique counts are estimated")
+                st.dataframe(summary_table(num_stats))
                 
-                # Additional metrics
-                for col in num_cols:
+                # Additional metrics for the columns on the current page
+                page_cols, _ = column_picker("num_stats", num_cols)
+                for col in page_cols:
                     with st.expander(f"Detailed Analysis - {col}"):
+                        col_stats = num_stats.loc[col]
                         col1, col2 = st.columns(2)
                         with col1:
-                            st.metric("Coefficient of Variation", 
-                                    f"{(st.session_state.data[col].std() / st.session_state.data[col].mean() * 100):.2f}%")
-                            st.metric("Range", 
-                                    f"{st.session_state.data[col].max() - st.session_state.data[col].min():.2f}")
+                            st.metric("Coefficient of Variation", f"{col_stats['CV %']:.2f}%")
+                            st.metric("Range", f"{col_stats['Range']:.2f}")
                         with col2:
                             st.metric("Missing Values", 
-                                    f"{st.session_state.data[col].isnull().sum()} ({st.session_state.data[col].isnull().mean()*100:.1f}%)")
-                            st.metric("Unique Values", 
-                                    st.session_state.data[col].nunique())
+                                    f"{int(col_stats['Missing'])} ({col_stats['Missing %']:.1f}%)")
+                            st.metric("Unique Values", int(col_stats['Unique']))
             else:
                 st.warning("No numerical columns found in the dataset")
         
         with tabs[1]:
+            section("Statistics: categorical")
             st.subheader("Categorical Statistics")
-            # Include object and category dtypes
-            cat_cols = st.session_state.data.select_dtypes(include=['object', 'category']).columns
+            # Include object, Arrow-backed string and category dtypes; a streamed upload's preview has its dtypes
+            stream_summary = streamed_summary()
+            schema = stream_summary.preview if stream_summary is not None else st.session_state.data
+            cat_cols = schema.select_dtypes(include=['object', 'string', 'category']).columns
             
             if len(cat_cols) > 0:
-                for col in cat_cols:
+                page_cols, next_cols = column_picker("cat_stats", list(cat_cols))
+                summarize = (approx_categorical_summary if st.session_state.approximate
+                             else categorical_summary)
+                if stream_summary is None:
+                    prefetch(st.session_state.data, next_cols, summarize)
+                for col in page_cols:
                     with st.expander(f"Category Analysis - {col}"):
-                        value_counts = st.session_state.data[col].value_counts()
-                        value_percentages = st.session_state.data[col].value_counts(normalize=True)
-                        
-                        # Create summary dataframe
-                        cat_summary = pd.DataFrame({
-                            'Count': value_counts,
-                            'Percentage': value_percentages * 100
-                        }).round(2)
+                        try:
+                            counts = stream_summary.columns[col] if stream_summary is not None else None
+                            if counts is not None and counts.counts_truncated and not st.session_state.approximate:
+                                st.info("Too many distinct values to count exactly; enable approximate mode")
+                                continue
+                            if counts is not None and not counts.counts_truncated:
+                                summary = summarize_value_counts(counts.top_values(), col)
+                            else:
+                                summary = summarize(page_data([col]), col)
+                        except Exception as e:
+                            st.error(f"Error analyzing {col}: {str(e)}")
+                            continue
                         
                         col1, col2 = st.columns(2)
                         with col1:
-                            st.metric("Unique Values", len(value_counts))
+                            st.metric("Unique Values",
+                                      f"≈{summary.unique}" if summary.approximate else summary.unique)
                             st.metric("Missing Values", 
-                                    f"{st.session_state.data[col].isnull().sum()} ({st.session_state.data[col].isnull().mean()*100:.1f}%)")
+                                    f"{profile[col].null_count} ({profile[col].null_ratio*100:.1f}%)")
                         
                         with col2:
-                            st.metric("Mode", value_counts.index[0])
-                            st.metric("Mode Frequency", f"{value_percentages.iloc[0]*100:.1f}%")
+                            st.metric("Mode", summary.mode)
+                            st.metric("Mode Frequency", f"{summary.mode_ratio*100:.1f}%")
                         
                         st.write("Value Distribution:")
-                        st.dataframe(cat_summary)
+                        st.dataframe(summary.table)
                         
                         # Plot distribution with value counts data
-                        try:
-                            if len(value_counts) <= 10:
-                                fig = px.pie(values=value_counts.values, 
-                                           names=value_counts.index,
-                                           title=f'Distribution of {col}')
-                            else:
-                                # Create DataFrame for bar plot
-                                plot_df = pd.DataFrame({
-                                    'Category': value_counts.index,
-                                    'Count': value_counts.values
-                                })
-                                fig = plot_bar_graph(plot_df, 'Category', 'Count')
-                            st.plotly_chart(fig)
-                        except Exception as e:
-                            st.error(f"Error creating plot for {col}: {str(e)}")
+                        if summary.figure is not None:
+                            st.plotly_chart(summary.figure)
             else:
                 st.warning("No categorical columns found in the dataset")
         
         with tabs[2]:
+            section("Statistics: datetime")
             st.subheader("Datetime Statistics")
-            date_cols = detect_timeseries_columns(st.session_state.data)
+            date_cols = detect_timeseries_columns(st.session_state.data, profile)
             
             if date_cols:
-                for col in date_cols:
+                page_cols, _ = column_picker("date_stats", date_cols)
+                for col in page_cols:
                     with st.expander(f"Temporal Analysis - {col}"):
-                        dates = pd.to_datetime(st.session_state.data[col])
+                        frame = page_data([col])
+                        dates = to_datetime_column(frame, col)
+                        date_stats = datetime_statistics(frame, [col]).loc[col]
                         
                         col1, col2 = st.columns(2)
                         with col1:
-                            st.metric("Date Range", f"{dates.min().date()} to {dates.max().date()}")
-                            st.metric("Time Span", f"{(dates.max() - dates.min()).days} days")
+                            st.metric("Date Range", f"{date_stats['Min'].date()} to {date_stats['Max'].date()}")
+                            st.metric("Time Span", f"{date_stats['Span (days)']} days")
                         
                         with col2:
                             st.metric("Missing Values", 
-                                    f"{dates.isnull().sum()} ({dates.isnull().mean()*100:.1f}%)")
-                            st.metric("Unique Dates", dates.nunique())
+                                    f"{date_stats['Missing']} ({date_stats['Missing %']:.1f}%)")
+                            st.metric("Unique Dates", date_stats['Unique'])
                         
                         # Temporal patterns
                         time_features = extract_time_features(dates)
@@ -438,23 +737,25 @@ elif page == "Statistics":
                 st.warning("No datetime columns found in the dataset")
         
         with tabs[3]:
+            section("Statistics: distribution")
             st.subheader("Distribution Analysis")
-            num_cols = st.session_state.data.select_dtypes(include=['number']).columns
+            num_cols = profile.numeric_columns
             
             if len(num_cols) > 0:
                 selected_col = st.selectbox("Select column for distribution analysis:", num_cols)
+                frame = page_data([selected_col])
                 
                 col1, col2 = st.columns(2)
                 with col1:
-                    fig = plot_histogram(st.session_state.data, selected_col)
+                    fig = plot_histogram(frame, selected_col)
                     st.plotly_chart(fig)
                 
                 with col2:
-                    fig = plot_box_plot(st.session_state.data, selected_col)
+                    fig = plot_box_plot(frame, selected_col)
                     st.plotly_chart(fig)
                 
                 # Distribution statistics
-                data = st.session_state.data[selected_col].dropna()
+                data = frame[selected_col].dropna()
                 st.write("Distribution Metrics:")
                 metrics_df = pd.DataFrame({
                     'Metric': ['Skewness', 'Kurtosis', 'Mean', 'Median', 'Mode'],
@@ -472,6 +773,22 @@ elif page == "Statistics":
     else:
         st.warning("Please upload data in the Home page first!")
 
+# Performance panel: where the time of this rerun went
+st.sidebar.markdown("---")
+st.sidebar.checkbox("Performance panel", key="perf_panel",
+                    help="Time page sections, detectors, statistics and figures on each rerun")
+if recorder is not None:
+    stop_recording()
+    traces = st.session_state.perf_traces
+    traces.append(recorder)
+    del traces[:-MAX_PERF_TRACES]
+    with st.sidebar.expander("Performance", expanded=True):
+        st.metric("Rerun Time", f"{recorder.duration_ns / 1e6:.0f} ms")
+        st.dataframe(recorder.to_frame().round(2))
+        st.download_button("Download trace (Chrome format)", chrome_trace(traces),
+                           "rerun_trace.json", "application/json",
+                           help=f"Last {len(traces)} reruns; open in chrome://tracing or ui.perfetto.dev")
+
 # Footer
 st.sidebar.markdown("---")
 st.sidebar.markdown("Developed By Rishu")
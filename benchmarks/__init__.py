@@ -0,0 +1 @@
+# This file is intentionally left blank to mark the directory as a package.
@@ -0,0 +1,54 @@
+"""Figure payload size and build time of histogram/box plots versus row count.
+
+Compares the server-side binned figures in graphs.plotting with the raw-value
+plotly express figures they replaced.
+
+    python -m benchmarks.bench_distribution_plots --rows 10000 100000 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from graphs.plotting import plot_box_plot, plot_histogram
+
+
+def make_data(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    # Long right tail so the box plot has a realistic share of outliers
+    return pd.DataFrame({'value': rng.lognormal(mean=3, sigma=0.6, size=rows)})
+
+
+def measure(build):
+    start = time.perf_counter()
+    fig = build()
+    built = time.perf_counter() - start
+    payload = fig.to_json()
+    serialized = time.perf_counter() - start
+    return len(payload), built, serialized
+
+
+def run(rows_list):
+    cases = {
+        'histogram (binned)': lambda df: plot_histogram(df, 'value'),
+        'histogram (px raw)': lambda df: px.histogram(df, x='value'),
+        'box (precomputed)': lambda df: plot_box_plot(df, 'value'),
+        'box (px raw)': lambda df: px.box(df, y='value'),
+    }
+    # Warm up plotly's lazy imports so the first row count isn't penalized
+    for build in cases.values():
+        build(make_data(100)).to_json()
+    print(f"{'rows':>10}  {'figure':<20} {'payload':>12} {'build s':>9} {'build+json s':>13}")
+    for rows in rows_list:
+        df = make_data(rows)
+        for name, build in cases.items():
+            size, built, serialized = measure(lambda: build(df))
+            print(f"{rows:>10}  {name:<20} {size / 1024:>10.1f}KB {built:>9.3f} {serialized:>13.3f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    run(parser.parse_args().rows)
@@ -0,0 +1,77 @@
+"""Time-pattern aggregation time and peak memory versus row count.
+
+Compares graphs.patterns (calendar fields as integer arrays, bincount
+aggregates) with the previous plot_time_patterns approach, which copied the
+frame and ran one groupby per calendar field.
+
+    python -m benchmarks.bench_time_patterns --rows 100000 1000000 10000000
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from graphs.patterns import calendar_fields, pattern_percentiles, time_patterns
+
+
+def make_data(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    seconds = rng.integers(0, 3 * 365 * 86400, rows)
+    hour = (seconds % 86400) / 3600
+    return pd.DataFrame({
+        'date': pd.Timestamp('2021-01-01') + pd.to_timedelta(seconds, unit='s'),
+        'value': 10 + 3 * np.sin(2 * np.pi * hour / 24) + rng.normal(size=rows),
+        'label': rng.choice(['a', 'b', 'c'], rows),
+    })
+
+
+def groupby_patterns(data: pd.DataFrame, date_col: str, metric_col: str):
+    """The pre-bincount implementation: a frame copy and a groupby per field."""
+    data = data.copy()
+    data[date_col] = pd.to_datetime(data[date_col])
+    daily = None
+    if data[date_col].dt.hour.nunique() > 1:
+        daily = data.groupby(data[date_col].dt.hour)[metric_col].mean()
+    weekly = data.groupby(data[date_col].dt.dayofweek)[metric_col].mean()
+    monthly = data.groupby(data[date_col].dt.month)[metric_col].mean()
+    return daily, weekly, monthly
+
+
+def bincount_patterns(data: pd.DataFrame, date_col: str, metric_col: str):
+    return time_patterns(calendar_fields(data[date_col], data[metric_col]))
+
+
+def percentile_patterns(data: pd.DataFrame, date_col: str, metric_col: str):
+    return pattern_percentiles(calendar_fields(data[date_col], data[metric_col]))
+
+
+def measure(run):
+    tracemalloc.start()
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def run(rows_list):
+    cases = {
+        'groupby (previous)': groupby_patterns,
+        'bincount means': bincount_patterns,
+        'percentiles': percentile_patterns,
+    }
+    print(f"{'rows':>10}  {'method':<24} {'seconds':>9} {'peak MB':>9}")
+    for rows in rows_list:
+        df = make_data(rows)
+        for name, compute in cases.items():
+            elapsed, peak = measure(lambda: compute(df, 'date', 'value'))
+            print(f"{rows:>10}  {name:<24} {elapsed:>9.3f} {peak / 2 ** 20:>9.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000, 10_000_000])
+    run(parser.parse_args().rows)
@@ -0,0 +1,77 @@
+"""Synthetic datasets for the benchmark suite, deterministic for a given seed.
+
+Every generator takes a row count; wide frames trade rows for columns so their
+cell count stays comparable to the tall ones.
+"""
+import numpy as np
+import pandas as pd
+
+# Date formats mixed into the same column, as in hand-maintained exports
+MIXED_DATE_FORMATS = ('%Y-%m-%d %H:%M:%S', '%d/%m/%Y %H:%M', '%b %d %Y')
+WIDE_COLUMNS = 200
+WIDE_ROW_DIVISOR = 50
+
+
+def numeric_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Tall frame: correlated floats, a skewed integer column, a low-cardinality label and a timestamp."""
+    rng = np.random.default_rng(seed)
+    base = rng.normal(size=rows)
+    seconds = np.sort(rng.integers(0, 2 * 365 * 86400, rows))
+    hour = (seconds % 86400) / 3600
+    return pd.DataFrame({
+        'date': pd.Timestamp('2022-01-01') + pd.to_timedelta(seconds, unit='s'),
+        'value': 10 + 3 * np.sin(2 * np.pi * hour / 24) + base,
+        'related': 2 * base + rng.normal(scale=0.5, size=rows),
+        'amount': rng.lognormal(mean=3, sigma=0.8, size=rows).round(2),
+        'quantity': rng.poisson(4, rows),
+        'label': rng.choice(['north', 'south', 'east', 'west', 'central'], rows).astype(object),
+    })
+
+
+def string_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """High-cardinality identifiers next to a medium-cardinality code column."""
+    rng = np.random.default_rng(seed)
+    ids = rng.integers(0, max(rows, 1) * 10, rows)
+    return pd.DataFrame({
+        'id': np.char.add('user-', ids.astype(str)).astype(object),
+        'code': np.char.add('C', rng.integers(0, 500, rows).astype(str)).astype(object),
+        'score': rng.normal(size=rows),
+    })
+
+
+def mixed_date_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Date strings in several formats, plus a numeric metric.
+
+    Formatting goes through the distinct dates only, so large frames stay cheap
+    to generate.
+    """
+    rng = np.random.default_rng(seed)
+    days = pd.date_range('2020-01-01', periods=min(max(rows, 1), 3 * 365 * 24), freq='h')
+    picks = rng.integers(0, len(days), rows)
+    formats = rng.integers(0, len(MIXED_DATE_FORMATS), rows)
+    # Each (date, format) pair is formatted once and broadcast
+    codes = picks * len(MIXED_DATE_FORMATS) + formats
+    unique_codes, inverse = np.unique(codes, return_inverse=True)
+    texts = np.array([days[code // len(MIXED_DATE_FORMATS)].strftime(MIXED_DATE_FORMATS[code % len(MIXED_DATE_FORMATS)])
+                      for code in unique_codes], dtype=object)
+    return pd.DataFrame({
+        'when': texts[inverse],
+        'metric': rng.normal(loc=100, scale=15, size=rows),
+    })
+
+
+def wide_frame(rows: int, seed: int = 0, columns: int = WIDE_COLUMNS) -> pd.DataFrame:
+    """rows / WIDE_ROW_DIVISOR rows of `columns` float columns in correlated groups of ten."""
+    rng = np.random.default_rng(seed)
+    n = max(rows // WIDE_ROW_DIVISOR, 10)
+    factors = rng.normal(size=(n, max(columns // 10, 1)))
+    values = np.repeat(factors, 10, axis=1)[:, :columns] + rng.normal(scale=1.0, size=(n, columns))
+    return pd.DataFrame(values, columns=[f'f{i:03d}' for i in range(columns)])
+
+
+GENERATORS = {
+    'numeric': numeric_frame,
+    'strings': string_frame,
+    'mixed_dates': mixed_date_frame,
+    'wide': wide_frame,
+}
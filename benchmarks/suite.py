@@ -0,0 +1,242 @@
+"""Wall time, peak memory and figure payload of graphs.utils and GraphPlotter across data scales.
+
+    python -m benchmarks.suite --scale default --out benchmarks/results/latest.json
+    python -m benchmarks.suite --rows 10000 100000 --cases 'plot_time_*' --repeat 3
+    python -m benchmarks.suite --scale full --save-baseline
+
+Every case runs on cold caches. Results are compared against the baseline
+(benchmarks/baseline.json by default) and regressions beyond --tolerance are
+listed; the exit status is 1 when there are any, so the suite can gate CI.
+"""
+import argparse
+import fnmatch
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from benchmarks.generators import GENERATORS
+from graphs import plotting, pushdown, utils
+from graphs.correlation import correlation_matrix
+
+SCALES = {
+    'quick': [10_000, 100_000],
+    'default': [10_000, 100_000, 1_000_000],
+    'full': [10_000, 100_000, 1_000_000, 10_000_000, 50_000_000],
+}
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+DEFAULT_TOLERANCE = 0.25
+
+# Differences below these are noise, whatever the ratio
+MIN_SECONDS_DELTA = 0.02
+MIN_MEMORY_DELTA_MB = 1.0
+
+
+@dataclass
+class Case:
+    name: str
+    dataset: str
+    run: object
+    prepare: object = None  # data -> arguments of run, excluded from the measurement
+
+
+CASES = [
+    # graphs.utils
+    Case('detect_timeseries_columns[mixed_dates]', 'mixed_dates', utils.detect_timeseries_columns),
+    Case('detect_timeseries_columns[numeric]', 'numeric', utils.detect_timeseries_columns),
+    Case('suggest_plot_type[strings]', 'strings', lambda df: utils.suggest_plot_type(df['id'])),
+    Case('suggest_plot_type[numeric pair]', 'numeric',
+         lambda df: utils.suggest_plot_type(df['value'], df['related'])),
+    Case('extract_time_features[mixed_dates]', 'mixed_dates',
+         lambda df: utils.extract_time_features(df['when'])),
+    Case('is_categorical[strings]', 'strings', lambda df: utils.is_categorical(df['code'])),
+    # graphs.pushdown
+    Case('value_counts[strings]', 'strings', lambda df: pushdown.value_counts(df['code'])),
+    Case('group_aggregate[numeric]', 'numeric',
+         lambda df: pushdown.group_aggregate(df, 'label', 'amount', pushdown.GROUP_AGGREGATIONS)),
+    # GraphPlotter
+    Case('plot_bar_graph', 'numeric', lambda df: plotting.plot_bar_graph(df, 'label', 'value')),
+    Case('plot_line_graph', 'numeric', lambda df: plotting.plot_line_graph(df, 'date', 'value')),
+    Case('plot_scatter_plot', 'numeric', lambda df: plotting.plot_scatter_plot(df, 'value', 'related')),
+    Case('plot_scatter_plot[density]', 'numeric',
+         lambda df: plotting.plot_scatter_plot(df, 'value', 'related', mode='density')),
+    Case('plot_histogram', 'numeric', lambda df: plotting.plot_histogram(df, 'amount')),
+    Case('plot_pie_chart', 'numeric', lambda counts: plotting.plot_pie_chart(counts, 'label', 'count'),
+         prepare=lambda df: (df['label'].value_counts().rename_axis('label').reset_index(),)),
+    Case('plot_correlation_matrix', 'wide', plotting.plot_correlation_matrix,
+         prepare=lambda df: (correlation_matrix(df),)),
+    Case('plot_time_series', 'numeric', lambda df: plotting.plot_time_series(df, 'date', 'value', 'D')),
+    Case('plot_box_plot', 'numeric', lambda df: plotting.plot_box_plot(df, 'amount')),
+    Case('plot_distribution', 'numeric', lambda df: plotting.plot_distribution(df, 'amount')),
+    Case('plot_time_decomposition', 'numeric',
+         lambda df: plotting.plot_time_decomposition(df, 'date', 'value')),
+    Case('plot_time_patterns', 'numeric', lambda df: plotting.plot_time_patterns(df, 'date', 'value')),
+    Case('plot_time_heatmap', 'numeric', lambda df: plotting.plot_time_heatmap(df, 'date', 'value')),
+    Case('plot_time_percentiles', 'numeric',
+         lambda df: plotting.plot_time_percentiles(df, 'date', 'value')),
+]
+
+
+def clear_caches():
+    """Empty every module-level cache in graphs, so each run measures the cold path."""
+    for name, module in list(sys.modules.items()):
+        if not name.startswith('graphs.'):
+            continue
+        for value in vars(module).values():
+            if type(value).__name__ in ('FigureCache', 'ProfileCache', 'DatasetCache'):
+                value.clear()
+
+
+def payload_size(result):
+    """Bytes of a figure's JSON, as sent to the browser; None for non-figures."""
+    return len(result.to_json()) if isinstance(result, go.Figure) else None
+
+
+def measure(case: Case, data: pd.DataFrame, repeat: int = 1) -> dict:
+    """Best wall time of repeat cold runs, plus peak traced memory and payload of one more."""
+    args = case.prepare(data) if case.prepare else (data,)
+    times = []
+    for _ in range(repeat):
+        clear_caches()
+        gc.collect()
+        start = time.perf_counter()
+        case.run(*args)
+        times.append(time.perf_counter() - start)
+    clear_caches()
+    gc.collect()
+    # Traced separately: tracemalloc slows allocation-heavy code down
+    tracemalloc.start()
+    try:
+        result = case.run(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': min(times), 'peak_mb': peak / 2 ** 20, 'payload_bytes': payload_size(result)}
+
+
+def run(rows_list, patterns=('*',), repeat: int = 1) -> list:
+    cases = [case for case in CASES if any(fnmatch.fnmatch(case.name, p) for p in patterns)]
+    # Warm up lazy imports (plotly express, statsmodels) so the first scale isn't penalized
+    for case in cases:
+        data = GENERATORS[case.dataset](1_000)
+        try:
+            case.run(*(case.prepare(data) if case.prepare else (data,)))
+        except Exception:
+            pass
+    results = []
+    print(f"{'rows':>10}  {'case':<42} {'seconds':>9} {'peak MB':>9} {'payload KB':>11}")
+    for rows in rows_list:
+        for dataset in sorted({case.dataset for case in cases}):
+            data = GENERATORS[dataset](rows)
+            for case in (case for case in cases if case.dataset == dataset):
+                entry = {'case': case.name, 'dataset': dataset, 'rows': rows,
+                         'shape': list(data.shape)}
+                try:
+                    entry.update(measure(case, data, repeat))
+                except Exception as e:
+                    entry['error'] = f"{type(e).__name__}: {e}"
+                    print(f"{rows:>10}  {case.name:<42} failed: {entry['error']}")
+                    results.append(entry)
+                    continue
+                payload = entry['payload_bytes']
+                print(f"{rows:>10}  {case.name:<42} {entry['seconds']:>9.3f} {entry['peak_mb']:>9.1f} "
+                      f"{'-' if payload is None else f'{payload / 1024:.1f}':>11}")
+                results.append(entry)
+            del data
+            gc.collect()
+    return results
+
+
+def environment() -> dict:
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+    }
+
+
+def compare(results: list, baseline: list, tolerance: float = DEFAULT_TOLERANCE) -> list:
+    """Metrics that grew by more than tolerance (and by more than the noise floor) since the baseline."""
+    previous = {(entry['case'], entry['rows']): entry for entry in baseline if 'error' not in entry}
+    floors = {'seconds': MIN_SECONDS_DELTA, 'peak_mb': MIN_MEMORY_DELTA_MB, 'payload_bytes': 0}
+    regressions = []
+    for entry in results:
+        old = previous.get((entry['case'], entry['rows']))
+        if old is None:
+            continue
+        if 'error' in entry:
+            regressions.append({'case': entry['case'], 'rows': entry['rows'], 'metric': 'error',
+                                'baseline': None, 'current': entry['error']})
+            continue
+        for metric, floor in floors.items():
+            before, after = old.get(metric), entry.get(metric)
+            if before is None or after is None:
+                continue
+            if after > before * (1 + tolerance) and after - before > floor:
+                regressions.append({'case': entry['case'], 'rows': entry['rows'], 'metric': metric,
+                                    'baseline': before, 'current': after,
+                                    'ratio': after / before if before else float('inf')})
+    return regressions
+
+
+def write_json(path: str, results: list):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'environment': environment(), 'results': results}, f, indent=2)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    scale = parser.add_mutually_exclusive_group()
+    scale.add_argument('--rows', type=int, nargs='+')
+    scale.add_argument('--scale', choices=sorted(SCALES), default='default')
+    parser.add_argument('--cases', nargs='+', default=['*'], help="case name patterns (fnmatch)")
+    parser.add_argument('--repeat', type=int, default=1, help="cold runs per case; the best is kept")
+    parser.add_argument('--out', help="write results to this JSON file")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the baseline")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="relative growth flagged as a regression (default 0.25)")
+    args = parser.parse_args(argv)
+
+    results = run(args.rows or SCALES[args.scale], args.cases, args.repeat)
+    if args.out:
+        write_json(args.out, results)
+    if args.save_baseline:
+        write_json(args.baseline, results)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline['results'], args.tolerance)
+    if not regressions:
+        print(f"No regressions against {args.baseline} "
+              f"(recorded {baseline['environment']['timestamp']} on {baseline['environment']['platform']})")
+        return 0
+    print(f"{len(regressions)} regressions against {args.baseline}:")
+    for item in regressions:
+        if item['metric'] == 'error':
+            print(f"  {item['case']} @ {item['rows']}: now fails ({item['current']})")
+        else:
+            print(f"  {item['case']} @ {item['rows']}: {item['metric']} "
+                  f"{item['baseline']:.3f} -> {item['current']:.3f} ({item['ratio']:.2f}x)")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from graphs.pushdown import group_aggregate
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+BAR_AGGREGATIONS = ('mean', 'sum', 'count', 'median')
+
+# Text axes with more categories than this fold the rest into one "Other" bar
+DEFAULT_TOP_N = 30
+
+
+@dataclass
+class BarData:
+    """One row per bar: aggregated value, standard error (NaN where undefined) and row count."""
+    table: pd.DataFrame
+    agg: str
+    groups: int
+    other_groups: int = 0
+    ranked: bool = True
+
+
+def is_ordered_axis(series: pd.Series) -> bool:
+    """Numeric and date axes keep their natural order; anything else is ranked by value."""
+    return ((pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series))
+            or pd.api.types.is_datetime64_any_dtype(series))
+
+
+def pooled_std(counts: pd.Series, means: pd.Series, stds: pd.Series) -> float:
+    """Sample standard deviation of the union of groups, from each group's count, mean and std."""
+    n = counts.sum()
+    if n < 2:
+        return np.nan
+    mean = (counts * means).sum() / n
+    within = ((counts - 1) * stds.fillna(0) ** 2).sum()
+    between = (counts * (means - mean) ** 2).sum()
+    return float(np.sqrt((within + between) / (n - 1)))
+
+
+def _standard_errors(stats: pd.DataFrame, agg: str) -> pd.Series:
+    if agg == 'mean':
+        return stats['std'] / np.sqrt(stats['count'])
+    if agg == 'sum':
+        return stats['std'] * np.sqrt(stats['count'])
+    return pd.Series(np.nan, index=stats.index)
+
+
+def bar_aggregates(data: pd.DataFrame, x_axis: str, y_axis: str, agg: str = 'mean',
+                   top_n: int = DEFAULT_TOP_N) -> BarData:
+    """Per-category agg of y_axis from one grouped pass (in DuckDB when enabled).
+
+    Ranked axes are sorted by value and cut to the top_n categories, the rest folded
+    into an "Other" bar whose mean, sum, count and error come from the group totals;
+    an Other median needs a second pass over the folded rows.
+    """
+    if agg not in BAR_AGGREGATIONS:
+        raise ValueError(f"Unknown aggregation {agg!r}, expected one of {BAR_AGGREGATIONS}")
+    numeric = pd.api.types.is_numeric_dtype(data[y_axis])
+    if agg != 'count' and not numeric:
+        raise ValueError(f"{agg} of {y_axis} needs a numeric column; use count")
+
+    aggs = ('count', 'sum', 'mean', 'std') if numeric else ('count',)
+    if agg == 'median':
+        aggs += ('median',)
+    stats = group_aggregate(data, x_axis, y_axis, aggs)
+    stats['value'] = stats[agg]
+    stats['error'] = _standard_errors(stats, agg) if numeric else np.nan
+    groups = len(stats)
+
+    if is_ordered_axis(data[x_axis]):
+        return BarData(stats[['value', 'error', 'count']], agg, groups, ranked=False)
+
+    stats = stats.sort_values('value', ascending=False, kind='stable', na_position='last')
+    stats.index = stats.index.astype(str)
+    if groups <= top_n:
+        return BarData(stats[['value', 'error', 'count']], agg, groups)
+
+    top, rest = stats.iloc[:top_n], stats.iloc[top_n:]
+    count = rest['count'].sum()
+    other = {'count': count}
+    if numeric:
+        other['sum'] = rest['sum'].sum()
+        other['mean'] = other['sum'] / count if count else np.nan
+        other['std'] = pooled_std(rest['count'], rest['mean'], rest['std'])
+    if agg == 'median':
+        folded = ~data[x_axis].astype(str).isin(top.index) & data[x_axis].notna()
+        other['median'] = data.loc[folded, y_axis].median()
+    other_row = pd.DataFrame([other], index=[f"Other ({len(rest):,} categories)"])
+    other_row['value'] = other_row[agg]
+    other_row['error'] = _standard_errors(other_row, agg) if numeric else np.nan
+    # Built column by column: pandas warns when concatenating the all-NA error of a count
+    table = pd.DataFrame({col: np.append(top[col].to_numpy(), other_row[col].to_numpy())
+                          for col in ('value', 'error', 'count')},
+                         index=top.index.append(other_row.index).rename(top.index.name))
+    logger.info(f"Folded {len(rest)} of {groups} categories of {x_axis} into Other")
+    return BarData(table, agg, groups, other_groups=len(rest))
@@ -0,0 +1,125 @@
+"""Batch profiling of data files without the Streamlit UI.
+
+    python -m graphs.cli exports/*.csv --out reports --format json parquet html --jobs 4
+
+Each file gets a directory under --out holding report.json, one Parquet file
+per table and report.html. Files whose report.json already records the same
+content key are skipped unless --force is given, so nightly runs only redo
+changed exports.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from graphs.engine import REPORT_FORMATS, EngineOptions, analyze_file, file_key
+from graphs.log_config import configure_logging, worker_logging
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+
+def report_dir(out_root: str, path: str, taken: set) -> str:
+    """Output directory named after the file, suffixed when two inputs share a name."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    name, i = stem, 1
+    while name in taken:
+        i += 1
+        name = f"{stem}-{i}"
+    taken.add(name)
+    return os.path.join(out_root, name)
+
+
+def is_current(out_dir: str, path: str) -> bool:
+    """Whether out_dir holds a complete report of the file's current contents."""
+    try:
+        with open(os.path.join(out_dir, 'report.json'), encoding='utf-8') as f:
+            return json.load(f).get('key') == file_key(path)
+    except (OSError, ValueError):
+        return False
+
+
+def profile_file(path: str, out_dir: str, formats, options: EngineOptions) -> dict:
+    """Analyze one file and write its report; runs in a worker process."""
+    start = time.perf_counter()
+    report = analyze_file(path, options)
+    paths = report.write(out_dir, formats)
+    return {'path': path, 'rows': report.overview['rows'], 'columns': report.overview['columns'],
+            'seconds': time.perf_counter() - start, 'outputs': paths}
+
+
+def run(paths, out_root: str, formats=REPORT_FORMATS, options: EngineOptions = None,
+        jobs: int = 1, force: bool = False) -> int:
+    """Profile every file, jobs at a time; returns the number of failures."""
+    options = options or EngineOptions()
+    taken, tasks = set(), []
+    for path in paths:
+        out_dir = report_dir(out_root, path, taken)
+        if not force and 'json' in formats and is_current(out_dir, path):
+            print(f"skip  {path} (report is current)")
+            continue
+        tasks.append((path, out_dir))
+
+    failures = 0
+    if jobs > 1 and len(tasks) > 1:
+        # Files run side by side, so each gets its share of the cores for column sharding
+        os.environ.setdefault("PARALLEL_WORKERS", str(max((os.cpu_count() or 1) // jobs, 1)))
+        context = multiprocessing.get_context("spawn")
+        initializer, initargs = worker_logging(context)
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=context,
+                                 initializer=initializer, initargs=initargs) as pool:
+            futures = {pool.submit(profile_file, path, out_dir, formats, options): path
+                       for path, out_dir in tasks}
+            for future in as_completed(futures):
+                failures += not _report(futures[future], future.result)
+    else:
+        for path, out_dir in tasks:
+            failures += not _report(path, lambda: profile_file(path, out_dir, formats, options))
+    return failures
+
+
+def _report(path: str, result) -> bool:
+    try:
+        done = result()
+    except Exception as e:
+        logger.error(f"Profiling {path} failed: {e}")
+        print(f"FAIL  {path}: {e}", file=sys.stderr)
+        return False
+    print(f"ok    {path}: {done['rows']} rows x {done['columns']} columns in {done['seconds']:.2f}s")
+    return True
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('files', nargs='+', help="CSV, Excel or Parquet files")
+    parser.add_argument('--out', default='reports', help="output directory (default: reports)")
+    parser.add_argument('--format', nargs='+', choices=REPORT_FORMATS, default=list(REPORT_FORMATS),
+                        dest='formats')
+    parser.add_argument('--jobs', type=int, default=1, help="files profiled in parallel")
+    parser.add_argument('--method', choices=['pearson', 'spearman'], default='pearson')
+    parser.add_argument('--freq', default='ME', help="time series period (pandas offset alias)")
+    parser.add_argument('--sample-size', type=int, default=EngineOptions.sample_size)
+    parser.add_argument('--exact', action='store_true', help="parse every row during type inference")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--approximate', action='store_true', default=None,
+                      help="sketch-based statistics (default: above 1M rows)")
+    mode.add_argument('--no-approximate', action='store_false', dest='approximate')
+    parser.add_argument('--no-compact', action='store_false', dest='compact',
+                        help="keep the loaded column types")
+    parser.add_argument('--force', action='store_true', help="rewrite reports that are current")
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    options = EngineOptions(sample_size=args.sample_size, exact=args.exact, approximate=args.approximate,
+                            compact=args.compact, method=args.method, freq=args.freq,
+                            figures='html' in args.formats)
+    failures = run(args.files, args.out, args.formats, options, args.jobs, args.force)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+import logging
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from graphs.datetimes import parse_datetimes
+from graphs.profiling import DatasetProfile, profile_column
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ColumnChange:
+    column: str
+    before: str
+    after: str
+    before_bytes: int
+    after_bytes: int
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.before_bytes - self.after_bytes
+
+
+@dataclass
+class CompactionReport:
+    """Per-column dtypes and memory before and after compaction."""
+    changes: list = field(default_factory=list)
+    excluded: tuple = ()
+
+    @property
+    def before_bytes(self) -> int:
+        return sum(change.before_bytes for change in self.changes)
+
+    @property
+    def after_bytes(self) -> int:
+        return sum(change.after_bytes for change in self.changes)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame([{
+            'Column': change.column, 'Before': change.before, 'After': change.after,
+            'Before (KB)': change.before_bytes / 1024, 'After (KB)': change.after_bytes / 1024,
+            'Saved (%)': 100 * change.saved_bytes / change.before_bytes if change.before_bytes else 0.0,
+        } for change in self.changes], columns=['Column', 'Before', 'After', 'Before (KB)',
+                                                 'After (KB)', 'Saved (%)']).set_index('Column')
+
+
+def downcast_numeric(series: pd.Series) -> pd.Series:
+    """Smallest integer type that holds the range; float32 only when no value changes."""
+    if pd.api.types.is_bool_dtype(series) or not isinstance(series.dtype, np.dtype):
+        # Nullable extension and Arrow-backed numbers keep their dtype
+        return series
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast='integer')
+    if pd.api.types.is_float_dtype(series) and series.dtype != np.float32:
+        values = series.to_numpy()
+        narrow = values.astype(np.float32)
+        with np.errstate(over='ignore', invalid='ignore'):
+            exact = np.array_equal(narrow.astype(values.dtype), values, equal_nan=True)
+        if exact:
+            return pd.Series(narrow, index=series.index, name=series.name)
+    return series
+
+
+def compact_column(series: pd.Series, profile=None) -> pd.Series:
+    """The column in its most compact lossless dtype, or the series itself.
+
+    Text columns that parse as dates become datetime64 (only if no value is lost
+    to NaT); low-cardinality text columns become category.
+    """
+    profile = profile_column(series) if profile is None else profile
+    if profile.dtype_numeric:
+        return downcast_numeric(series)
+    if profile.dtype_datetime or not (profile.datetime_parseable or profile.is_categorical):
+        return series
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    if profile.datetime_parseable and not profile.numeric_parseable:
+        try:
+            parsed = parse_datetimes(series, errors='coerce')
+        except (ValueError, TypeError, OverflowError):
+            parsed = None
+        if parsed is not None and int(parsed.isna().sum()) == profile.null_count:
+            return parsed
+    if profile.is_categorical:
+        return series.astype('category')
+    return series
+
+
+def compact_frame(data: pd.DataFrame, profile: DatasetProfile = None,
+                  exclude=()) -> tuple:
+    """(compacted copy of data, CompactionReport); excluded columns keep their dtype."""
+    exclude = tuple(col for col in data.columns if col in set(exclude))
+    columns = {}
+    report = CompactionReport(excluded=exclude)
+    for col in data.columns:
+        series = data[col]
+        compacted = series
+        if col not in exclude:
+            column_profile = profile[col] if profile is not None and col in profile else None
+            compacted = compact_column(series, column_profile)
+        columns[col] = compacted
+        report.changes.append(ColumnChange(
+            str(col), str(series.dtype), str(compacted.dtype),
+            int(series.memory_usage(index=False, deep=True)),
+            int(compacted.memory_usage(index=False, deep=True)),
+        ))
+    compacted = pd.DataFrame(columns, index=data.index)
+    logger.info(f"Compacted {len(data.columns)} columns from {report.before_bytes / 1e6:.1f} MB "
+                f"to {report.after_bytes / 1e6:.1f} MB")
+    return compacted, report
@@ -0,0 +1,223 @@
+import functools
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from scipy.cluster.hierarchy import leaves_list, linkage
+from scipy.spatial.distance import squareform
+
+from graphs.figure_cache import FigureCache
+from graphs.fingerprint import dataset_fingerprint, dataset_key
+from graphs.instrumentation import instrumented
+from graphs.parallel import column_matrix
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+CORRELATION_METHODS = ('pearson', 'spearman')
+
+DEFAULT_TOP_PAIRS = 20
+
+# Wider matrices are drawn as a block overview plus full-resolution tiles
+MAX_HEATMAP_COLUMNS = 150
+
+
+@dataclass
+class CorrelationState:
+    """Correlations computed so far for one dataset and method.
+
+    columns holds (name, dtype) tokens, so a column converted to another dtype
+    is treated as a new column and recomputed.
+    """
+    columns: list
+    matrix: np.ndarray
+
+
+# One state per (dataset, method); extended in place as columns are requested
+_states = FigureCache(max_entries=32)
+
+
+def _column_token(data: pd.DataFrame, column) -> tuple:
+    return (column, str(data[column].dtype))
+
+
+def column_values(series: pd.Series, method: str = 'pearson') -> np.ndarray:
+    """Float values of a column (ranks for Spearman), parsing numeric-like text."""
+    if not pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        series = pd.to_numeric(series, errors='coerce')
+    values = series.to_numpy(dtype=float, na_value=np.nan)
+    if method == 'spearman':
+        # Average ranks for ties; missing values stay missing
+        values = pd.Series(values).rank().to_numpy()
+    return values
+
+
+def _column_matrix(data: pd.DataFrame, columns, method: str) -> np.ndarray:
+    # Parsing and ranking are per column, so large frames prepare them in the process pool
+    return column_matrix(functools.partial(column_values, method=method), data, columns)
+
+
+def _centered(x: np.ndarray):
+    """Columns centered on their own means with missing cells zeroed, and the validity mask."""
+    valid = ~np.isnan(x)
+    count = valid.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(valid, x, 0.0).sum(axis=0) / count
+    return np.where(valid, x - mean, 0.0), valid
+
+
+def pairwise_correlation(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pearson correlation of every column of a with every column of b.
+
+    Missing values are handled pairwise-complete, as DataFrame.corr does: each
+    pair uses the rows where both columns have values. Without missing values
+    the whole block is a single centered matrix product.
+    """
+    a, valid_a = _centered(a)
+    b, valid_b = _centered(b)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if valid_a.all() and valid_b.all():
+            cross = a.T @ b
+            r = cross / np.sqrt(np.outer((a * a).sum(axis=0), (b * b).sum(axis=0)))
+            if len(a) < 2:
+                r[:] = np.nan
+        else:
+            fa, fb = valid_a.astype(float), valid_b.astype(float)
+            n = fa.T @ fb
+            sum_a, sum_b = a.T @ fb, fa.T @ b
+            cov = a.T @ b - sum_a * sum_b / n
+            var_a = (a * a).T @ fb - sum_a * sum_a / n
+            var_b = fa.T @ (b * b) - sum_b * sum_b / n
+            r = np.where(n < 2, np.nan, cov / np.sqrt(var_a * var_b))
+    return np.clip(r, -1.0, 1.0)
+
+
+def _state_key(data: pd.DataFrame, method: str):
+    key = dataset_key(data)
+    if key is not None:
+        # Registered datasets keep one state across column conversions
+        return ((key, len(data)), 'correlation', method)
+    fingerprint = dataset_fingerprint(data)
+    return None if fingerprint is None else (fingerprint, 'correlation', method)
+
+
+def _extend(data: pd.DataFrame, state: CorrelationState, tokens: list, method: str) -> CorrelationState:
+    """State covering the old columns plus tokens, computing only the new rows of the matrix."""
+    names = {token[0] for token in tokens}
+    # Columns whose dtype changed are recomputed under their new token
+    kept = [i for i, token in enumerate(state.columns)
+            if token[0] not in names or token in tokens]
+    old = [state.columns[i] for i in kept]
+    new = [token for token in tokens if token not in old]
+    matrix = state.matrix[np.ix_(kept, kept)]
+    if not new:
+        return CorrelationState(old, matrix)
+
+    new_values = _column_matrix(data, [token[0] for token in new], method)
+    all_values = np.hstack([_column_matrix(data, [token[0] for token in old], method), new_values])
+    block = pairwise_correlation(new_values, all_values)
+    n_old = len(old)
+    matrix = np.block([[matrix, block[:, :n_old].T], [block[:, :n_old], block[:, n_old:]]])
+    logger.info(f"Computed {method} correlations for {len(new)} new columns against {n_old} cached")
+    return CorrelationState(old + new, matrix)
+
+
+@instrumented('stats')
+def correlation_matrix(data: pd.DataFrame, columns=None, method: str = 'pearson') -> pd.DataFrame:
+    """Correlation matrix of the columns, computed once per dataset and extended incrementally.
+
+    Numeric-like text columns are parsed on the fly; data is never modified.
+    Spearman ranks each column over its own values, so with missing values it
+    can differ slightly from DataFrame.corr, which re-ranks every pair.
+    """
+    if method not in CORRELATION_METHODS:
+        raise ValueError(f"Unknown correlation method {method!r}")
+    columns = list(data.select_dtypes(include=['number']).columns if columns is None else columns)
+    tokens = [_column_token(data, col) for col in columns]
+
+    key = _state_key(data, method)
+    state = _states.get(key) if key is not None else None
+    if state is None or not set(tokens) <= set(state.columns):
+        state = _extend(data, state or CorrelationState([], np.empty((0, 0))), tokens, method)
+        if key is not None:
+            _states.put(key, state)
+
+    position = {token: i for i, token in enumerate(state.columns)}
+    index = [position[token] for token in tokens]
+    matrix = state.matrix[np.ix_(index, index)].copy()
+    # A column correlates perfectly with itself unless it is constant or empty
+    diagonal = np.diagonal(matrix).copy()
+    np.fill_diagonal(matrix, np.where(np.isnan(diagonal), np.nan, 1.0))
+    return pd.DataFrame(matrix, index=columns, columns=columns)
+
+
+def top_correlated_pairs(corr: pd.DataFrame, k: int = DEFAULT_TOP_PAIRS,
+                         threshold: float = 0.0) -> pd.DataFrame:
+    """The k most strongly correlated distinct column pairs with |r| >= threshold."""
+    values = corr.to_numpy()
+    upper_i, upper_j = np.triu_indices(len(values), k=1)
+    r = values[upper_i, upper_j]
+    strength = np.abs(r)
+    candidates = np.flatnonzero(np.nan_to_num(strength, nan=-1.0) >= threshold)
+    k = max(k, 0)
+    if len(candidates) > k > 0:
+        candidates = candidates[np.argpartition(-strength[candidates], k - 1)[:k]]
+    candidates = candidates[np.argsort(-strength[candidates], kind='stable')][:k]
+    return pd.DataFrame({
+        'Feature 1': corr.index[upper_i[candidates]],
+        'Feature 2': corr.columns[upper_j[candidates]],
+        'Correlation': r[candidates],
+    })
+
+
+def cluster_order(corr: pd.DataFrame) -> list:
+    """Columns reordered by average-linkage clustering on 1 - |r|, so related columns sit together."""
+    if len(corr) < 3:
+        return list(corr.columns)
+    distance = 1 - np.abs(np.nan_to_num(corr.to_numpy(), nan=0.0))
+    distance = np.clip((distance + distance.T) / 2, 0, None)
+    np.fill_diagonal(distance, 0)
+    order = leaves_list(linkage(squareform(distance, checks=False), method='average'))
+    return list(corr.columns[order])
+
+
+def threshold_matrix(corr: pd.DataFrame, threshold: float) -> pd.DataFrame:
+    """Correlations with |r| below threshold blanked out (the diagonal is kept)."""
+    if threshold <= 0:
+        return corr
+    values = corr.to_numpy().copy()
+    weak = np.abs(np.nan_to_num(values)) < threshold
+    np.fill_diagonal(weak, False)
+    values[weak] = np.nan
+    return pd.DataFrame(values, index=corr.index, columns=corr.columns)
+
+
+def block_overview(corr: pd.DataFrame, max_columns: int = MAX_HEATMAP_COLUMNS) -> pd.DataFrame:
+    """Matrix reduced to at most max_columns blocks per side.
+
+    Each cell holds the strongest (signed) correlation between two different
+    columns of its blocks, so strong pairs stay visible after the reduction.
+    """
+    n = len(corr)
+    if n <= max_columns:
+        return corr
+    size = int(np.ceil(n / max_columns))
+    n_blocks = int(np.ceil(n / size))
+    values = corr.to_numpy().copy()
+    np.fill_diagonal(values, np.nan)
+    padded = np.full((n_blocks * size, n_blocks * size), np.nan)
+    padded[:n, :n] = values
+    blocks = padded.reshape(n_blocks, size, n_blocks, size).transpose(0, 2, 1, 3).reshape(n_blocks, n_blocks, -1)
+    strength = np.nan_to_num(np.abs(blocks), nan=-1.0)
+    strongest = np.take_along_axis(blocks, strength.argmax(axis=2)[..., None], axis=2)[..., 0]
+    labels = [f"{corr.columns[i]} … {corr.columns[min(i + size, n) - 1]}" for i in range(0, n, size)]
+    return pd.DataFrame(strongest, index=labels, columns=labels)
+
+
+def correlation_tile(corr: pd.DataFrame, row_tile: int, col_tile: int,
+                     tile_size: int = MAX_HEATMAP_COLUMNS) -> pd.DataFrame:
+    """Full-resolution tile of the matrix; tiles are numbered from 0 along each axis."""
+    rows = slice(row_tile * tile_size, (row_tile + 1) * tile_size)
+    cols = slice(col_tile * tile_size, (col_tile + 1) * tile_size)
+    return corr.iloc[rows, cols]
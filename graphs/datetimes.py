@@ -0,0 +1,121 @@
+import logging
+import warnings
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+from graphs.figure_cache import FigureCache
+from graphs.fingerprint import dataset_fingerprint
+from graphs.instrumentation import instrumented
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Values inspected when inferring a column's format
+FORMAT_SAMPLE_SIZE = 200
+
+# Parsed columns are shared by every page; callers must not modify them in place
+_parsed = FigureCache(max_entries=64)
+
+
+def _format_sample(series: pd.Series, sample_size: int = FORMAT_SAMPLE_SIZE) -> pd.Series:
+    """Evenly spaced non-null values of the series, as strings."""
+    values = series.dropna()
+    if len(values) > sample_size:
+        values = values.iloc[np.linspace(0, len(values) - 1, sample_size).astype(int)]
+    return values.astype(str)
+
+
+def infer_datetime_format(series: pd.Series, sample_size: int = FORMAT_SAMPLE_SIZE):
+    """strftime format that parses every sampled value, 'ISO8601', or None if there is none."""
+    sample = _format_sample(series, sample_size)
+    if sample.empty:
+        return None
+    candidates = []
+    with warnings.catch_warnings():
+        # dayfirst is only a hint for ambiguous values
+        warnings.simplefilter('ignore', UserWarning)
+        for value in sample.iloc[:5]:
+            for dayfirst in (False, True):
+                fmt = guess_datetime_format(value, dayfirst=dayfirst)
+                if fmt is not None and fmt not in candidates:
+                    candidates.append(fmt)
+    # ISO 8601 with varying precision or offsets still parses on the fast path
+    candidates.append('ISO8601')
+    for fmt in candidates:
+        try:
+            parsed = pd.to_datetime(sample, format=fmt, errors='coerce')
+        except (ValueError, TypeError):
+            continue
+        if parsed.notna().all():
+            return fmt
+    return None
+
+
+def _parse_mixed(series: pd.Series, errors: str) -> pd.Series:
+    """Element-by-element parsing for values that share no single format."""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        return pd.to_datetime(series, errors=errors, format='mixed')
+
+
+def _is_iso(fmt: str) -> bool:
+    return fmt == 'ISO8601' or fmt.startswith('%Y-%m-%d')
+
+
+def _parse_with_format(values: pd.Series, fmt, errors: str) -> pd.Series:
+    if fmt is None:
+        return _parse_mixed(values, errors)
+    parsed = pd.to_datetime(values, format=fmt, errors='coerce')
+    rejected = parsed.isna() & values.notna()
+    if rejected.any():
+        logger.debug(f"{int(rejected.sum())} values of {values.name} do not match {fmt}")
+        fallback = _parse_mixed(values[rejected], errors)
+        if fallback.dtype != parsed.dtype:
+            # Mixed offsets: let pandas decide the dtype for all values
+            return _parse_mixed(values, errors)
+        parsed[rejected] = fallback
+    return parsed
+
+
+def parse_datetimes(series: pd.Series, errors: str = 'raise', format: str = None) -> pd.Series:
+    """pd.to_datetime with a format inferred once from a sample instead of per element.
+
+    Non-ISO formats parse each distinct value once. Values the inferred format
+    rejects fall back to element-by-element parsing, so mixed-format columns
+    still parse.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return pd.to_datetime(series, errors=errors)
+    fmt = format or infer_datetime_format(series)
+    if fmt is not None and _is_iso(fmt):
+        # pandas' ISO 8601 parser is faster than hashing the strings first
+        return _parse_with_format(series, fmt, errors)
+    # strptime-style parsing is slow; parse each distinct value once and broadcast
+    codes, uniques = pd.factorize(series)
+    parsed = _parse_with_format(pd.Series(uniques), fmt, errors)
+    # Code -1 marks missing values, which take() fills with NaT
+    return pd.Series(parsed.array.take(codes, allow_fill=True), index=series.index, name=series.name)
+
+
+@instrumented('parse')
+def to_datetime_column(data: pd.DataFrame, column) -> pd.Series:
+    """A column of data parsed as datetimes, cached per dataset version and column.
+
+    Columns are detected as datetimes from a sample, so values that do not
+    parse become NaT, which the time series pages skip, instead of raising.
+    """
+    fingerprint = dataset_fingerprint(data)
+    key = None if fingerprint is None else (fingerprint, 'datetime', column)
+    parsed = _parsed.get(key) if key is not None else None
+    if parsed is None:
+        parsed = parse_datetimes(data[column], errors='coerce')
+        rejected = int(parsed.isna().sum() - data[column].isna().sum())
+        if rejected:
+            logger.warning(f"{rejected} values of {column} are not dates and were skipped")
+        if key is not None:
+            _parsed.put(key, parsed)
+    return parsed
@@ -0,0 +1,127 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Maximum number of points sent to the browser per trace
+DEFAULT_POINT_BUDGET = 10000
+
+# Grid resolution used to keep sparse regions (outliers) when sampling scatter plots
+SCATTER_GRID_BINS = 100
+
+
+def _as_float(series: pd.Series) -> np.ndarray:
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.astype('int64').to_numpy(dtype=float)
+    return series.to_numpy(dtype=float, na_value=np.nan)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of the points that best keep the line's shape.
+
+    x must be sorted ascending. The first and last points are always kept.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # threshold - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start = edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # Twice the triangle area between the last kept point, each candidate and the next bucket's mean
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def decimate_line(data: pd.DataFrame, x_axis: str, y_axis: str,
+                  max_points: int = DEFAULT_POINT_BUDGET) -> pd.DataFrame:
+    """Reduce a line series to at most max_points rows with LTTB, sorted by x."""
+    if len(data) <= max_points:
+        return data
+    x_series = data[x_axis]
+    if not (pd.api.types.is_numeric_dtype(x_series)
+            or pd.api.types.is_datetime64_any_dtype(x_series)):
+        # Categorical x has no geometry to preserve
+        return data.iloc[np.linspace(0, len(data) - 1, max_points).astype(np.int64)]
+
+    subset = data[[x_axis, y_axis]].dropna().sort_values(x_axis, kind='mergesort')
+    indices = lttb_indices(_as_float(subset[x_axis]), _as_float(subset[y_axis]), max_points)
+    logger.info(f"LTTB reduced {len(data)} points to {len(indices)}")
+    return subset.iloc[indices]
+
+
+def sample_scatter(data: pd.DataFrame, x_axis: str, y_axis: str,
+                   max_points: int = DEFAULT_POINT_BUDGET, random_state: int = 0) -> pd.DataFrame:
+    """Stratified sample of a scatter plot that keeps one point in every occupied grid cell.
+
+    Dense regions are thinned uniformly while sparse regions and outliers survive.
+    """
+    if len(data) <= max_points:
+        return data
+    rng = np.random.default_rng(random_state)
+    subset = data.dropna(subset=[x_axis, y_axis])
+    if len(subset) <= max_points:
+        return subset
+    try:
+        x, y = _as_float(subset[x_axis]), _as_float(subset[y_axis])
+    except (ValueError, TypeError):
+        positions = rng.choice(len(subset), size=min(max_points, len(subset)), replace=False)
+        return subset.iloc[np.sort(positions)]
+
+    cell = _grid_cells(x, SCATTER_GRID_BINS) * SCATTER_GRID_BINS + _grid_cells(y, SCATTER_GRID_BINS)
+    order = rng.permutation(len(subset))
+    _, first = np.unique(cell[order], return_index=True)
+    keep = order[first]
+    if len(keep) > max_points:
+        keep = rng.choice(keep, size=max_points, replace=False)
+    elif len(keep) < max_points:
+        remaining = np.ones(len(subset), dtype=bool)
+        remaining[keep] = False
+        rest = np.flatnonzero(remaining)
+        keep = np.concatenate([keep, rng.choice(rest, size=max_points - len(keep), replace=False)])
+    logger.info(f"Stratified sampling reduced {len(data)} points to {len(keep)}")
+    return subset.iloc[np.sort(keep)]
+
+
+def bin_scatter(data: pd.DataFrame, x_axis: str, y_axis: str, bins: int = SCATTER_GRID_BINS):
+    """2D histogram of a scatter plot: (counts, x_centers, y_centers)."""
+    subset = data[[x_axis, y_axis]].dropna()
+    counts, x_edges, y_edges = np.histogram2d(_as_float(subset[x_axis]),
+                                              _as_float(subset[y_axis]), bins=bins)
+    x_centers = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centers = (y_edges[:-1] + y_edges[1:]) / 2
+    # Heatmap z is indexed [row=y][col=x]
+    return counts.T, x_centers, y_centers
+
+
+def _grid_cells(values: np.ndarray, bins: int) -> np.ndarray:
+    low, high = values.min(), values.max()
+    if high == low:
+        return np.zeros(len(values), dtype=np.int64)
+    return np.minimum(((values - low) / (high - low) * bins).astype(np.int64), bins - 1)
+
+
+def annotate_reduction(fig, shown: int, total: int, method: str, text: str = None):
+    """Add a note to the chart when fewer points are drawn than exist in the data."""
+    if shown < total:
+        text = text or f"Showing {shown:,} of {total:,} points ({method})"
+        fig.add_annotation(text=text,
+                           xref='paper', yref='paper', x=1, y=1.08,
+                           showarrow=False, font={"size": 11, "color": "gray"})
+    return fig
@@ -0,0 +1,168 @@
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from graphs.datetimes import to_datetime_column
+from graphs.figure_cache import FigureCache
+from graphs.fingerprint import dataset_fingerprint
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+DECOMPOSITION_METHODS = ('classical', 'stl')
+
+# Regular grid candidates, finest first; the finest one that fits the budget is used
+GRID_FREQUENCIES = ('min', '15min', 'h', 'D', '7D', 'MS', 'QS', 'YS')
+MAX_GRID_POINTS = 20_000
+
+# Calendar steps: NumPy unit the timestamps are truncated to, units per step, and the
+# longest step, so month-end data (28 to 31 days apart) still fits a monthly grid
+_CALENDAR_STEPS = {
+    'MS': ('M', 1, pd.Timedelta(days=31)),
+    'QS': ('M', 3, pd.Timedelta(days=92)),
+    'YS': ('Y', 1, pd.Timedelta(days=366)),
+}
+
+# Autocorrelation a period needs before it is treated as seasonality
+MIN_PERIOD_ACF = 0.1
+
+
+@dataclass
+class Decomposition:
+    observed: pd.Series
+    trend: pd.Series
+    seasonal: pd.Series
+    resid: pd.Series
+    period: int
+    freq: str
+    method: str
+
+
+def step_width(freq: str) -> pd.Timedelta:
+    """Width of one grid step; calendar steps count as their longest period."""
+    if freq in _CALENDAR_STEPS:
+        return _CALENDAR_STEPS[freq][2]
+    return pd.Timedelta(pd.tseries.frequencies.to_offset(freq))
+
+
+def grid_frequency(dates: pd.Series, max_points: int = MAX_GRID_POINTS) -> str:
+    """Finest grid no finer than the typical spacing of the data that stays within max_points."""
+    valid = dates.dropna()
+    if valid.empty:
+        return GRID_FREQUENCIES[-1]
+    span = valid.max() - valid.min()
+    stamps = np.unique(valid.to_numpy())
+    spacing = pd.Timedelta(np.median(np.diff(stamps))) if len(stamps) > 1 else pd.Timedelta(0)
+    for freq in GRID_FREQUENCIES:
+        step = step_width(freq)
+        if step >= spacing and span / step <= max_points:
+            return freq
+    return GRID_FREQUENCIES[-1]
+
+
+def regular_series(dates: pd.Series, values: pd.Series, freq: str) -> pd.Series:
+    """Mean of values per fixed-width or calendar bin, with empty bins interpolated.
+
+    Duplicate and irregular timestamps collapse into their bin, so the result
+    is evenly spaced as decomposition requires.
+    """
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    stamps = dates.to_numpy(dtype='datetime64[ns]')
+    numbers = pd.to_numeric(values, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    keep = ~np.isnat(stamps) & ~np.isnan(numbers)
+    stamps, numbers = stamps[keep], numbers[keep]
+    if stamps.size == 0:
+        return pd.Series(dtype=float, name=values.name)
+    if freq in _CALENDAR_STEPS:
+        # Months or years since 1970, so quarters start in January, April, July and October
+        unit, units_per_step, _ = _CALENDAR_STEPS[freq]
+        periods = stamps.astype(f'datetime64[{unit}]').view(np.int64) // units_per_step
+        first = periods.min()
+        bins = periods - first
+        start = pd.Timestamp(np.datetime64(int(first * units_per_step), unit))
+        index = pd.date_range(start, periods=int(bins.max()) + 1, freq=freq)
+    else:
+        step = step_width(freq).value
+        ns = stamps.view(np.int64)
+        start = ns.min() // step * step
+        bins = (ns - start) // step
+        index = pd.DatetimeIndex(start + np.arange(int(bins.max()) + 1) * step, freq=freq)
+    counts = np.bincount(bins)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.bincount(bins, weights=numbers) / counts
+    return pd.Series(means, index=index, name=values.name).interpolate(limit_direction='both')
+
+
+def detect_period(values: np.ndarray, max_period: int = None) -> int:
+    """Dominant seasonal period (in grid steps) from the FFT autocorrelation, or None."""
+    x = np.asarray(values, dtype=float)
+    n = len(x)
+    if n < 8:
+        return None
+    # Remove the linear trend so it does not dominate the autocorrelation
+    t = np.arange(n)
+    x = x - np.polyval(np.polyfit(t, x, 1), t)
+    size = 1 << int(np.ceil(np.log2(2 * n)))
+    spectrum = np.fft.rfft(x, size)
+    acf = np.fft.irfft(spectrum * np.conj(spectrum), size)[:n]
+    if acf[0] <= 0:
+        return None
+    acf /= acf[0]
+    max_period = min(max_period or n // 2, n // 2)
+    lags = np.arange(2, max_period)
+    if lags.size == 0:
+        return None
+    # Local maxima of the autocorrelation, strongest first
+    inner = acf[lags]
+    peaks = lags[(inner > acf[lags - 1]) & (inner >= acf[lags + 1])]
+    if peaks.size == 0:
+        return None
+    best = peaks[np.argmax(acf[peaks])]
+    return int(best) if acf[best] >= MIN_PERIOD_ACF else None
+
+
+def decompose(series: pd.Series, period: int, method: str = 'classical') -> Decomposition:
+    """Trend, seasonal and residual components of an evenly spaced series."""
+    if method not in DECOMPOSITION_METHODS:
+        raise ValueError(f"Unknown decomposition method {method!r}")
+    if len(series) < 2 * period:
+        raise ValueError(f"Need at least {2 * period} points for period {period}, got {len(series)}")
+    if method == 'stl':
+        from statsmodels.tsa.seasonal import STL
+        result = STL(series, period=period, robust=True).fit()
+    else:
+        from statsmodels.tsa.seasonal import seasonal_decompose
+        result = seasonal_decompose(series, period=period)
+    return Decomposition(series, result.trend, result.seasonal, result.resid, period,
+                         series.index.freqstr, method)
+
+
+_decompositions = FigureCache(max_entries=64)
+
+
+def get_decomposition(data: pd.DataFrame, date_col: str, metric_col: str, period: int = None,
+                      method: str = 'classical', freq: str = None) -> Decomposition:
+    """Decomposition of a metric over a date column, cached per (columns, period, method).
+
+    The rows are first averaged onto a regular grid (chosen automatically unless
+    freq is given); without a period the dominant one is detected, falling back
+    to 2 when the series shows no seasonality.
+    """
+    fingerprint = dataset_fingerprint(data)
+    key = None if fingerprint is None else (
+        fingerprint, 'decomposition', date_col, metric_col, period, method, freq)
+    result = _decompositions.get(key) if key is not None else None
+    if result is None:
+        dates = to_datetime_column(data, date_col)
+        freq = freq or grid_frequency(dates)
+        series = regular_series(dates, data[metric_col], freq)
+        if period is None:
+            period = detect_period(series.to_numpy()) or 2
+            logger.info(f"Detected period {period} ({freq} steps) for {metric_col}")
+        result = decompose(series, period, method)
+        if key is not None:
+            _decompositions.put(key, result)
+    return result
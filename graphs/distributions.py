@@ -0,0 +1,81 @@
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+MAX_HISTOGRAM_BINS = 100
+
+# Outliers beyond this many are thinned, always keeping the most extreme values
+MAX_BOX_OUTLIERS = 1000
+
+
+@dataclass
+class BoxStats:
+    q1: float
+    median: float
+    q3: float
+    mean: float
+    lowerfence: float
+    upperfence: float
+    outliers: np.ndarray
+    outlier_count: int
+    count: int
+
+
+def finite_values(series: pd.Series) -> np.ndarray:
+    if not pd.api.types.is_numeric_dtype(series):
+        series = pd.to_numeric(series, errors='coerce')
+    values = series.to_numpy(dtype=float, na_value=np.nan)
+    return values[np.isfinite(values)]
+
+
+def auto_bin_width(values: np.ndarray) -> float:
+    """Bin width of numpy's 'auto' rule: the smaller of the Freedman-Diaconis and Sturges widths."""
+    span = values.max() - values.min()
+    sturges = span / (np.log2(values.size) + 1)
+    q25, q75 = np.percentile(values, [25, 75])
+    fd = 2 * (q75 - q25) * values.size ** (-1 / 3)
+    return min(fd, sturges) if fd > 0 else sturges
+
+
+def histogram_bins(values: np.ndarray, bins: int = None):
+    """Counts and edges of a histogram; bin count from numpy's 'auto' rule, capped."""
+    if values.size == 0:
+        return np.array([], dtype=np.int64), np.array([0.0, 1.0])
+    if bins is None:
+        # Capped before any edges exist: one outlier can make the 'auto' edge array huge
+        width = auto_bin_width(values)
+        span = values.max() - values.min()
+        bins = min(int(np.ceil(span / width)), MAX_HISTOGRAM_BINS) if width > 0 else 1
+    edges = np.histogram_bin_edges(values, bins=max(bins, 1))
+    counts, edges = np.histogram(values, bins=edges)
+    return counts, edges
+
+
+def box_stats(values: np.ndarray, max_outliers: int = MAX_BOX_OUTLIERS) -> BoxStats:
+    """Quartiles, Tukey fences and outliers, matching plotly's default box statistics."""
+    if values.size == 0:
+        raise ValueError("No numeric values to summarize")
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    low_limit, high_limit = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+
+    inside = values[(values >= low_limit) & (values <= high_limit)]
+    outliers = values[(values < low_limit) | (values > high_limit)]
+    outlier_count = outliers.size
+    if outlier_count > max_outliers:
+        # Keep the extremes on both sides and an even spread of the rest
+        outliers = np.sort(outliers)
+        positions = np.unique(np.linspace(0, outlier_count - 1, max_outliers).astype(np.int64))
+        outliers = outliers[positions]
+
+    return BoxStats(
+        q1=float(q1), median=float(median), q3=float(q3),
+        mean=float(values.mean()),
+        lowerfence=float(inside.min()), upperfence=float(inside.max()),
+        outliers=outliers, outlier_count=int(outlier_count), count=int(values.size),
+    )
@@ -0,0 +1,284 @@
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from graphs.compaction import compact_frame
+from graphs.correlation import (DEFAULT_TOP_PAIRS, MAX_HEATMAP_COLUMNS, block_overview, cluster_order,
+                                correlation_matrix, top_correlated_pairs)
+from graphs.datetimes import to_datetime_column
+from graphs.fingerprint import dataset_key, register_dataset
+from graphs.ingestion import content_key, frame_memory
+from graphs.inspector import categorical_table
+from graphs.patterns import get_time_patterns
+from graphs.profiling import DatasetProfile, profile_dataset
+from graphs.rollups import get_rollup
+from graphs.sketches import APPROX_ROW_THRESHOLD, approx_duplicate_rows
+from graphs.statistics import numeric_statistics
+from graphs.utils import DEFAULT_SAMPLE_SIZE
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+READERS = {
+    '.csv': pd.read_csv,
+    '.xlsx': pd.read_excel,
+    '.xls': pd.read_excel,
+    '.parquet': pd.read_parquet,
+}
+REPORT_FORMATS = ('json', 'parquet', 'html')
+
+# Report size limits for wide datasets
+MAX_TIME_SERIES_METRICS = 10
+MAX_REPORT_FIGURES = 12
+TOP_VALUES = 10
+
+
+@dataclass
+class EngineOptions:
+    sample_size: int = DEFAULT_SAMPLE_SIZE
+    exact: bool = False
+    approximate: bool = None  # None: on above APPROX_ROW_THRESHOLD rows, as in the app
+    compact: bool = True
+    method: str = 'pearson'
+    top_pairs: int = DEFAULT_TOP_PAIRS
+    freq: str = 'ME'
+    figures: bool = False
+    workers: int = None
+
+
+@dataclass
+class AnalysisReport:
+    """Everything the Data Analysis, Statistics, Correlations and Time Series pages compute."""
+    source: str
+    key: str
+    overview: dict
+    tables: dict = field(default_factory=dict)
+    categorical: dict = field(default_factory=dict)
+    figures: dict = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        """JSON-serializable form of the report (figures excluded)."""
+        return {
+            'source': self.source,
+            'key': self.key,
+            'overview': self.overview,
+            'tables': {name: json.loads(table.to_json(orient='split', date_format='iso',
+                                                      default_handler=str))
+                       for name, table in self.tables.items()},
+            'categorical': self.categorical,
+        }
+
+    def write(self, out_dir: str, formats=REPORT_FORMATS) -> list:
+        """Write the report as report.json, <table>.parquet and report.html; returns the paths."""
+        unknown = set(formats) - set(REPORT_FORMATS)
+        if unknown:
+            raise ValueError(f"Unknown report formats {sorted(unknown)}, expected {REPORT_FORMATS}")
+        os.makedirs(out_dir, exist_ok=True)
+        paths = []
+        if 'parquet' in formats:
+            for name, table in self.tables.items():
+                path = os.path.join(out_dir, f"{name}.parquet")
+                _parquet_safe(table).to_parquet(path)
+                paths.append(path)
+        if 'html' in formats:
+            path = os.path.join(out_dir, 'report.html')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self.to_html())
+            paths.append(path)
+        if 'json' in formats:
+            # Written last: its presence marks a complete report
+            path = os.path.join(out_dir, 'report.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, indent=2, default=str)
+            paths.append(path)
+        return paths
+
+    def to_html(self) -> str:
+        parts = [f"<h1>{self.source}</h1>",
+                 pd.Series(self.overview, dtype=object).to_frame('Value').to_html()]
+        for name, table in self.tables.items():
+            parts.append(f"<h2>{name.replace('_', ' ').title()}</h2>")
+            parts.append(table.round(4).to_html(max_rows=200))
+        if self.categorical:
+            parts.append("<h2>Categorical Statistics</h2>")
+            parts.append(pd.DataFrame.from_dict(self.categorical, orient='index')
+                         .drop(columns='top_values').to_html())
+        for i, (name, fig) in enumerate(self.figures.items()):
+            parts.append(f"<h2>{name}</h2>")
+            parts.append(fig.to_html(full_html=False, include_plotlyjs='cdn' if i == 0 else False))
+        return f"<html><head><meta charset='utf-8'></head><body>{''.join(parts)}</body></html>"
+
+
+def _parquet_safe(table: pd.DataFrame) -> pd.DataFrame:
+    """Index as a column and mixed-type object columns as strings, which Parquet requires."""
+    table = table.reset_index(drop=isinstance(table.index, pd.RangeIndex))
+    table.columns = [str(col) for col in table.columns]
+    for col in table.columns:
+        if pd.api.types.is_object_dtype(table[col]):
+            table[col] = table[col].map(lambda value: None if pd.isna(value) else str(value))
+    return table
+
+
+def load_dataset(path: str) -> pd.DataFrame:
+    """Read a CSV, Excel or Parquet file, registered under its content key like an upload.
+
+    Like an upload it is read-only; copy it (data.copy()) before editing cells.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in READERS:
+        raise ValueError(f"Unsupported file type {ext!r}, expected one of {sorted(READERS)}")
+    with open(path, 'rb') as f:
+        key = content_key(f)
+    data = READERS[ext](path)
+    register_dataset(data, key)
+    return data
+
+
+def file_key(path: str) -> str:
+    with open(path, 'rb') as f:
+        return content_key(f)
+
+
+def duplicate_rows(data: pd.DataFrame, approximate: bool = False) -> int:
+    """Duplicate row count, estimated from row hashes in approximate mode."""
+    return approx_duplicate_rows(data) if approximate else int(data.duplicated().sum())
+
+
+def data_overview(data: pd.DataFrame, profile: DatasetProfile, approximate: bool = False) -> dict:
+    return {
+        'rows': profile.rows,
+        'columns': len(profile.columns),
+        'missing_values': profile.total_nulls,
+        'duplicate_rows': duplicate_rows(data, approximate),
+        'memory_bytes': frame_memory(data),
+        'approximate': approximate,
+    }
+
+
+def datetime_statistics(data: pd.DataFrame, columns) -> pd.DataFrame:
+    """Range, span, missing and unique dates per datetime column, as on the Statistics page."""
+    rows = {}
+    for col in columns:
+        dates = to_datetime_column(data, col)
+        first, last = dates.min(), dates.max()
+        rows[col] = {
+            'Min': first, 'Max': last,
+            'Span (days)': (last - first).days if pd.notna(first) else np.nan,
+            'Missing': int(dates.isna().sum()), 'Missing %': float(dates.isna().mean() * 100),
+            'Unique': int(dates.nunique()),
+        }
+    return pd.DataFrame.from_dict(rows, orient='index',
+                                  columns=['Min', 'Max', 'Span (days)', 'Missing', 'Missing %', 'Unique'])
+
+
+def categorical_statistics(data: pd.DataFrame, columns, approximate: bool = False,
+                           top_values: int = TOP_VALUES) -> dict:
+    """Unique count, mode and top values per categorical column; no charts are built."""
+    result = {}
+    for col in columns:
+        summary = categorical_table(data, col, approximate)
+        top = summary.table['Count'].head(top_values)
+        result[str(col)] = {
+            'unique': None if summary.unique is None else int(summary.unique),
+            'approximate': summary.approximate,
+            'mode': None if summary.mode is None else str(summary.mode),
+            'mode_ratio': float(summary.mode_ratio),
+            'top_values': {str(value): int(count) for value, count in top.items()},
+        }
+    return result
+
+
+def time_series_tables(data: pd.DataFrame, date_columns, metric_columns, freq: str = 'ME'):
+    """(per-period mean and count, hour/weekday/month means) for each date column and metric, long format."""
+    periods, patterns = [], []
+    for date_col in date_columns:
+        for metric_col in metric_columns:
+            cube = get_rollup(data, date_col, metric_col)
+            rolled = pd.DataFrame({'mean': cube.rollup(freq, 'mean'), 'count': cube.rollup(freq, 'count')})
+            periods.append(rolled.rename_axis('period').reset_index()
+                           .assign(date_column=date_col, metric=metric_col))
+            found = get_time_patterns(data, date_col, metric_col)
+            for field_name, means in (('hour', found.hourly), ('weekday', found.weekly),
+                                      ('month', found.monthly)):
+                patterns.append(pd.DataFrame({'date_column': date_col, 'metric': metric_col,
+                                              'field': field_name, 'value': means.index.astype(str),
+                                              'mean': means.to_numpy()}))
+    columns = ['date_column', 'metric', 'period', 'mean', 'count']
+    period_table = pd.concat(periods, ignore_index=True)[columns] if periods else pd.DataFrame(columns=columns)
+    pattern_table = (pd.concat(patterns, ignore_index=True) if patterns else
+                     pd.DataFrame(columns=['date_column', 'metric', 'field', 'value', 'mean']))
+    return period_table, pattern_table
+
+
+def _report_figures(data: pd.DataFrame, corr: pd.DataFrame, date_columns, metric_columns,
+                    freq: str) -> dict:
+    from graphs.plotting import plot_correlation_matrix, plot_histogram, plot_time_series
+
+    figures = {}
+    if corr is not None and len(corr) > 1:
+        heatmap = corr.loc[cluster_order(corr), cluster_order(corr)]
+        if len(heatmap) > MAX_HEATMAP_COLUMNS:
+            heatmap = block_overview(heatmap)
+        figures['Correlation Matrix'] = plot_correlation_matrix(heatmap)
+    for col in metric_columns[:MAX_REPORT_FIGURES]:
+        figures[f'Distribution of {col}'] = plot_histogram(data, col)
+    for date_col in date_columns[:1]:
+        for metric_col in metric_columns[:MAX_REPORT_FIGURES]:
+            figures[f'{metric_col} over {date_col}'] = plot_time_series(data, date_col, metric_col, freq)
+    return figures
+
+
+def analyze(data: pd.DataFrame, options: EngineOptions = None, source: str = '<frame>',
+            key: str = None) -> AnalysisReport:
+    """Profile, statistics, correlations and time series of a dataset, without any UI."""
+    options = options or EngineOptions()
+    start = time.perf_counter()
+    approximate = options.approximate
+    if approximate is None:
+        approximate = len(data) > APPROX_ROW_THRESHOLD
+    profile = profile_dataset(data, options.sample_size, options.exact, approximate, options.workers)
+    tables = {}
+    if options.compact:
+        data, compaction = compact_frame(data, profile)
+        if key is not None:
+            register_dataset(data, f"{key}:compact")
+        profile = profile_dataset(data, options.sample_size, options.exact, approximate, options.workers)
+        tables['compaction'] = compaction.to_frame()
+
+    overview = data_overview(data, profile, approximate)
+    tables['profile'] = profile.to_frame()
+    numeric_cols = profile.numeric_columns
+    tables['numeric_statistics'] = numeric_statistics(data, numeric_cols, approximate=approximate,
+                                                      workers=options.workers)
+    # Numbers also parse as epoch timestamps; only report real date columns
+    date_cols = [col for col in profile.datetime_columns if not profile[col].is_numeric]
+    tables['datetime_statistics'] = datetime_statistics(data, date_cols)
+    categorical = categorical_statistics(data, profile.categorical_columns, approximate)
+
+    corr = None
+    numeric_like = profile.numeric_like_columns
+    if len(numeric_like) > 1:
+        corr = correlation_matrix(data, numeric_like, options.method)
+        tables['correlation'] = corr
+        tables['top_pairs'] = top_correlated_pairs(corr, options.top_pairs)
+
+    metrics = numeric_cols[:MAX_TIME_SERIES_METRICS]
+    if date_cols and metrics:
+        tables['time_series'], tables['time_patterns'] = time_series_tables(data, date_cols, metrics,
+                                                                             options.freq)
+
+    figures = _report_figures(data, corr, date_cols, metrics, options.freq) if options.figures else {}
+    overview['seconds'] = round(time.perf_counter() - start, 3)
+    logger.info(f"Analyzed {source} ({overview['rows']} rows, {overview['columns']} columns) "
+                f"in {overview['seconds']:.2f}s")
+    return AnalysisReport(source, key, overview, tables, categorical, figures)
+
+
+def analyze_file(path: str, options: EngineOptions = None) -> AnalysisReport:
+    data = load_dataset(path)
+    return analyze(data, options, source=os.path.basename(path), key=dataset_key(data))
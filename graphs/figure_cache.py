@@ -0,0 +1,95 @@
+import functools
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from graphs.fingerprint import dataset_fingerprint
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+DEFAULT_FIGURE_CACHE_SIZE = int(os.getenv("FIGURE_CACHE_SIZE", "256"))
+
+
+class FigureCache:
+    """LRU of built plotly figures keyed by dataset fingerprint and plot parameters.
+
+    Cached figures are shared between reruns and sessions, so callers must not
+    mutate a returned figure.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_FIGURE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def peek(self, key) -> bool:
+        """Whether key is cached, without touching LRU order or hit counts."""
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def put(self, key, fig):
+        with self._lock:
+            self._entries[key] = fig
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, dataset_key: str):
+        """Drop every figure built from the dataset with the given content key."""
+        with self._lock:
+            stale = [key for key in self._entries if key[0][0] == dataset_key]
+            for key in stale:
+                del self._entries[key]
+        logger.info(f"Invalidated {len(stale)} cached figures for dataset {dataset_key}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_figures = FigureCache()
+
+
+def get_figure_cache() -> FigureCache:
+    return _figures
+
+
+def cached_figure(method):
+    """Memoize a GraphPlotter method on (dataset fingerprint, method, arguments)."""
+    @functools.wraps(method)
+    def wrapper(self, data, *args, **kwargs):
+        fingerprint = dataset_fingerprint(data)
+        key = (fingerprint, method.__name__, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            fingerprint = None
+        if fingerprint is None:
+            return method(self, data, *args, **kwargs)
+
+        fig = _figures.get(key)
+        if fig is None:
+            fig = method(self, data, *args, **kwargs)
+            # Methods that mutate their input must not be cached under the pre-call key
+            if dataset_fingerprint(data) == fingerprint:
+                _figures.put(key, fig)
+        else:
+            logger.debug(f"Figure cache hit for {method.__name__}")
+        return fig
+    return wrapper
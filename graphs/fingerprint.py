@@ -0,0 +1,128 @@
+import hashlib
+import logging
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Unregistered frames up to this size are fingerprinted by hashing their contents
+CONTENT_HASH_MAX_CELLS = 1_000_000
+
+_registry = {}
+_lock = threading.Lock()
+
+
+def _column_arrays(data: pd.DataFrame) -> list:
+    """The array behind each column; a reassigned column gets a new one."""
+    arrays = []
+    for _, series in data.items():
+        values = series.array
+        if isinstance(values, pd.arrays.NumpyExtensionArray):
+            # NumPy-backed columns come wrapped anew on each access; keep the wrapped view instead
+            values = np.asarray(values)
+        elif hasattr(values, '_pa_array'):
+            # Arrow-backed arrays are immutable; a cell write swaps in a new one
+            values = values._pa_array
+        arrays.append(values)
+    return arrays
+
+
+def _freeze(data: pd.DataFrame):
+    """Keep in-place writes to data from reaching the arrays it shares with other frames.
+
+    NumPy buffers become read-only, so cell writes raise. Arrow arrays are
+    immutable, but a cell write swaps the array held by the column's wrapper,
+    which shallow copies share; data gets wrappers of its own.
+    """
+    for i, (_, series) in enumerate(data.items()):
+        if hasattr(series.array, '_pa_array'):
+            # A new wrapper around the same Arrow buffers; nothing is copied
+            data.isetitem(i, series.array.copy())
+    # The block arrays themselves: pandas writes cells through them, not through column views
+    for values in data._mgr.arrays:
+        if hasattr(values, '_pa_array'):
+            continue
+        for buffer in (values, getattr(values, '_ndarray', None),
+                       getattr(values, '_data', None), getattr(values, '_mask', None)):
+            if isinstance(buffer, np.ndarray):
+                buffer.flags.writeable = False
+
+
+def _same_arrays(registered: list, current: list) -> bool:
+    if len(registered) != len(current):
+        return False
+    for old, new in zip(registered, current):
+        if isinstance(old, np.ndarray):
+            if not isinstance(new, np.ndarray) or (
+                    old.__array_interface__['data'] != new.__array_interface__['data']
+                    or old.shape != new.shape or old.dtype != new.dtype):
+                return False
+        elif old is not new:
+            return False
+    return True
+
+
+def register_dataset(data: pd.DataFrame, key: str):
+    """Associate a loaded DataFrame object with the content key it was loaded from.
+
+    Registered frames are immutable: cached results keyed on them are shared by
+    every session, so their NumPy buffers are made read-only and a cell write
+    (df.loc[i, col] = v) raises. Reassigning a column is allowed and ends the
+    registration; the registration holds the column arrays, so their addresses
+    can't be reused.
+    """
+    frame_id = id(data)
+
+    def _forget(_ref, frame_id=frame_id):
+        with _lock:
+            _registry.pop(frame_id, None)
+
+    _freeze(data)
+    with _lock:
+        _registry[frame_id] = (weakref.ref(data, _forget), key, _column_arrays(data))
+
+
+def dataset_key(data: pd.DataFrame):
+    """Content key of a registered DataFrame whose columns are unchanged since registration, or None."""
+    frame_id = id(data)
+    with _lock:
+        entry = _registry.get(frame_id)
+    if entry is None or entry[0]() is not data:
+        return None
+    if not _same_arrays(entry[2], _column_arrays(data)):
+        # Edited in place (e.g. df[col] = df[col] * 2): the content no longer matches the key
+        with _lock:
+            if _registry.get(frame_id) is entry:
+                del _registry[frame_id]
+        logger.info(f"Dataset {entry[1]} was modified; dropped its registration")
+        return None
+    return entry[1]
+
+
+def dataset_fingerprint(data: pd.DataFrame):
+    """Hashable identity of a DataFrame's current contents, or None if too costly to compute.
+
+    Registered datasets use their content key plus the shape and dtypes; they
+    are read-only, and a registration ends when a column is reassigned. Small
+    unregistered frames (value counts, correlation matrices) are hashed
+    directly, in row order.
+    """
+    if not isinstance(data, pd.DataFrame):
+        return None
+    schema = (data.shape, tuple(map(str, data.columns)), tuple(map(str, data.dtypes)))
+    key = dataset_key(data)
+    if key is not None:
+        return (key,) + schema
+    if data.size > CONTENT_HASH_MAX_CELLS:
+        return None
+    try:
+        row_hashes = pd.util.hash_pandas_object(data, index=True).to_numpy()
+    except TypeError:
+        # Unhashable cell values (lists, dicts)
+        return None
+    # Hashing the row hashes as a sequence keeps the fingerprint sensitive to row order
+    return ('content', hashlib.blake2b(row_hashes.tobytes(), digest_size=16).hexdigest()) + schema
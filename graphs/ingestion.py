@@ -0,0 +1,255 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from io import BytesIO
+
+import pandas as pd
+import pyarrow as pa
+
+from graphs.compaction import compact_frame
+from graphs.figure_cache import get_figure_cache
+from graphs.fingerprint import register_dataset
+from graphs.instrumentation import instrumented
+from graphs.storage import ArrowStore, get_dataset_store
+from graphs.streaming import DEFAULT_CHUNK_ROWS, get_stream_summary
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Memory budget for parsed datasets shared by every session in this process
+DEFAULT_CACHE_BUDGET_MB = int(os.getenv("DATASET_CACHE_MB", "2048"))
+
+
+@dataclass
+class IngestResult:
+    data: pd.DataFrame
+    key: str
+    cache_hit: bool
+    parse_seconds: float
+    memory_bytes: int
+    backing: str = "memory"
+
+
+def hash_bytes(raw: bytes) -> str:
+    """Content hash used as the dataset key."""
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def content_key(uploaded_file, block_size: int = 1 << 24) -> str:
+    """Dataset key of an uploaded file, hashed in blocks without copying the whole upload.
+
+    The extension is part of the key: the same bytes parse differently as CSV and Excel.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    uploaded_file.seek(0)
+    for block in iter(lambda: uploaded_file.read(block_size), b""):
+        digest.update(block)
+    uploaded_file.seek(0)
+    return f"{digest.hexdigest()}{os.path.splitext(uploaded_file.name)[1].lower()}"
+
+
+def frame_memory(data: pd.DataFrame) -> int:
+    return int(data.memory_usage(deep=True).sum())
+
+
+class DatasetCache:
+    """Process-wide LRU cache of parsed datasets bounded by a memory budget."""
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def used_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def size_of(self, key: str) -> int:
+        return self._sizes.get(key, 0)
+
+    def get(self, key: str):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def put(self, key: str, data: pd.DataFrame, size: int = None):
+        size = frame_memory(data) if size is None else size
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+            self._entries[key] = data
+            self._sizes[key] = size
+            self._evict()
+
+    def evict(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._sizes.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+
+    def _evict(self):
+        # Always keep the most recent entry, even if it alone exceeds the budget
+        while len(self._entries) > 1 and self.used_bytes > self.budget_bytes:
+            key, _ = self._entries.popitem(last=False)
+            size = self._sizes.pop(key)
+            logger.info(f"Evicted dataset {key} ({size / 1e6:.1f} MB) from cache")
+            get_figure_cache().invalidate(key)
+
+
+_cache = DatasetCache(DEFAULT_CACHE_BUDGET_MB * 1024 * 1024)
+
+
+def get_dataset_cache() -> DatasetCache:
+    return _cache
+
+
+def parse_bytes(raw: bytes, filename: str) -> pd.DataFrame:
+    if filename.endswith(".csv"):
+        return pd.read_csv(BytesIO(raw))
+    return pd.read_excel(BytesIO(raw))
+
+
+def _session_copy(data: pd.DataFrame, key: str) -> pd.DataFrame:
+    # Shallow copy so column assignments in one session don't leak into others
+    session_data = data.copy(deep=False)
+    register_dataset(session_data, key)
+    return session_data
+
+
+def to_backing_store(key: str, data: pd.DataFrame, store: ArrowStore):
+    """Swap a parsed frame for its memory-mapped Arrow copy, if it can be stored."""
+    try:
+        store.write(key, data)
+        return store.load(key), "arrow"
+    except (pa.ArrowException, ValueError, TypeError) as e:
+        # Mixed-type object columns or non-string headers can't be written as Arrow
+        logger.warning(f"Keeping dataset {key} in memory, Arrow conversion failed: {e}")
+        return data, "memory"
+
+
+class StreamedDataset:
+    """Lazy handle on a streamed upload: its running-aggregate summary and stored Arrow copy.
+
+    No DataFrame is built until a page asks for rows, and then only of the columns it
+    names: text columns stay in the memory-mapped buffers, numeric columns spanning
+    several chunks are copied into NumPy. The last frame is kept for the next rerun.
+    """
+
+    def __init__(self, key: str, summary, store: ArrowStore):
+        self.key = key
+        self.summary = summary
+        self.store = store
+        self._frame = None
+
+    @property
+    def rows(self) -> int:
+        return self.summary.rows
+
+    @property
+    def columns(self) -> list:
+        return list(self.summary.dtypes.index)
+
+    def frame(self, columns=None) -> pd.DataFrame:
+        """Session frame of the given columns (every column if None), read from the stored copy."""
+        columns = self.columns if columns is None else list(dict.fromkeys(columns))
+        if self._frame is None or list(self._frame.columns) != columns:
+            data = self.store.load(self.key, columns)
+            data.attrs["backing"] = "arrow"
+            # Registered under the dataset key; fingerprints also cover the column names
+            self._frame = _session_copy(data, self.key)
+        return self._frame
+
+
+@instrumented('ingest')
+def stream_uploaded_file(uploaded_file, store: ArrowStore = None,
+                         chunk_rows: int = DEFAULT_CHUNK_ROWS) -> StreamedDataset:
+    """Ingest a large CSV chunk by chunk into a StreamedDataset.
+
+    The summary is computed without holding the file in memory, and the Data Analysis and
+    Statistics pages read only it; other pages load just the columns they plot.
+    """
+    store = get_dataset_store() if store is None else store
+    key = content_key(uploaded_file)
+    start = time.perf_counter()
+    summary = get_stream_summary(uploaded_file, key, store, chunk_rows)
+    logger.info(f"Streamed {uploaded_file.name} in {time.perf_counter() - start:.2f}s")
+    return StreamedDataset(key, summary, store)
+
+
+@instrumented('ingest')
+def load_uploaded_file(uploaded_file, cache: DatasetCache = None,
+                       store: ArrowStore = None) -> IngestResult:
+    """Parse an uploaded file once per distinct content and share the result."""
+    cache = _cache if cache is None else cache
+    store = get_dataset_store() if store is None else store
+    key = content_key(uploaded_file)
+
+    data = cache.get(key)
+    if data is not None:
+        logger.info(f"Dataset cache hit for {uploaded_file.name}")
+        return IngestResult(_session_copy(data, key), key, True, 0.0, cache.size_of(key),
+                            data.attrs.get("backing", "memory"))
+
+    start = time.perf_counter()
+    if key in store:
+        # Converted by an earlier process: map the stored copy instead of re-parsing
+        data, backing = store.load(key), "arrow"
+    else:
+        data, backing = to_backing_store(key, parse_bytes(uploaded_file.getvalue(), uploaded_file.name),
+                                         store)
+    elapsed = time.perf_counter() - start
+    data.attrs["backing"] = backing
+    size = frame_memory(data)
+    cache.put(key, data, size)
+    logger.info(f"Loaded {uploaded_file.name} in {elapsed:.2f}s ({size / 1e6:.1f} MB, {backing})")
+    return IngestResult(_session_copy(data, key), key, False, elapsed, size, backing)
+
+
+def compacted_key(key: str, exclude=()) -> str:
+    """Dataset key of the compacted variant of a dataset, given its opted-out columns."""
+    if not exclude:
+        return f"{key}:compact"
+    return f"{key}:compact-{hash_bytes(repr(sorted(map(str, exclude))).encode())[:8]}"
+
+
+@instrumented('ingest')
+def compact_dataset(data: pd.DataFrame, key: str, profile=None, exclude=(),
+                    cache: DatasetCache = None):
+    """(compacted session frame, its dataset key) for a loaded dataset, shared like the original.
+
+    The CompactionReport is kept in attrs["compaction"].
+    """
+    cache = _cache if cache is None else cache
+    compact_key = compacted_key(key, exclude)
+    compacted = cache.get(compact_key)
+    if compacted is None:
+        start = time.perf_counter()
+        compacted, report = compact_frame(data, profile, exclude)
+        compacted.attrs["backing"] = "memory"
+        compacted.attrs["compaction"] = report
+        cache.put(compact_key, compacted, report.after_bytes)
+        logger.info(f"Compacted dataset {key} in {time.perf_counter() - start:.2f}s")
+    return _session_copy(compacted, compact_key), compact_key
@@ -0,0 +1,153 @@
+import logging
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import pandas as pd
+
+from graphs.figure_cache import FigureCache
+from graphs.fingerprint import dataset_fingerprint
+from graphs.instrumentation import instrumented
+from graphs.plotting import plot_bar_graph, plot_pie_chart
+from graphs.pushdown import value_counts
+from graphs.sketches import get_column_sketch
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 10
+
+# Categorical columns with at most this many values are drawn as a pie chart
+PIE_MAX_CATEGORIES = 10
+
+
+@dataclass
+class CategoricalSummary:
+    table: pd.DataFrame
+    mode: object
+    mode_ratio: float
+    figure: object = None
+    unique: int = None
+    approximate: bool = False
+
+
+# Per-column summaries reuse the figure cache's LRU, keyed the same way
+_summaries = FigureCache(max_entries=1024)
+_prefetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inspector-prefetch")
+_in_flight = set()
+_in_flight_lock = threading.Lock()
+
+
+def filter_columns(columns, query: str = "") -> list:
+    """Columns whose name contains the query, case-insensitively."""
+    query = (query or "").strip().lower()
+    return [col for col in columns if query in str(col).lower()]
+
+
+def paginate(columns, page: int, page_size: int = DEFAULT_PAGE_SIZE):
+    """Columns on a 1-based page and the total number of pages."""
+    n_pages = max(math.ceil(len(columns) / page_size), 1)
+    page = min(max(page, 1), n_pages)
+    start = (page - 1) * page_size
+    return list(columns[start:start + page_size]), n_pages
+
+
+def _summary_key(data: pd.DataFrame, kind: str, column):
+    fingerprint = dataset_fingerprint(data)
+    return None if fingerprint is None else (fingerprint, kind, column)
+
+
+def _cached(kind: str, compute):
+    def wrapper(data: pd.DataFrame, column):
+        key = _summary_key(data, kind, column)
+        if key is None:
+            return compute(data, column)
+        summary = _summaries.get(key)
+        if summary is None:
+            summary = compute(data, column)
+            _summaries.put(key, summary)
+        return summary
+    wrapper.key = lambda data, column: _summary_key(data, kind, column)
+    wrapper.__doc__ = compute.__doc__
+    return wrapper
+
+
+def summarize_value_counts(value_counts: pd.Series, column, total: int = None,
+                           figure: bool = True) -> CategoricalSummary:
+    """Value distribution table and chart from a column's value counts.
+
+    total defaults to the sum of the counts; pass it when they are only the top values.
+    figure=False skips the chart, for callers that only report the numbers.
+    """
+    total = value_counts.sum() if total is None else total
+    table = pd.DataFrame({
+        'Count': value_counts,
+        'Percentage': value_counts / max(total, 1) * 100
+    }).round(2)
+    if value_counts.empty:
+        return CategoricalSummary(table=table, mode=None, mode_ratio=0.0)
+
+    chart = None
+    if figure:
+        plot_df = pd.DataFrame({'Category': value_counts.index, 'Count': value_counts.values})
+        if len(value_counts) <= PIE_MAX_CATEGORIES:
+            # Name the category column after the source column so the chart title matches
+            name = column if column != 'Count' else 'Category'
+            chart = plot_pie_chart(plot_df.rename(columns={'Category': name}), name, 'Count')
+        else:
+            chart = plot_bar_graph(plot_df, 'Category', 'Count', agg='sum', error_bars=False)
+    return CategoricalSummary(table=table, mode=value_counts.index[0],
+                              mode_ratio=value_counts.iloc[0] / total, figure=chart,
+                              unique=len(value_counts))
+
+
+@instrumented('stats')
+def _categorical_summary(data: pd.DataFrame, column, figure: bool = True) -> CategoricalSummary:
+    """Value distribution and chart of a categorical column."""
+    return summarize_value_counts(value_counts(data[column]), column, figure=figure)
+
+
+@instrumented('stats')
+def _approx_categorical_summary(data: pd.DataFrame, column, figure: bool = True) -> CategoricalSummary:
+    """Top values and distinct count of a categorical column, estimated from its sketches."""
+    sketch = get_column_sketch(data, column)
+    summary = summarize_value_counts(sketch.heavy_hitters.top(), column,
+                                     total=sketch.rows - sketch.null_count, figure=figure)
+    summary.unique = sketch.distinct.estimate
+    summary.approximate = True
+    return summary
+
+
+categorical_summary = _cached('categorical', _categorical_summary)
+approx_categorical_summary = _cached('approx-categorical', _approx_categorical_summary)
+
+
+def categorical_table(data: pd.DataFrame, column, approximate: bool = False) -> CategoricalSummary:
+    """Categorical summary without a chart, uncached, for headless reports."""
+    summarize = _approx_categorical_summary if approximate else _categorical_summary
+    return summarize(data, column, figure=False)
+
+
+def prefetch(data: pd.DataFrame, columns, summarize):
+    """Compute summaries for columns in a background thread, e.g. the next page."""
+    for column in columns:
+        key = summarize.key(data, column)
+        # Uncacheable frames would be computed and thrown away
+        if key is None or _summaries.peek(key):
+            continue
+        with _in_flight_lock:
+            if key in _in_flight:
+                continue
+            _in_flight.add(key)
+        _prefetcher.submit(_prefetch_one, data, column, summarize, key)
+
+
+def _prefetch_one(data, column, summarize, key):
+    try:
+        summarize(data, column)
+    except Exception as e:
+        logger.warning(f"Prefetch of {column} failed: {e}")
+    finally:
+        with _in_flight_lock:
+            _in_flight.discard(key)
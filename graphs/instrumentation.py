@@ -0,0 +1,183 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+_local = threading.local()
+
+
+def _rss_bytes():
+    """Resident memory of this process, or None where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+@dataclass
+class Span:
+    name: str
+    category: str
+    start_ns: int
+    duration_ns: int
+    depth: int
+    thread_id: int
+    rows: int = None
+    memory_delta: int = None
+
+
+class Recorder:
+    """Spans recorded on one thread during one Streamlit rerun (or any other unit of work)."""
+
+    def __init__(self, name: str = 'rerun'):
+        self.name = name
+        self.spans = []
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns = None
+        self.depth = 0
+        self._section = None
+
+    @property
+    def duration_ns(self) -> int:
+        return (self.end_ns or time.perf_counter_ns()) - self.start_ns
+
+    def section(self, name: str, rows: int = None):
+        """Start a top-level section that lasts until the next section() or finish()."""
+        self.close_section()
+        self._section = span(name, 'section', rows)
+        self._section.__enter__()
+
+    def close_section(self):
+        if self._section is not None:
+            self._section.__exit__(None, None, None)
+            self._section = None
+
+    def finish(self):
+        self.close_section()
+        self.end_ns = time.perf_counter_ns()
+
+    def to_frame(self) -> pd.DataFrame:
+        """Calls, total/max time, rows and memory delta per span name, slowest first."""
+        columns = ['Category', 'Calls', 'Total ms', 'Max ms', 'Rows', 'Memory Δ MB']
+        if not self.spans:
+            return pd.DataFrame(columns=columns)
+        spans = pd.DataFrame([vars(s) for s in self.spans])
+        table = spans.groupby('name', sort=False).agg(
+            Category=('category', 'first'), Calls=('name', 'size'),
+            total=('duration_ns', 'sum'), longest=('duration_ns', 'max'),
+            Rows=('rows', 'max'), memory=('memory_delta', 'sum'))
+        table['Total ms'] = table.pop('total') / 1e6
+        table['Max ms'] = table.pop('longest') / 1e6
+        table['Memory Δ MB'] = table.pop('memory') / 2 ** 20
+        return table[columns].sort_values('Total ms', ascending=False).rename_axis('Span')
+
+    def trace_events(self, pid: int = 1) -> list:
+        """Complete ('X') events in Chrome trace format, in microseconds of perf_counter."""
+        events = [{'name': self.name, 'cat': 'rerun', 'ph': 'X', 'pid': pid, 'tid': 0,
+                   'ts': self.start_ns / 1e3, 'dur': self.duration_ns / 1e3}]
+        for s in self.spans:
+            args = {key: value for key, value in (('rows', s.rows), ('memory_delta', s.memory_delta))
+                    if value is not None}
+            events.append({'name': s.name, 'cat': s.category, 'ph': 'X', 'pid': pid,
+                           'tid': s.thread_id, 'ts': s.start_ns / 1e3, 'dur': s.duration_ns / 1e3,
+                           'args': args})
+        return events
+
+
+def chrome_trace(recorders) -> str:
+    """JSON trace of several recorders, loadable in chrome://tracing or Perfetto."""
+    recorders = list(recorders)
+    events = [event for recorder in recorders for event in recorder.trace_events()]
+    if events:
+        origin = min(event['ts'] for event in events)
+        for event in events:
+            event['ts'] -= origin
+    return json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'})
+
+
+def start_recording(name: str = 'rerun') -> Recorder:
+    """Record spans of the current thread into a new Recorder until stop_recording()."""
+    recorder = Recorder(name)
+    _local.recorder = recorder
+    return recorder
+
+
+def stop_recording() -> Recorder:
+    recorder = getattr(_local, 'recorder', None)
+    _local.recorder = None
+    if recorder is not None:
+        recorder.finish()
+    return recorder
+
+
+def current_recorder():
+    return getattr(_local, 'recorder', None)
+
+
+class _SpanTimer:
+    """Times one block into the recorder that was active when it was entered."""
+
+    __slots__ = ('name', 'category', 'rows', '_recorder', '_start', '_rss')
+
+    def __init__(self, name: str, category: str = 'block', rows: int = None):
+        self.name = name
+        self.category = category
+        self.rows = rows
+
+    def __enter__(self):
+        self._recorder = getattr(_local, 'recorder', None)
+        if self._recorder is not None:
+            self._recorder.depth += 1
+            self._rss = _rss_bytes()
+            self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        recorder = self._recorder
+        if recorder is None:
+            return False
+        end = time.perf_counter_ns()
+        rss = _rss_bytes()
+        recorder.depth -= 1
+        recorder.spans.append(Span(
+            self.name, self.category, self._start, end - self._start, recorder.depth,
+            threading.get_ident(), self.rows,
+            None if rss is None or self._rss is None else rss - self._rss))
+        return False
+
+
+def span(name: str, category: str = 'block', rows: int = None) -> _SpanTimer:
+    """Context manager timing a block into the current thread's recorder; free when none is active."""
+    return _SpanTimer(name, category, rows)
+
+
+def _rows_of(args) -> int:
+    for arg in args:
+        if isinstance(arg, (pd.DataFrame, pd.Series)):
+            return len(arg)
+    return None
+
+
+def instrumented(category: str, name: str = None):
+    """Decorator recording each call as a span, with the row count of its first DataFrame/Series argument."""
+    def decorate(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if getattr(_local, 'recorder', None) is None:
+                return func(*args, **kwargs)
+            with span(label, category, _rows_of(args)):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,170 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOG_DIR = os.getenv("LOG_DIR", "logs")
+DEFAULT_LOG_FILE = "data_analysis.log"
+DEFAULT_LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+# Records at or above this level are also written to stderr
+DEFAULT_CONSOLE_LEVEL = os.getenv("CONSOLE_LOG_LEVEL", "INFO")
+# Per-module overrides, e.g. "graphs.parallel=DEBUG,graphs.utils=WARNING"
+DEFAULT_MODULE_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+
+# Records below WARNING from one call site: at most RATE_LIMIT_BURST per RATE_LIMIT_SECONDS
+RATE_LIMIT_BURST = int(os.getenv("LOG_RATE_LIMIT_BURST", "20"))
+RATE_LIMIT_SECONDS = float(os.getenv("LOG_RATE_LIMIT_SECONDS", "10"))
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener = None
+_queue_handler = None
+# Configured levels by logger name ('' is the root), handed to pool workers
+_levels = {}
+# Per start method: (queue pool workers log into, listener forwarding it to _queue_handler)
+_worker_queues = {}
+_lock = threading.Lock()
+
+
+class RateLimitFilter(logging.Filter):
+    """Drop repeated low-severity records from the same call site.
+
+    Hot loops (one record per column or per rerun) would otherwise flood the
+    log. Warnings and errors always pass; the first record after a suppressed
+    window notes how many were dropped.
+    """
+
+    def __init__(self, burst: int = RATE_LIMIT_BURST, seconds: float = RATE_LIMIT_SECONDS):
+        super().__init__()
+        self.burst = burst
+        self.seconds = seconds
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.burst <= 0:
+            return True
+        site = (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            start, count, suppressed = self._windows.get(site, (now, 0, 0))
+            if now - start >= self.seconds:
+                start, count = now, 0
+            if count >= self.burst:
+                self._windows[site] = (start, count, suppressed + 1)
+                return False
+            self._windows[site] = (start, count + 1, 0)
+        if suppressed:
+            record.msg = f"{record.getMessage()} ({suppressed} similar messages suppressed)"
+            record.args = None
+        return True
+
+
+def parse_module_levels(spec: str) -> dict:
+    """Parse 'name=LEVEL,name=LEVEL' into {name: LEVEL}, skipping malformed entries."""
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        if name and level:
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(log_dir: str = DEFAULT_LOG_DIR, level: str = DEFAULT_LOG_LEVEL,
+                      module_levels: dict = None, log_file: str = DEFAULT_LOG_FILE,
+                      console_level: str = DEFAULT_CONSOLE_LEVEL):
+    """Route all records through a queue to a rotating file and the console, written on a background thread.
+
+    Callers only enqueue records, so logging never blocks on disk I/O, and
+    every session of the process shares one writer instead of reopening (and
+    truncating) the file. Safe to call on every Streamlit rerun: only the
+    first call installs the handlers.
+    """
+    global _listener, _queue_handler, _levels
+    with _lock:
+        if _listener is not None:
+            return _listener
+        os.makedirs(log_dir, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            os.path.join(log_dir, log_file), maxBytes=LOG_MAX_BYTES,
+            backupCount=LOG_BACKUP_COUNT, encoding="utf-8")
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(console_level)
+        console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+        records = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(records)
+        queue_handler.addFilter(RateLimitFilter())
+        root = logging.getLogger()
+        root.addHandler(queue_handler)
+        _queue_handler = queue_handler
+        root.setLevel(level)
+        levels = parse_module_levels(DEFAULT_MODULE_LEVELS)
+        levels.update(module_levels or {})
+        for name, module_level in levels.items():
+            logging.getLogger(name).setLevel(module_level)
+        _levels = {'': level, **levels}
+
+        _listener = logging.handlers.QueueListener(records, file_handler, console_handler,
+                                                   respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+    logger.info(f"Logging to {file_handler.baseFilename} at {level}"
+                + (f" with overrides {levels}" if levels else ""))
+    return _listener
+
+
+def worker_logging(context) -> tuple:
+    """(initializer, initargs) for a process pool whose workers log through this process's handlers.
+
+    Spawned workers start without handlers, so their records would be dropped;
+    with these they travel back over a queue of the pool's multiprocessing
+    context and pass the same rate limit, file and console handlers. Before
+    configure_logging the workers are left as they are.
+    """
+    with _lock:
+        if _queue_handler is None:
+            return None, ()
+        method = context.get_start_method()
+        if method not in _worker_queues:
+            records = context.Queue()
+            listener = logging.handlers.QueueListener(records, _queue_handler)
+            listener.start()
+            _worker_queues[method] = (records, listener)
+        return configure_worker_logging, (_worker_queues[method][0], dict(_levels))
+
+
+def configure_worker_logging(records, levels: dict):
+    """Pool initializer: send this worker's records to the parent process over records."""
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(records))
+    for name, level in levels.items():
+        logging.getLogger(name).setLevel(level)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener, _queue_handler
+    with _lock:
+        if _listener is None:
+            return
+        # Worker records still in flight go through the parent's queue before it closes
+        for _, worker_listener in _worker_queues.values():
+            worker_listener.stop()
+        _worker_queues.clear()
+        logging.getLogger().removeHandler(_queue_handler)
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = _queue_handler = None
@@ -0,0 +1,244 @@
+import logging
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from graphs.fingerprint import dataset_key
+from graphs.log_config import worker_logging
+from graphs.storage import get_dataset_store, to_frame
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = int(os.getenv("PARALLEL_WORKERS", str(os.cpu_count() or 1)))
+
+# Frames with fewer cells than this are processed serially; the pool's overhead would dominate
+PARALLEL_MIN_CELLS = int(os.getenv("PARALLEL_MIN_CELLS", "5000000"))
+
+_executor = None
+_executor_workers = None
+_executor_lock = threading.Lock()
+
+
+def get_executor(workers: int = None) -> ProcessPoolExecutor:
+    """Process pool shared by every parallel computation, created on first use."""
+    global _executor, _executor_workers
+    workers = workers or DEFAULT_WORKERS
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            # Spawned workers never inherit the Streamlit server's threads and locks
+            context = multiprocessing.get_context("spawn")
+            initializer, initargs = worker_logging(context)
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                            initializer=initializer, initargs=initargs)
+            _executor_workers = workers
+            logger.info(f"Started process pool with {workers} workers")
+        return _executor
+
+
+def _reset_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor = None
+
+
+def use_parallel(data: pd.DataFrame, columns, workers: int = None) -> bool:
+    workers = workers or DEFAULT_WORKERS
+    return workers > 1 and len(columns) > 1 and len(data) * len(columns) >= PARALLEL_MIN_CELLS
+
+
+def shard(items, n_shards: int) -> list:
+    """Split items into at most n_shards contiguous, non-empty lists."""
+    items = list(items)
+    return [list(part) for part in np.array_split(np.array(items, dtype=object), n_shards) if len(part)]
+
+
+class SharedFrame:
+    """Columns of a DataFrame that worker processes can read without pickling it.
+
+    Datasets already in the Arrow store are memory-mapped from their file by each
+    worker; anything else is written once as an Arrow IPC stream into shared memory.
+    """
+
+    def __init__(self, data: pd.DataFrame, columns):
+        self.columns = list(columns)
+        # Workers rebuild exactly these dtypes, so parallel and serial runs see the same frame
+        self.dtypes = {col: data[col].dtype for col in self.columns}
+        self.path = self._stored_path(data)
+        self.shm_name = None
+        self._shm = None
+        if self.path is None:
+            table = pa.Table.from_pandas(data[self.columns], preserve_index=False)
+            sink = pa.MockOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            self._shm = shared_memory.SharedMemory(name=f"graphs-{uuid.uuid4().hex[:16]}",
+                                                   create=True, size=max(sink.size(), 1))
+            self.shm_name = self._shm.name
+            target = pa.FixedSizeBufferWriter(pa.py_buffer(self._shm.buf))
+            with pa.ipc.new_stream(target, table.schema) as writer:
+                writer.write_table(table)
+            # Release every view of the segment so it can be closed later
+            del writer, target
+
+    def _stored_path(self, data: pd.DataFrame):
+        key = dataset_key(data)
+        store = get_dataset_store()
+        if key is None or key not in store:
+            return None
+        path = store.path_for(key)
+        schema = pa.ipc.open_file(pa.memory_map(path, "r")).schema
+        stored = to_frame(schema.empty_table())
+        # The session frame may have had columns converted since it was loaded
+        if len(stored.columns) != len(data.columns) or any(
+                col not in stored or stored[col].dtype != data[col].dtype for col in self.columns):
+            return None
+        return path
+
+    def __getstate__(self):
+        return {'columns': self.columns, 'dtypes': self.dtypes, 'path': self.path,
+                'shm_name': self.shm_name, '_shm': None}
+
+    def close(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _read_columns(frame: SharedFrame, columns) -> pd.DataFrame:
+    """Worker side: load the given columns of a shared frame as an independent DataFrame."""
+    if frame.path is not None:
+        table = pa.ipc.open_file(pa.memory_map(frame.path, "r")).read_all().select(columns)
+        return to_frame(table)
+    shm = shared_memory.SharedMemory(name=frame.shm_name)
+    try:
+        buffer = pa.py_buffer(shm.buf)
+        table = pa.ipc.open_stream(buffer).read_all().select(columns)
+        # Copy the columns out of the segment so it can be closed while the frame is in use
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        del table, buffer, writer
+    finally:
+        shm.close()
+    data = to_frame(pa.ipc.open_stream(sink.getvalue()).read_all())
+    # to_frame maps every string column to Arrow strings; restore object columns and the like
+    for col in columns:
+        if data[col].dtype != frame.dtypes[col]:
+            data[col] = data[col].astype(frame.dtypes[col])
+    return data
+
+
+def _run_shard(frame: SharedFrame, columns, func):
+    return func(_read_columns(frame, columns))
+
+
+def _run_per_column(frame: SharedFrame, columns, func):
+    data = _read_columns(frame, columns)
+    return [func(data[col]) for col in columns]
+
+
+def _fill_columns(frame: SharedFrame, columns, func, positions, out_name: str, shape):
+    data = _read_columns(frame, columns)
+    shm = shared_memory.SharedMemory(name=out_name)
+    try:
+        out = np.ndarray(shape, dtype=np.float64, buffer=shm.buf, order='F')
+        for col, position in zip(columns, positions):
+            out[:, position] = func(data[col])
+        del out
+    finally:
+        shm.close()
+
+
+# Failures that send a computation back to the serial path
+_PARALLEL_ERRORS = (BrokenProcessPool, pa.ArrowException, OSError, TypeError, ValueError)
+
+
+def _run_parallel(task, data: pd.DataFrame, shards, workers, extra_args=None):
+    """task(frame, shard, *args) for every shard in the pool; None if the parallel run failed."""
+    columns = [col for part in shards for col in part]
+    try:
+        with SharedFrame(data, columns) as frame:
+            executor = get_executor(workers)
+            futures = [executor.submit(task, frame, part, *(extra_args(i) if extra_args else ()))
+                       for i, part in enumerate(shards)]
+            return [future.result() for future in futures]
+    except _PARALLEL_ERRORS as e:
+        if isinstance(e, BrokenProcessPool):
+            _reset_executor()
+        logger.warning(f"Parallel run failed, falling back to serial: {e}")
+        return None
+
+
+def map_shards(func, data: pd.DataFrame, shards, workers: int = None) -> list:
+    """func(DataFrame of a shard's columns) for each shard of columns, in parallel when worthwhile.
+
+    func must be a module-level function (or functools.partial of one) so it can
+    be sent to the worker processes.
+    """
+    shards = [list(part) for part in shards]
+    if use_parallel(data, [col for part in shards for col in part], workers):
+        results = _run_parallel(_run_shard, data, shards, workers, lambda i: (func,))
+        if results is not None:
+            return results
+    return [func(data[part]) for part in shards]
+
+
+def map_columns(func, data: pd.DataFrame, columns=None, workers: int = None) -> list:
+    """func(Series) for every column, sharded across the process pool when worthwhile."""
+    columns = list(data.columns if columns is None else columns)
+    workers = workers or DEFAULT_WORKERS
+    if use_parallel(data, columns, workers):
+        results = _run_parallel(_run_per_column, data, shard(columns, workers * 2), workers,
+                                lambda i: (func,))
+        if results is not None:
+            return [result for part in results for result in part]
+    return [func(data[col]) for col in columns]
+
+
+def column_matrix(func, data: pd.DataFrame, columns, workers: int = None) -> np.ndarray:
+    """(rows x columns) float matrix of func(Series) per column.
+
+    In parallel, workers write their columns straight into a shared output
+    array, so the results are never pickled either.
+    """
+    columns = list(columns)
+    workers = workers or DEFAULT_WORKERS
+    shape = (len(data), len(columns))
+    if use_parallel(data, columns, workers):
+        positions = shard(range(len(columns)), workers * 2)
+        shards = [[columns[i] for i in part] for part in positions]
+        out_shm = shared_memory.SharedMemory(create=True, size=max(shape[0] * shape[1] * 8, 1))
+        try:
+            results = _run_parallel(_fill_columns, data, shards, workers,
+                                    lambda i: (func, positions[i], out_shm.name, shape))
+            if results is not None:
+                out = np.ndarray(shape, dtype=np.float64, buffer=out_shm.buf, order='F')
+                result = np.array(out, order='F')
+                del out
+                return result
+        finally:
+            out_shm.close()
+            out_shm.unlink()
+    if not columns:
+        return np.empty(shape)
+    return np.column_stack([func(data[col]) for col in columns])
@@ -0,0 +1,158 @@
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from graphs.datetimes import to_datetime_column
+from graphs.figure_cache import FigureCache
+from graphs.fingerprint import dataset_fingerprint
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+PERCENTILES = (0.1, 0.5, 0.9)
+
+_NS_PER_HOUR = 3_600_000_000_000
+_NS_PER_DAY = 24 * _NS_PER_HOUR
+
+
+@dataclass
+class CalendarFields:
+    """Calendar fields of the valid rows as compact integer arrays."""
+    hour: np.ndarray     # 0-23
+    weekday: np.ndarray  # 0 = Monday
+    month: np.ndarray    # 0 = January
+    values: np.ndarray
+
+
+def calendar_fields(dates: pd.Series, values: pd.Series) -> CalendarFields:
+    """Hour, weekday and month from the raw datetime64 integers, skipping missing rows."""
+    if dates.dt.tz is not None:
+        # Patterns follow local wall-clock time
+        dates = dates.dt.tz_localize(None)
+    stamps = dates.to_numpy(dtype='datetime64[ns]')
+    numbers = pd.to_numeric(values, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    keep = ~np.isnat(stamps) & ~np.isnan(numbers)
+    stamps, numbers = stamps[keep], numbers[keep]
+    ns = stamps.view(np.int64)
+    days = ns // _NS_PER_DAY
+    return CalendarFields(
+        hour=((ns - days * _NS_PER_DAY) // _NS_PER_HOUR).astype(np.int8),
+        # 1970-01-01 was a Thursday
+        weekday=((days + 3) % 7).astype(np.int8),
+        month=(stamps.astype('datetime64[M]').view(np.int64) % 12).astype(np.int8),
+        values=numbers,
+    )
+
+
+def group_percentiles(codes: np.ndarray, order: np.ndarray, values: np.ndarray,
+                      n_groups: int, quantiles=PERCENTILES) -> np.ndarray:
+    """(groups x quantiles) linear-interpolated percentiles, given values' ascending order.
+
+    A stable counting sort of the codes in value order groups the values
+    without sorting them again.
+    """
+    result = np.full((n_groups, len(quantiles)), np.nan)
+    if len(values) == 0:
+        # No valid rows: every group is empty
+        return result
+    grouped = order[np.argsort(codes[order], kind='stable')]
+    sorted_values = values[grouped]
+    counts = np.bincount(codes, minlength=n_groups)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    has_values = counts > 0
+    for i, q in enumerate(quantiles):
+        position = starts + q * np.maximum(counts - 1, 0)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.ceil(position).astype(np.int64)
+        weight = position - lower
+        lower, upper = np.minimum(lower, len(values) - 1), np.minimum(upper, len(values) - 1)
+        value = sorted_values[lower] * (1 - weight) + sorted_values[upper] * weight
+        result[has_values, i] = value[has_values]
+    return result
+
+
+@dataclass
+class TimePatterns:
+    hourly: pd.Series      # mean per hour 0-23
+    weekly: pd.Series      # mean per weekday Mon-Sun
+    monthly: pd.Series     # mean per month Jan-Dec
+    heatmap: pd.DataFrame  # mean per weekday x hour
+    counts: pd.DataFrame   # rows per weekday x hour
+
+    @property
+    def has_hours(self) -> bool:
+        return int((self.hourly.notna()).sum()) > 1
+
+
+def time_patterns(fields: CalendarFields) -> TimePatterns:
+    """All pattern aggregates from weighted bincounts over the calendar fields."""
+    values = fields.values
+    # Hour x weekday cells hold the sums every coarser pattern is built from
+    cell = fields.weekday.astype(np.int64) * 24 + fields.hour
+    sums = np.bincount(cell, weights=values, minlength=168).reshape(7, 24)
+    counts = np.bincount(cell, minlength=168).reshape(7, 24)
+    month_sums = np.bincount(fields.month, weights=values, minlength=12)
+    month_counts = np.bincount(fields.month, minlength=12)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        hourly = sums.sum(axis=0) / counts.sum(axis=0)
+        weekly = sums.sum(axis=1) / counts.sum(axis=1)
+        monthly = month_sums / month_counts
+        heatmap = sums / counts
+
+    return TimePatterns(
+        hourly=pd.Series(hourly, index=range(24)),
+        weekly=pd.Series(weekly, index=WEEKDAYS),
+        monthly=pd.Series(monthly, index=MONTHS),
+        heatmap=pd.DataFrame(heatmap, index=WEEKDAYS, columns=range(24)),
+        counts=pd.DataFrame(counts, index=WEEKDAYS, columns=range(24)),
+    )
+
+
+def pattern_percentiles(fields: CalendarFields) -> dict:
+    """'hour' / 'weekday' / 'month' -> DataFrame of PERCENTILES per group.
+
+    The values are sorted once and shared by all three groupings. This is the
+    expensive part of the analysis, so it is kept apart from the means.
+    """
+    values = fields.values
+    order = np.argsort(values)
+    columns = [f"p{int(q * 100)}" for q in PERCENTILES]
+    return {
+        'hour': pd.DataFrame(group_percentiles(fields.hour, order, values, 24), index=range(24), columns=columns),
+        'weekday': pd.DataFrame(group_percentiles(fields.weekday, order, values, 7), index=WEEKDAYS, columns=columns),
+        'month': pd.DataFrame(group_percentiles(fields.month, order, values, 12), index=MONTHS, columns=columns),
+    }
+
+
+_patterns = FigureCache(max_entries=64)
+
+
+def get_time_patterns(data: pd.DataFrame, date_col: str, metric_col: str) -> TimePatterns:
+    """Time patterns of a metric, computed once per dataset version and column pair."""
+    fingerprint = dataset_fingerprint(data)
+    key = None if fingerprint is None else (fingerprint, 'patterns', date_col, metric_col)
+    patterns = _patterns.get(key) if key is not None else None
+    if patterns is None:
+        fields = calendar_fields(to_datetime_column(data, date_col), data[metric_col])
+        patterns = time_patterns(fields)
+        if key is not None:
+            _patterns.put(key, patterns)
+    return patterns
+
+
+def get_time_percentiles(data: pd.DataFrame, date_col: str, metric_col: str) -> dict:
+    """Percentiles of a metric per hour, weekday and month, cached like get_time_patterns."""
+    fingerprint = dataset_fingerprint(data)
+    key = None if fingerprint is None else (fingerprint, 'percentiles', date_col, metric_col)
+    percentiles = _patterns.get(key) if key is not None else None
+    if percentiles is None:
+        fields = calendar_fields(to_datetime_column(data, date_col), data[metric_col])
+        percentiles = pattern_percentiles(fields)
+        if key is not None:
+            _patterns.put(key, percentiles)
+    return percentiles
@@ -2,57 +2,121 @@ import plotly.express as px
 import plotly.graph_objects as go
 import plotly.figure_factory as ff
 import pandas as pd
+import numpy as np
 import logging
-from graphs.utils import is_categorical, is_numeric
+from graphs.utils import is_numeric
+from graphs.bars import DEFAULT_TOP_N, bar_aggregates
+from graphs.decimation import (DEFAULT_POINT_BUDGET, annotate_reduction, bin_scatter,
+                               decimate_line, sample_scatter)
+from graphs.distributions import box_stats, finite_values, histogram_bins
+from graphs.datetimes import parse_datetimes
+from graphs.figure_cache import cached_figure
+from graphs.instrumentation import instrumented
+from graphs.decomposition import get_decomposition
+from graphs.patterns import get_time_patterns, get_time_percentiles
+from graphs.rollups import get_rollup
 
 # Get logger for this module
 logger = logging.getLogger(__name__)
 
+# Correlation heatmaps wider than this are drawn without per-cell text
+ANNOTATE_MAX_COLUMNS = 30
+
 class GraphPlotter:
-    def plot_bar_graph(self, data: pd.DataFrame, x_axis: str, y_axis: str):
+    @instrumented('plot')
+    @cached_figure
+    def plot_bar_graph(self, data: pd.DataFrame, x_axis: str, y_axis: str, agg: str = 'mean',
+                       top_n: int = DEFAULT_TOP_N, error_bars: bool = True):
+        """One bar per category from a single grouped pass; mean and sum bars carry ±1 standard error"""
         try:
-            if is_categorical(data[x_axis]):
-                agg_data = data.groupby(x_axis)[y_axis].mean().sort_values(ascending=False)
-                data_sorted = data.set_index(x_axis).loc[agg_data.index].reset_index()
-                fig = px.bar(data_sorted, x=x_axis, y=y_axis, 
-                             title=f'Bar Graph of {y_axis} vs {x_axis}')
-            else:
-                fig = px.bar(data, x=x_axis, y=y_axis, 
-                             title=f'Bar Graph of {y_axis} vs {x_axis}')
+            bars = bar_aggregates(data, x_axis, y_axis, agg, top_n)
+            table = bars.table
+            error_y = None
+            if error_bars and table['error'].notna().any():
+                error_y = {'type': 'data', 'array': table['error'].to_numpy(), 'visible': True}
+            label = y_axis if agg == 'mean' else f'{agg} of {y_axis}'
+            fig = go.Figure(data=go.Bar(
+                x=table.index, y=table['value'], error_y=error_y,
+                customdata=table['count'].to_numpy(),
+                hovertemplate='%{x}<br>' + label + '=%{y}<br>rows=%{customdata}<extra></extra>',
+            ))
+            fig.update_layout(title=f'Bar Graph of {label} vs {x_axis}', xaxis_title=x_axis,
+                              yaxis_title=label, xaxis={'type': 'category'} if bars.ranked else {})
+            annotate_reduction(fig, len(table) - bool(bars.other_groups), bars.groups, "top-N",
+                               text=f"Top {len(table) - 1} of {bars.groups:,} categories; "
+                                    f"the rest are grouped as Other")
             logger.info("Bar graph created successfully")
             return fig
         except Exception as e:
             logger.error(f"Error creating bar graph: {e}")
             raise
 
-    def plot_line_graph(self, data: pd.DataFrame, x_axis: str, y_axis: str):
+    @instrumented('plot')
+    @cached_figure
+    def plot_line_graph(self, data: pd.DataFrame, x_axis: str, y_axis: str,
+                        max_points: int = DEFAULT_POINT_BUDGET):
         try:
-            fig = px.line(data, x=x_axis, y=y_axis, title=f'Line Graph of {y_axis} vs {x_axis}')
-            fig = px.line(data, x=x_axis, y=y_axis, title=f'Line Graph of {y_axis} vs {x_axis}')
+            plot_data = decimate_line(data, x_axis, y_axis, max_points)
+            fig = px.line(plot_data, x=x_axis, y=y_axis, title=f'Line Graph of {y_axis} vs {x_axis}')
+            annotate_reduction(fig, len(plot_data), len(data), "LTTB")
             logger.info("Line graph created successfully")
             return fig
         except Exception as e:
             logger.error(f"Error creating line graph: {e}")
             raise
 
-    def plot_scatter_plot(self, data: pd.DataFrame, x_axis: str, y_axis: str):
+    @instrumented('plot')
+    @cached_figure
+    def plot_scatter_plot(self, data: pd.DataFrame, x_axis: str, y_axis: str,
+                          max_points: int = DEFAULT_POINT_BUDGET, mode: str = "sample"):
+        """Scatter plot capped at max_points; mode is "sample" (stratified) or "density" (2D bins)"""
         try:
-            fig = px.scatter(data, x=x_axis, y=y_axis, title=f'Scatter Plot of {y_axis} vs {x_axis}')
+            title = f'Scatter Plot of {y_axis} vs {x_axis}'
+            if mode == "density" and len(data) > max_points:
+                counts, x_centers, y_centers = bin_scatter(data, x_axis, y_axis)
+                fig = go.Figure(data=go.Heatmap(z=counts, x=x_centers, y=y_centers,
+                                                colorscale='Viridis', colorbar={'title': 'Count'}))
+                fig.update_layout(title=title, xaxis_title=x_axis, yaxis_title=y_axis)
+                annotate_reduction(fig, counts.size, len(data), "2D density bins",
+                                   text=f"{len(data):,} points binned into "
+                                        f"{len(x_centers)}x{len(y_centers)} cells")
+            else:
+                plot_data = sample_scatter(data, x_axis, y_axis, max_points)
+                fig = px.scatter(plot_data, x=x_axis, y=y_axis, title=title)
+                annotate_reduction(fig, len(plot_data), len(data), "stratified sample")
             logger.info("Scatter plot created successfully")
             return fig
         except Exception as e:
             logger.error(f"Error creating scatter plot: {e}")
             raise
 
-    def plot_histogram(self, data: pd.DataFrame, column: str):
-        try:    
-            fig = px.histogram(data, x=column, title=f'Histogram of {column}')
+    @instrumented('plot')
+    @cached_figure
+    def plot_histogram(self, data: pd.DataFrame, column: str, bins: int = None):
+        """Histogram binned server-side, so the figure holds one bar per bin, not one value per row"""
+        try:
+            if not is_numeric(data[column]):
+                # Bins of a categorical histogram are its value counts
+                return px.histogram(data, x=column, title=f'Histogram of {column}')
+            counts, edges = histogram_bins(finite_values(data[column]), bins)
+            fig = go.Figure(data=go.Bar(
+                x=(edges[:-1] + edges[1:]) / 2,
+                y=counts,
+                width=np.diff(edges),
+                customdata=np.column_stack([edges[:-1], edges[1:]]),
+                hovertemplate='%{customdata[0]:.4g} – %{customdata[1]:.4g}<br>count=%{y}<extra></extra>',
+                name=column,
+            ))
+            fig.update_layout(title=f'Histogram of {column}', bargap=0,
+                              xaxis_title=column, yaxis_title='count')
             logger.info("Histogram created successfully")
             return fig
         except Exception as e:
             logger.error(f"Error creating histogram: {e}")
             raise
 
+    @instrumented('plot')
+    @cached_figure
     def plot_pie_chart(self, data: pd.DataFrame, cat_column: str, num_column: str):
         try:
             if not isinstance(data, pd.DataFrame):
@@ -71,31 +135,35 @@ class GraphPlotter:
             logger.error(f"Error creating pie chart: {e}")
             raise
 
-    def plot_correlation_matrix(self, corr_matrix: pd.DataFrame):
+    @instrumented('plot')
+    @cached_figure
+    def plot_correlation_matrix(self, corr_matrix: pd.DataFrame, title: str = 'Correlation Matrix'):
         try:
-            # Round values for display
-            corr_matrix = corr_matrix.round(3)
+            # Round values for display; two decimals keep wide matrices compact
+            annotate = max(corr_matrix.shape) <= ANNOTATE_MAX_COLUMNS
+            corr_matrix = corr_matrix.round(3 if annotate else 2)
             
-            # Create heatmap with text annotations
+            # Per-cell text only while it is still readable
+            text_args = dict(text=corr_matrix.values, texttemplate='%{text}',
+                             textfont={"size": 10}) if annotate else {}
             fig = go.Figure(data=go.Heatmap(
-                z=corr_matrix,
-                x=corr_matrix.columns,
-                y=corr_matrix.columns,
+                z=corr_matrix.to_numpy(),
+                x=[str(col) for col in corr_matrix.columns],
+                y=[str(col) for col in corr_matrix.index],
                 colorscale='RdBu',
                 zmin=-1, zmax=1,
-                text=corr_matrix.values,
-                texttemplate='%{text}',
-                textfont={"size": 10},
                 hoverongaps=False,
+                **text_args,
             ))
             
             # Update layout for better visibility
+            show_labels = max(corr_matrix.shape) <= ANNOTATE_MAX_COLUMNS * 3
             fig.update_layout(
-                title='Correlation Matrix',
+                title=title,
                 width=800,
                 height=800,
-                xaxis={'side': 'bottom'},
-                yaxis={'side': 'left'},
+                xaxis={'side': 'bottom', 'showticklabels': show_labels},
+                yaxis={'side': 'left', 'showticklabels': show_labels},
             )
             
             logger.info("Correlation matrix created successfully")
@@ -104,26 +172,50 @@ class GraphPlotter:
             logger.error(f"Error creating correlation matrix: {e}")
             raise
 
-    def plot_time_series(self, data: pd.DataFrame, date_col: str, metric_col: str, freq: str):
+    @instrumented('plot')
+    @cached_figure
+    def plot_time_series(self, data: pd.DataFrame, date_col: str, metric_col: str, freq: str,
+                         agg: str = 'mean'):
         try:
-            data[date_col] = pd.to_datetime(data[date_col])
-            resampled = data.set_index(date_col)[metric_col].resample(freq).mean()
-            fig = px.line(resampled, title=f'Time Series of {metric_col} ({freq})')
+            # Derived from the daily rollup, built once per (date column, metric)
+            resampled = get_rollup(data, date_col, metric_col).rollup(freq, agg)
+            label = metric_col if agg == 'mean' else f'{agg} of {metric_col}'
+            fig = px.line(resampled, title=f'Time Series of {label} ({freq})')
             logger.info("Time series plot created successfully")
             return fig
         except Exception as e:
             logger.error(f"Error creating time series plot: {e}")
             raise
 
+    @instrumented('plot')
+    @cached_figure
     def plot_box_plot(self, data: pd.DataFrame, column: str):
+        """Box plot from precomputed quartiles, fences and a capped set of outliers"""
         try:
-            fig = px.box(data, y=column, title=f'Box Plot of {column}')
+            stats = box_stats(finite_values(data[column]))
+            fig = go.Figure()
+            fig.add_trace(go.Box(
+                x=[column], q1=[stats.q1], median=[stats.median], q3=[stats.q3],
+                mean=[stats.mean], lowerfence=[stats.lowerfence], upperfence=[stats.upperfence],
+                name=column, boxpoints=False,
+            ))
+            if stats.outliers.size:
+                fig.add_trace(go.Scatter(
+                    x=[column] * stats.outliers.size, y=stats.outliers, mode='markers',
+                    name='Outliers', marker={'size': 4}, showlegend=False,
+                ))
+            fig.update_layout(title=f'Box Plot of {column}', yaxis_title=column)
+            annotate_reduction(fig, stats.outliers.size, stats.outlier_count, "outliers thinned",
+                               text=f"Showing {stats.outliers.size:,} of "
+                                    f"{stats.outlier_count:,} outliers")
             logger.info("Box plot created successfully")
             return fig
         except Exception as e:
             logger.error(f"Error creating box plot: {e}")
             raise
 
+    @instrumented('plot')
+    @cached_figure
     def plot_distribution(self, data: pd.DataFrame, column: str):
         try:
             if not is_numeric(data[column]):
@@ -137,17 +229,14 @@ class GraphPlotter:
             logger.error(f"Error creating distribution plot: {e}")
             raise
 
-    def plot_time_decomposition(self, data: pd.DataFrame, date_col: str, metric_col: str):
+    @instrumented('plot')
+    @cached_figure
+    def plot_time_decomposition(self, data: pd.DataFrame, date_col: str, metric_col: str,
+                                period: int = None, method: str = 'classical'):
         try:
-            from statsmodels.tsa.seasonal import seasonal_decompose
-            
-            # Prepare time series data
-            data = data.sort_values(date_col)
-            data = data.set_index(pd.to_datetime(data[date_col]))
-            series = data[metric_col]
-            
-            # Perform decomposition
-            decomposition = seasonal_decompose(series, period=30)
+            # Regular grid, detected period and decomposition are cached per columns and settings
+            decomposition = get_decomposition(data, date_col, metric_col, period, method)
+            series = decomposition.observed
             
             # Create subplots
             fig = go.Figure()
@@ -161,7 +250,8 @@ class GraphPlotter:
             # Residual
             fig.add_trace(go.Scatter(x=series.index, y=decomposition.resid, name='Residual'))
             
-            fig.update_layout(title='Time Series Decomposition',
+            fig.update_layout(title=f'Time Series Decomposition ({method}, period {decomposition.period} '
+                                    f'x {decomposition.freq})',
                              height=800,
                              showlegend=True)
             
@@ -171,6 +261,8 @@ class GraphPlotter:
             logger.error(f"Error creating time series decomposition: {e}")
             raise
 
+    @instrumented('plot')
+    @cached_figure
     def plot_time_patterns(self, data: pd.DataFrame, date_col: str, metric_col: str):
         try:
             # Validate inputs
@@ -179,28 +271,21 @@ class GraphPlotter:
             if metric_col not in data.columns:
                 raise KeyError(f"Metric column '{metric_col}' not found in data")
                 
-            # Convert to datetime and validate
-            data = data.copy()  # Create copy to avoid modifying original
-            data[date_col] = pd.to_datetime(data[date_col])
+            # Every pattern comes from one pass of bincounts over the calendar fields
+            patterns = get_time_patterns(data, date_col, metric_col)
             
             # Create subplots for different patterns
             fig = go.Figure()
             
             # Daily pattern - only if hourly data exists
-            if data[date_col].dt.hour.nunique() > 1:
-                daily_avg = data.groupby(data[date_col].dt.hour)[metric_col].mean()
-                fig.add_trace(go.Scatter(x=daily_avg.index, y=daily_avg.values, name='Daily Pattern'))
+            if patterns.has_hours:
+                fig.add_trace(go.Scatter(x=patterns.hourly.index, y=patterns.hourly.values, name='Daily Pattern'))
             
             # Weekly pattern
-            weekly_avg = data.groupby(data[date_col].dt.dayofweek)[metric_col].mean()
-            fig.add_trace(go.Scatter(x=['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'],
-                                    y=weekly_avg.values, name='Weekly Pattern'))
+            fig.add_trace(go.Scatter(x=patterns.weekly.index, y=patterns.weekly.values, name='Weekly Pattern'))
             
             # Monthly pattern
-            monthly_avg = data.groupby(data[date_col].dt.month)[metric_col].mean()
-            fig.add_trace(go.Scatter(x=['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
-                                       'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'],
-                                    y=monthly_avg.values, name='Monthly Pattern'))
+            fig.add_trace(go.Scatter(x=patterns.monthly.index, y=patterns.monthly.values, name='Monthly Pattern'))
 
             
             fig.update_layout(
@@ -216,6 +301,51 @@ class GraphPlotter:
             logger.error(f"Error creating time patterns plot: {e}")
             raise
 
+    @instrumented('plot')
+    @cached_figure
+    def plot_time_heatmap(self, data: pd.DataFrame, date_col: str, metric_col: str):
+        """Average metric per weekday and hour of day"""
+        try:
+            patterns = get_time_patterns(data, date_col, metric_col)
+            fig = go.Figure(data=go.Heatmap(
+                z=patterns.heatmap.to_numpy(),
+                x=list(patterns.heatmap.columns),
+                y=list(patterns.heatmap.index),
+                customdata=patterns.counts.to_numpy(),
+                hovertemplate='%{y} %{x}:00<br>Average: %{z:.3f}<br>Rows: %{customdata}<extra></extra>',
+                colorscale='Viridis',
+                hoverongaps=False,
+            ))
+            fig.update_layout(title=f'Average {metric_col} by Weekday and Hour',
+                              xaxis_title='Hour of Day', yaxis={'autorange': 'reversed'})
+            logger.info("Time heatmap created successfully")
+            return fig
+        except Exception as e:
+            logger.error(f"Error creating time heatmap: {e}")
+            raise
+
+    @instrumented('plot')
+    @cached_figure
+    def plot_time_percentiles(self, data: pd.DataFrame, date_col: str, metric_col: str,
+                              period: str = 'hour'):
+        """10th-90th percentile band and median of the metric per hour, weekday or month"""
+        try:
+            table = get_time_percentiles(data, date_col, metric_col)[period]
+            x = list(table.index)
+            low, median, high = (table[col] for col in table.columns)
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(x=x, y=high, name=table.columns[2], line={'width': 0}))
+            fig.add_trace(go.Scatter(x=x, y=low, name=table.columns[0], line={'width': 0},
+                                     fill='tonexty'))
+            fig.add_trace(go.Scatter(x=x, y=median, name='Median'))
+            fig.update_layout(title=f'{metric_col} Percentiles by {period.capitalize()}',
+                              xaxis_title=period.capitalize(), yaxis_title=metric_col)
+            logger.info("Time percentiles plot created successfully")
+            return fig
+        except Exception as e:
+            logger.error(f"Error creating time percentiles plot: {e}")
+            raise
+
     def create_pie_chart(self, data, column):
         try:
             # Add validation for pie chart data
@@ -238,7 +368,7 @@ class GraphPlotter:
         try:
             # Validate time column
             if not pd.api.types.is_datetime64_any_dtype(data[time_column]):
-                data[time_column] = pd.to_datetime(data[time_column])
+                data[time_column] = parse_datetimes(data[time_column])
             
             # Validate value column
             if not pd.api.types.is_numeric_dtype(data[value_column]):
@@ -256,26 +386,30 @@ class GraphPlotter:
 # Create standalone functions that use GraphPlotter class
 _plotter = GraphPlotter()
 
-def plot_bar_graph(data: pd.DataFrame, x_axis: str, y_axis: str):
-    return _plotter.plot_bar_graph(data, x_axis, y_axis)
+def plot_bar_graph(data: pd.DataFrame, x_axis: str, y_axis: str, agg: str = 'mean',
+                   top_n: int = DEFAULT_TOP_N, error_bars: bool = True):
+    return _plotter.plot_bar_graph(data, x_axis, y_axis, agg, top_n, error_bars)
 
-def plot_line_graph(data: pd.DataFrame, x_axis: str, y_axis: str):
-    return _plotter.plot_line_graph(data, x_axis, y_axis)
+def plot_line_graph(data: pd.DataFrame, x_axis: str, y_axis: str,
+                    max_points: int = DEFAULT_POINT_BUDGET):
+    return _plotter.plot_line_graph(data, x_axis, y_axis, max_points)
 
-def plot_scatter_plot(data: pd.DataFrame, x_axis: str, y_axis: str):
-    return _plotter.plot_scatter_plot(data, x_axis, y_axis)
+def plot_scatter_plot(data: pd.DataFrame, x_axis: str, y_axis: str,
+                      max_points: int = DEFAULT_POINT_BUDGET, mode: str = "sample"):
+    return _plotter.plot_scatter_plot(data, x_axis, y_axis, max_points, mode)
 
-def plot_histogram(data: pd.DataFrame, column: str):
-    return _plotter.plot_histogram(data, column)
+def plot_histogram(data: pd.DataFrame, column: str, bins: int = None):
+    return _plotter.plot_histogram(data, column, bins)
 
 def plot_pie_chart(data: pd.DataFrame, cat_column: str, num_column: str = None):
     return _plotter.plot_pie_chart(data, cat_column, num_column)
 
-def plot_correlation_matrix(corr_matrix: pd.DataFrame):
-    return _plotter.plot_correlation_matrix(corr_matrix)
+def plot_correlation_matrix(corr_matrix: pd.DataFrame, title: str = 'Correlation Matrix'):
+    return _plotter.plot_correlation_matrix(corr_matrix, title)
 
-def plot_time_series(data: pd.DataFrame, date_col: str, metric_col: str, freq: str):
-    return _plotter.plot_time_series(data, date_col, metric_col, freq)
+def plot_time_series(data: pd.DataFrame, date_col: str, metric_col: str, freq: str,
+                     agg: str = 'mean'):
+    return _plotter.plot_time_series(data, date_col, metric_col, freq, agg)
 
 def plot_box_plot(data: pd.DataFrame, column: str):
     return _plotter.plot_box_plot(data, column)
@@ -283,8 +417,15 @@ def plot_box_plot(data: pd.DataFrame, column: str):
 def plot_distribution(data: pd.DataFrame, column: str):
     return _plotter.plot_distribution(data, column)
 
-def plot_time_decomposition(data: pd.DataFrame, date_col: str, metric_col: str):
-    return _plotter.plot_time_decomposition(data, date_col, metric_col)
+def plot_time_decomposition(data: pd.DataFrame, date_col: str, metric_col: str,
+                            period: int = None, method: str = 'classical'):
+    return _plotter.plot_time_decomposition(data, date_col, metric_col, period, method)
 
 def plot_time_patterns(data: pd.DataFrame, date_col: str, metric_col: str):
     return _plotter.plot_time_patterns(data, date_col, metric_col)
+
+def plot_time_heatmap(data: pd.DataFrame, date_col: str, metric_col: str):
+    return _plotter.plot_time_heatmap(data, date_col, metric_col)
+
+def plot_time_percentiles(data: pd.DataFrame, date_col: str, metric_col: str, period: str = 'hour'):
+    return _plotter.plot_time_percentiles(data, date_col, metric_col, period)
@@ -0,0 +1,208 @@
+import functools
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from graphs.datetimes import parse_datetimes
+from graphs.instrumentation import instrumented
+from graphs.parallel import map_columns
+from graphs.sketches import get_column_sketch
+from graphs.utils import (DEFAULT_SAMPLE_SIZE, is_datetime_parseable, is_numeric,
+                          is_text_dtype)
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Same threshold as graphs.utils.is_categorical
+CATEGORICAL_UNIQUE_RATIO = 0.05
+
+
+@dataclass
+class ColumnProfile:
+    name: str
+    dtype: str
+    count: int
+    null_count: int
+    nunique: int
+    dtype_numeric: bool
+    dtype_datetime: bool
+    numeric_parseable: bool
+    datetime_parseable: bool
+    is_categorical: bool
+    min: object = None
+    max: object = None
+
+    @property
+    def is_numeric(self) -> bool:
+        return self.dtype_numeric or self.numeric_parseable
+
+    @property
+    def kind(self) -> str:
+        """Column type with the precedence used by graphs.utils.get_column_type"""
+        if self.is_numeric:
+            return "numeric"
+        if self.dtype_datetime:
+            return "datetime"
+        if self.is_categorical:
+            return "categorical"
+        return "text"
+
+    @property
+    def null_ratio(self) -> float:
+        return self.null_count / self.count if self.count else 0.0
+
+
+@dataclass
+class DatasetProfile:
+    rows: int
+    columns: dict = field(default_factory=dict)
+
+    def __getitem__(self, name) -> ColumnProfile:
+        return self.columns[name]
+
+    def __contains__(self, name) -> bool:
+        return name in self.columns
+
+    @property
+    def numeric_columns(self) -> list:
+        """Columns with a numeric dtype, as select_dtypes(include=['number']), which excludes bool"""
+        return [name for name, col in self.columns.items()
+                if col.dtype_numeric and not pd.api.types.is_bool_dtype(col.dtype)]
+
+    @property
+    def numeric_like_columns(self) -> list:
+        """Numeric columns plus text columns that parse as numbers"""
+        return [name for name, col in self.columns.items() if col.is_numeric]
+
+    @property
+    def datetime_columns(self) -> list:
+        return [name for name, col in self.columns.items() if col.datetime_parseable]
+
+    @property
+    def categorical_columns(self) -> list:
+        return [name for name, col in self.columns.items() if col.is_categorical]
+
+    @property
+    def total_nulls(self) -> int:
+        return sum(col.null_count for col in self.columns.values())
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame([{
+            'Column': col.name, 'Type': col.kind, 'Data Type': col.dtype,
+            'Missing Values': col.null_count, 'Unique Values': col.nunique,
+            'Min': col.min, 'Max': col.max,
+        } for col in self.columns.values()]).set_index('Column')
+
+
+def profile_column(series: pd.Series, sample_size: int = DEFAULT_SAMPLE_SIZE,
+                   exact: bool = False, nunique: int = None) -> ColumnProfile:
+    """Compute every per-column fact the pages need in one visit of the column.
+
+    Parse-ability is inferred from a sample (see graphs.utils.is_datetime_parseable),
+    so free-text columns are never parsed in full unless exact is set. A precomputed
+    (e.g. sketched) nunique skips the exact distinct count.
+    """
+    count = len(series)
+    null_count = int(series.isna().sum())
+    nunique = int(series.nunique()) if nunique is None else nunique
+    dtype_numeric = pd.api.types.is_numeric_dtype(series)
+    dtype_datetime = pd.api.types.is_datetime64_any_dtype(series)
+    text = is_text_dtype(series)
+
+    numeric_parseable = dtype_numeric or (text and is_numeric(series, sample_size, exact))
+    datetime_parseable = is_datetime_parseable(series, sample_size, exact)
+
+    parsed = None
+    if dtype_numeric or dtype_datetime:
+        parsed = series
+    elif numeric_parseable:
+        parsed = pd.to_numeric(series, errors='coerce')
+    elif datetime_parseable:
+        parsed = parse_datetimes(series, errors='coerce')
+
+    col_min = col_max = None
+    if parsed is not None and count > null_count and not pd.api.types.is_bool_dtype(parsed):
+        col_min, col_max = parsed.min(), parsed.max()
+
+    return ColumnProfile(
+        name=series.name,
+        dtype=str(series.dtype),
+        count=count,
+        null_count=null_count,
+        nunique=nunique,
+        dtype_numeric=dtype_numeric,
+        dtype_datetime=dtype_datetime,
+        numeric_parseable=numeric_parseable,
+        datetime_parseable=datetime_parseable,
+        is_categorical=text and count > 0 and nunique / count < CATEGORICAL_UNIQUE_RATIO,
+        min=col_min,
+        max=col_max,
+    )
+
+
+def _profile_task(series: pd.Series, sample_size: int, exact: bool, nunique: dict = None) -> ColumnProfile:
+    return profile_column(series, sample_size, exact, nunique.get(series.name) if nunique else None)
+
+
+def profile_dataset(data: pd.DataFrame, sample_size: int = DEFAULT_SAMPLE_SIZE,
+                    exact: bool = False, approximate: bool = False,
+                    workers: int = None) -> DatasetProfile:
+    """Profile every column, sharding large frames across the process pool.
+
+    approximate takes distinct counts from the column sketches, which stay
+    cached in this process for the other pages.
+    """
+    profile = DatasetProfile(rows=len(data))
+    nunique = ({col: get_column_sketch(data, col).distinct.estimate for col in data.columns}
+               if approximate else None)
+    task = functools.partial(_profile_task, sample_size=sample_size, exact=exact, nunique=nunique)
+    for col, column_profile in zip(data.columns, map_columns(task, data, workers=workers)):
+        profile.columns[col] = column_profile
+    logger.info(f"Profiled {len(profile.columns)} columns over {profile.rows} rows")
+    return profile
+
+
+class ProfileCache:
+    """Small LRU of dataset profiles keyed by dataset key."""
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            return None
+
+    def put(self, key, profile: DatasetProfile):
+        with self._lock:
+            self._entries[key] = profile
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_profiles = ProfileCache()
+
+
+@instrumented('profile')
+def get_dataset_profile(data: pd.DataFrame, key: str = None,
+                        sample_size: int = DEFAULT_SAMPLE_SIZE, exact: bool = False,
+                        approximate: bool = False) -> DatasetProfile:
+    """Return the stored profile for a dataset, computing it on first use."""
+    key = (key if key is not None else f"id-{id(data)}", sample_size, exact, approximate)
+    profile = _profiles.get(key)
+    if profile is None or profile.rows != len(data) or list(profile.columns) != list(data.columns):
+        profile = profile_dataset(data, sample_size, exact, approximate)
+        _profiles.put(key, profile)
+    return profile
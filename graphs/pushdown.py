@@ -0,0 +1,127 @@
+import logging
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from graphs.instrumentation import instrumented
+
+try:
+    import duckdb
+except ImportError:  # Optional: every aggregation has a pandas path
+    duckdb = None
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+QUERY_BACKENDS = ('auto', 'duckdb', 'pandas')
+# auto: DuckDB when installed and the input has at least PUSHDOWN_MIN_ROWS rows
+QUERY_BACKEND = os.getenv("QUERY_BACKEND", "auto")
+PUSHDOWN_MIN_ROWS = int(os.getenv("PUSHDOWN_MIN_ROWS", "100000"))
+
+GROUP_AGGREGATIONS = ('mean', 'sum', 'count', 'min', 'max', 'median', 'std')
+# pandas skips nulls and sums an all-null group to 0; these match that
+_SQL_AGGREGATES = {
+    'mean': 'avg(v)',
+    'sum': 'coalesce(sum(v), 0)',
+    'count': 'count(v)',
+    'min': 'min(v)',
+    'max': 'max(v)',
+    'median': 'median(v)',
+    'std': 'stddev_samp(v)',
+}
+
+_local = threading.local()
+_FALLBACK_ERRORS = (pa.ArrowException, TypeError, ValueError) + ((duckdb.Error,) if duckdb else ())
+
+
+def duckdb_available() -> bool:
+    return duckdb is not None
+
+
+def _connection():
+    """DuckDB connection of the current thread; connections are not safe to share between threads."""
+    con = getattr(_local, 'connection', None)
+    if con is None:
+        con = _local.connection = duckdb.connect(':memory:')
+    return con
+
+
+def use_pushdown(rows: int, *columns) -> bool:
+    """Whether an aggregation over rows of these columns runs in DuckDB.
+
+    Categorical columns stay in pandas, which already counts their integer codes.
+    """
+    if QUERY_BACKEND == 'pandas' or duckdb is None:
+        return False
+    if any(isinstance(col.dtype, pd.CategoricalDtype) for col in columns if isinstance(col, pd.Series)):
+        return False
+    return QUERY_BACKEND == 'duckdb' or rows >= PUSHDOWN_MIN_ROWS
+
+
+def _is_arrow_backed(values) -> bool:
+    dtype = getattr(values, 'dtype', None)
+    return isinstance(dtype, pd.ArrowDtype) or getattr(dtype, 'storage', None) == 'pyarrow'
+
+
+def _scan_source(columns: dict):
+    """Columns in a form DuckDB scans in place: Arrow when any column is Arrow-backed
+    (e.g. memory-mapped uploads), else a DataFrame over the existing NumPy buffers."""
+    if any(_is_arrow_backed(values) for values in columns.values()):
+        return pa.table({name: pa.array(values, from_pandas=True) for name, values in columns.items()})
+    return pd.DataFrame({name: values.to_numpy() if isinstance(values, pd.Series) else values
+                         for name, values in columns.items()}, copy=False)
+
+
+def _query(sql: str, **columns) -> pd.DataFrame:
+    """Run sql over table t holding the given columns; only the result reaches pandas."""
+    con = _connection()
+    con.register('t', _scan_source(columns))
+    try:
+        return con.execute(sql).df()
+    finally:
+        con.unregister('t')
+
+
+@instrumented('query')
+def value_counts(series: pd.Series) -> pd.Series:
+    """Non-null value counts, most frequent first, as series.value_counts()."""
+    if use_pushdown(len(series), series):
+        try:
+            counts = _query("SELECT k, count(*) AS n FROM t WHERE k IS NOT NULL "
+                            "GROUP BY k ORDER BY n DESC, k", k=series)
+            return pd.Series(counts['n'].to_numpy(), index=pd.Index(counts['k'], name=series.name),
+                             name='count')
+        except _FALLBACK_ERRORS as e:
+            logger.debug(f"DuckDB value counts of {series.name} fell back to pandas: {e}")
+    return series.value_counts()
+
+
+@instrumented('query')
+def aggregate(keys, values, aggs=('mean',)) -> pd.DataFrame:
+    """aggs of values per non-null key, one column per aggregation, sorted by key.
+
+    keys and values are aligned Series or arrays of the same length.
+    """
+    unknown = set(aggs) - set(GROUP_AGGREGATIONS)
+    if unknown:
+        raise ValueError(f"Unknown aggregations {sorted(unknown)}, expected {GROUP_AGGREGATIONS}")
+    if use_pushdown(len(keys), keys, values):
+        try:
+            selected = ', '.join(f"{_SQL_AGGREGATES[agg]} AS \"{agg}\"" for agg in aggs)
+            result = _query(f"SELECT k, {selected} FROM t WHERE k IS NOT NULL GROUP BY k ORDER BY k",
+                            k=keys, v=values)
+            return result.set_index('k').rename_axis(getattr(keys, 'name', None))
+        except _FALLBACK_ERRORS as e:
+            logger.debug(f"DuckDB aggregation fell back to pandas: {e}")
+    if not isinstance(values, pd.Series):
+        values = pd.Series(values)
+        keys = np.asarray(keys)
+    return values.groupby(keys, observed=True).agg(list(aggs))
+
+
+def group_aggregate(data: pd.DataFrame, by: str, column: str, aggs=('mean',)) -> pd.DataFrame:
+    """aggs of data[column] per value of data[by], as data.groupby(by)[column].agg(aggs)."""
+    return aggregate(data[by], data[column], aggs).rename_axis(by)
@@ -0,0 +1,69 @@
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from graphs.datetimes import to_datetime_column
+from graphs.figure_cache import FigureCache
+from graphs.fingerprint import dataset_fingerprint
+from graphs.pushdown import aggregate
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+AGGREGATIONS = ('mean', 'sum', 'min', 'max', 'count')
+
+# How each stored daily column combines into a coarser period
+_REAGGREGATE = {'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max'}
+
+
+@dataclass
+class RollupCube:
+    """Daily sum/count/min/max of one metric; coarser periods are derived from it."""
+    date_col: str
+    metric_col: str
+    daily: pd.DataFrame
+    rows: int
+
+    def rollup(self, freq: str, agg: str = 'mean') -> pd.Series:
+        """Metric aggregated per period, as data.set_index(date_col)[metric].resample(freq).agg(agg)."""
+        if agg not in AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation {agg!r}, expected one of {AGGREGATIONS}")
+        periods = self.daily.resample(freq).agg(_REAGGREGATE)
+        if agg == 'mean':
+            with np.errstate(invalid='ignore', divide='ignore'):
+                values = periods['sum'] / periods['count'].where(periods['count'] > 0)
+        else:
+            values = periods[agg]
+        return values.rename(self.metric_col).rename_axis(self.date_col)
+
+
+def build_rollup(dates: pd.Series, values: pd.Series) -> pd.DataFrame:
+    """Daily sum, count, min and max of values, in one grouped pass over the rows (in DuckDB when enabled)."""
+    if dates.dt.tz is not None:
+        # Bin by local calendar day, as resample does for a tz-aware index
+        dates = dates.dt.tz_localize(None)
+    days = dates.to_numpy().astype('datetime64[D]')
+    values = pd.to_numeric(values, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    keep = ~np.isnat(days)
+    daily = aggregate(days[keep].view(np.int64), values[keep], ('sum', 'count', 'min', 'max'))
+    daily.index = pd.DatetimeIndex(daily.index.to_numpy().astype('datetime64[D]').astype('datetime64[ns]'))
+    return daily
+
+
+_cubes = FigureCache(max_entries=64)
+
+
+def get_rollup(data: pd.DataFrame, date_col: str, metric_col: str) -> RollupCube:
+    """Rollup cube of (date column, metric), built once per dataset version."""
+    fingerprint = dataset_fingerprint(data)
+    key = None if fingerprint is None else (fingerprint, 'rollup', date_col, metric_col)
+    cube = _cubes.get(key) if key is not None else None
+    if cube is None:
+        daily = build_rollup(to_datetime_column(data, date_col), data[metric_col])
+        cube = RollupCube(date_col, metric_col, daily, len(data))
+        logger.info(f"Built rollup of {metric_col} by {date_col}: {len(data)} rows into {len(daily)} days")
+        if key is not None:
+            _cubes.put(key, cube)
+    return cube
@@ -0,0 +1,298 @@
+import logging
+import math
+
+import numpy as np
+import pandas as pd
+
+from graphs.figure_cache import FigureCache
+from graphs.fingerprint import dataset_fingerprint
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Datasets with more rows than this default to approximate mode in the UI
+APPROX_ROW_THRESHOLD = 1_000_000
+
+DEFAULT_HLL_PRECISION = 14       # 16384 registers, ~0.8% standard error
+DEFAULT_TDIGEST_COMPRESSION = 200
+DEFAULT_CMS_WIDTH = 4096
+DEFAULT_CMS_DEPTH = 5
+DEFAULT_TOP_K = 50
+
+# Duplicate rows are counted exactly from 8-byte row hashes up to this many rows,
+# and estimated from a distinct-row sketch beyond it
+MAX_EXACT_DUPLICATE_ROWS = 20_000_000
+
+# Duplicate estimates within this many standard errors of the row count are reported as none
+DUPLICATE_ERROR_BAND = 3
+
+
+def hash_values(values) -> np.ndarray:
+    """64-bit hashes of a Series or array, stable across chunks and sessions."""
+    if isinstance(values, pd.Series):
+        values = values.to_numpy()
+    return pd.util.hash_array(np.asarray(values))
+
+
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    """Exact bit length of uint64 values below 2**53 (0 for 0)."""
+    # Exact in float64 for these magnitudes; frexp's exponent is the bit length
+    return np.frexp(x.astype(np.float64))[1].astype(np.int64)
+
+
+class HyperLogLog:
+    """Mergeable distinct-count estimate over 64-bit hashes."""
+
+    def __init__(self, precision: int = DEFAULT_HLL_PRECISION):
+        if not 11 <= precision <= 18:
+            raise ValueError(f"HyperLogLog precision must be between 11 and 18, got {precision}")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update_hashes(self, hashes: np.ndarray):
+        if len(hashes) == 0:
+            return
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        rest_bits = 64 - self.precision
+        index = (hashes >> np.uint64(rest_bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << rest_bits) - 1)
+        # Rank = position of the leftmost 1 bit in the remaining bits
+        rank = rest_bits - _bit_length(rest) + 1
+        # Per-register maximum via a (register, rank) presence grid; much faster than np.maximum.at
+        seen = np.zeros((len(self.registers), rest_bits + 2), dtype=bool)
+        seen[index, rank] = True
+        highest = rest_bits + 1 - np.argmax(seen[:, ::-1], axis=1)
+        highest[~seen.any(axis=1)] = 0
+        np.maximum(self.registers, highest.astype(np.uint8), out=self.registers)
+
+    def update(self, values):
+        self.update_hashes(hash_values(values))
+
+    def merge(self, other: "HyperLogLog"):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    @property
+    def relative_error(self) -> float:
+        """Standard error of the estimate, relative to the true count."""
+        return 1.04 / np.sqrt(len(self.registers))
+
+    @property
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+
+class TDigest:
+    """Mergeable quantile sketch (merging t-digest with the k1 scale function)."""
+
+    def __init__(self, compression: float = DEFAULT_TDIGEST_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            return
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        # Sort the new values once, then slot the (few) existing centroids in among them
+        values = np.sort(values)
+        positions = np.searchsorted(values, self.means)
+        means = np.insert(values, positions, self.means)
+        weights = np.insert(np.ones(values.size), positions, self.weights)
+        self._compress(means, weights, presorted=True)
+
+    def merge(self, other: "TDigest"):
+        if other.count:
+            self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+            self._compress(np.concatenate([self.means, other.means]),
+                           np.concatenate([self.weights, other.weights]))
+        return self
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray, presorted: bool = False):
+        if not presorted:
+            order = np.argsort(means, kind='mergesort')
+            means, weights = means[order], weights[order]
+        total = weights.sum()
+        # Each cluster spans at most one unit of k(q) = delta / (2 pi) * asin(2q - 1)
+        q_center = (np.cumsum(weights) - weights / 2) / total
+        k = self.compression / (2 * math.pi) * np.arcsin(np.clip(2 * q_center - 1, -1, 1))
+        # k is non-decreasing along the sorted values, so renumbering the cells needs no sort
+        cell = np.floor(k - k[0]).astype(np.int64)
+        cluster = np.concatenate([[0], np.cumsum(np.diff(cell) != 0)])
+        new_weights = np.bincount(cluster, weights=weights)
+        self.means = np.bincount(cluster, weights=means * weights) / new_weights
+        self.weights = new_weights
+        self.count = float(total)
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return float('nan')
+        if len(self.means) == 1:
+            return float(self.means[0])
+        centers = (np.cumsum(self.weights) - self.weights / 2) / self.count
+        # Anchor the ends at the exact extremes
+        positions = np.concatenate([[0.0], centers, [1.0]])
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        return float(np.interp(q, positions, values))
+
+
+class CountMinSketch:
+    """Mergeable frequency estimates over 64-bit hashes; never underestimates."""
+
+    def __init__(self, width: int = DEFAULT_CMS_WIDTH, depth: int = DEFAULT_CMS_DEPTH):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+
+    def _indices(self, hashes: np.ndarray) -> np.ndarray:
+        # Double hashing: row i uses h1 + i * h2
+        h1 = (hashes & np.uint64(0xFFFFFFFF)).astype(np.int64)
+        h2 = (hashes >> np.uint64(32)).astype(np.int64) | 1
+        rows = np.arange(self.depth, dtype=np.int64)[:, None]
+        return (h1[None, :] + rows * h2[None, :]) % self.width
+
+    def update_hashes(self, hashes: np.ndarray, counts: np.ndarray):
+        indices = self._indices(np.asarray(hashes, dtype=np.uint64))
+        for row in range(self.depth):
+            self.table[row] += np.bincount(indices[row], weights=counts,
+                                           minlength=self.width).astype(np.int64)
+
+    def estimate_hashes(self, hashes: np.ndarray) -> np.ndarray:
+        indices = self._indices(np.asarray(hashes, dtype=np.uint64))
+        return self.table[np.arange(self.depth)[:, None], indices].min(axis=0)
+
+    def merge(self, other: "CountMinSketch"):
+        self.table += other.table
+        return self
+
+
+class HeavyHitters:
+    """Top-k most frequent values, estimated with a count-min sketch."""
+
+    def __init__(self, k: int = DEFAULT_TOP_K, width: int = DEFAULT_CMS_WIDTH,
+                 depth: int = DEFAULT_CMS_DEPTH):
+        self.k = k
+        self.sketch = CountMinSketch(width, depth)
+        self.candidates = {}  # value -> hash
+
+    def update(self, values: pd.Series):
+        # Pre-aggregating the chunk keeps sketch updates proportional to its distinct values
+        counts = values.value_counts()
+        self._update_counts(counts.index, counts.to_numpy())
+
+    def _update_counts(self, keys, counts: np.ndarray):
+        hashes = hash_values(np.asarray(keys, dtype=object))
+        self.sketch.update_hashes(hashes, counts)
+        self.candidates.update(zip(keys, hashes))
+        self._trim()
+
+    def _trim(self):
+        if len(self.candidates) <= self.k * 4:
+            return
+        values = list(self.candidates)
+        estimates = self.sketch.estimate_hashes(np.fromiter(self.candidates.values(), dtype=np.uint64))
+        keep = np.argsort(-estimates, kind='mergesort')[:self.k * 2]
+        self.candidates = {values[i]: self.candidates[values[i]] for i in keep}
+
+    def merge(self, other: "HeavyHitters"):
+        self.sketch.merge(other.sketch)
+        self.candidates.update(other.candidates)
+        self._trim()
+        return self
+
+    def top(self, k: int = None) -> pd.Series:
+        """Estimated counts of the most frequent values, most frequent first."""
+        k = self.k if k is None else k
+        if not self.candidates:
+            return pd.Series(dtype='int64', name='count')
+        estimates = self.sketch.estimate_hashes(np.fromiter(self.candidates.values(), dtype=np.uint64))
+        top = pd.Series(estimates, index=list(self.candidates), name='count')
+        return top.sort_values(ascending=False, kind='mergesort').head(k)
+
+
+class ColumnSketch:
+    """All sketches of one column, built chunk by chunk and mergeable across chunks."""
+
+    def __init__(self, numeric: bool):
+        self.numeric = numeric
+        self.rows = 0
+        self.null_count = 0
+        self.distinct = HyperLogLog()
+        self.quantiles = TDigest() if numeric else None
+        self.heavy_hitters = None if numeric else HeavyHitters()
+
+    def update(self, series: pd.Series):
+        values = series.dropna()
+        self.rows += len(series)
+        self.null_count += len(series) - len(values)
+        if values.empty:
+            return
+        self.distinct.update(values)
+        if self.numeric:
+            self.quantiles.update(values.to_numpy(dtype=float))
+        else:
+            self.heavy_hitters.update(values)
+
+    def merge(self, other: "ColumnSketch"):
+        self.rows += other.rows
+        self.null_count += other.null_count
+        self.distinct.merge(other.distinct)
+        if self.numeric:
+            self.quantiles.merge(other.quantiles)
+        else:
+            self.heavy_hitters.merge(other.heavy_hitters)
+        return self
+
+
+def sketch_column(series: pd.Series, chunk_rows: int = 1_000_000) -> ColumnSketch:
+    numeric = pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+    sketch = ColumnSketch(numeric)
+    for start in range(0, len(series), chunk_rows):
+        sketch.update(series.iloc[start:start + chunk_rows])
+    return sketch
+
+
+def estimated_duplicates(rows: int, distinct: HyperLogLog) -> int:
+    """Rows minus the sketched distinct rows; differences inside the sketch's error band count as none."""
+    duplicates = rows - distinct.estimate
+    if duplicates <= DUPLICATE_ERROR_BAND * distinct.relative_error * rows:
+        return 0
+    return int(duplicates)
+
+
+def approx_duplicate_rows(data: pd.DataFrame) -> int:
+    """Duplicate rows from row hashes: counted exactly up to MAX_EXACT_DUPLICATE_ROWS, then sketched."""
+    hashes = pd.util.hash_pandas_object(data, index=False).to_numpy()
+    if len(hashes) <= MAX_EXACT_DUPLICATE_ROWS:
+        return len(hashes) - len(np.unique(hashes))
+    hll = HyperLogLog()
+    hll.update_hashes(hashes)
+    return estimated_duplicates(len(hashes), hll)
+
+
+# Sketches are built once per dataset and column
+_sketches = FigureCache(max_entries=512)
+
+
+def get_column_sketch(data: pd.DataFrame, column) -> ColumnSketch:
+    fingerprint = dataset_fingerprint(data)
+    key = None if fingerprint is None else (fingerprint, 'sketch', column)
+    sketch = _sketches.get(key) if key is not None else None
+    if sketch is None:
+        sketch = sketch_column(data[column])
+        if key is not None:
+            _sketches.put(key, sketch)
+    return sketch
@@ -0,0 +1,179 @@
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from graphs.figure_cache import FigureCache
+from graphs.fingerprint import dataset_fingerprint
+from graphs.instrumentation import instrumented
+from graphs.parallel import DEFAULT_WORKERS, map_shards, use_parallel
+from graphs.sketches import get_column_sketch
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+QUANTILES = (0.25, 0.5, 0.75)
+
+# Columns converted to a float block at a time, at most
+DEFAULT_BLOCK_COLUMNS = 32
+
+# Working memory of all blocks computed at once (one per worker); sets the block width on tall frames
+STATS_MEMORY_BUDGET_MB = int(os.getenv("STATS_MEMORY_BUDGET_MB", "1024"))
+
+# Full-size float arrays alive per block: the block itself and a sorted / scratch copy
+_BLOCK_BUFFERS = 2
+
+STAT_COLUMNS = ['Count', 'Mean', 'Std Dev', 'Min', '25%', 'Median', '75%', 'Max',
+                'Skewness', 'Kurtosis', 'CV %', 'Range', 'Missing', 'Missing %', 'Unique']
+
+# Rows of the summary table on the Numerical Stats tab, in display order
+SUMMARY_ROWS = ['Count', 'Mean', 'Std Dev', 'Min', '25%', 'Median', '75%', 'Max',
+                'Skewness', 'Kurtosis']
+
+_tables = FigureCache(max_entries=64)
+
+
+def skewness(n, m2, m3):
+    """Bias-corrected sample skewness from sums of centered powers, as pandas computes it."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        skew = np.where(m2 == 0, 0.0, n * np.sqrt(n - 1) / (n - 2) * m3 / m2 ** 1.5)
+    return np.where(n < 3, np.nan, skew)
+
+
+def kurtosis(n, m2, m4):
+    """Bias-corrected excess kurtosis from sums of centered powers, as pandas computes it."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        kurt = np.where(
+            m2 == 0, 0.0,
+            n * (n + 1) * (n - 1) * m4 / ((n - 2) * (n - 3) * m2 ** 2)
+            - 3 * (n - 1) ** 2 / ((n - 2) * (n - 3)))
+    return np.where(n < 4, np.nan, kurt)
+
+
+def _block_statistics(block: np.ndarray, sketches: list = None) -> np.ndarray:
+    """Statistics of each row of a (columns x rows) float block (NaN = missing).
+
+    The block is overwritten: moments are computed in place, with one scratch
+    buffer of the same size. With sketches (one ColumnSketch per row) quantiles
+    and unique counts are read from the t-digest and HyperLogLog instead of
+    sorting the block.
+    """
+    rows = block.shape[1]
+    missing_mask = np.isnan(block)
+    count = rows - np.count_nonzero(missing_mask, axis=1)
+    has_values = count > 0
+    safe_count = np.maximum(count, 1)
+    cols = np.arange(block.shape[0])
+
+    if sketches is not None:
+        with np.errstate(invalid='ignore'):
+            minimum = np.where(has_values, np.fmin.reduce(block, axis=1), np.nan)
+            maximum = np.where(has_values, np.fmax.reduce(block, axis=1), np.nan)
+        quantiles = [np.array([sketch.quantiles.quantile(q) for sketch in sketches])
+                     for q in QUANTILES]
+        unique = np.array([sketch.distinct.estimate for sketch in sketches])
+        scratch = np.empty_like(block)
+    else:
+        # One contiguous sort per column serves min, max, every quantile and the unique count
+        scratch = np.sort(block, axis=1)  # NaNs sort to the end
+        minimum = np.where(has_values, scratch[:, 0], np.nan)
+        maximum = np.where(has_values, scratch[cols, np.maximum(count - 1, 0)], np.nan)
+
+        quantiles = []
+        for q in QUANTILES:
+            position = q * (safe_count - 1)
+            lower = np.floor(position).astype(np.int64)
+            upper = np.ceil(position).astype(np.int64)
+            weight = position - lower
+            value = scratch[cols, lower] * (1 - weight) + scratch[cols, upper] * weight
+            quantiles.append(np.where(has_values, value, np.nan))
+
+        # Unique values: positions where the sorted, non-missing values change, one column at a time
+        unique = np.array([np.count_nonzero(row[1:n] != row[:n - 1]) + 1 if n else 0
+                           for row, n in zip(scratch, count)])
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Missing cells contribute zero to the sum and to every central moment
+        np.copyto(block, 0.0, where=missing_mask)
+        mean = block.sum(axis=1) / safe_count
+        centered = np.subtract(block, mean[:, None], out=block)
+        np.copyto(centered, 0.0, where=missing_mask)
+        squared = np.multiply(centered, centered, out=scratch)
+        m2 = squared.sum(axis=1)
+        m3 = np.multiply(squared, centered, out=centered).sum(axis=1)
+        m4 = np.multiply(squared, squared, out=squared).sum(axis=1)
+        n = count.astype(float)
+
+        std = np.sqrt(m2 / (n - 1))
+        skew = skewness(n, m2, m3)
+        kurt = kurtosis(n, m2, m4)
+        mean = np.where(has_values, mean, np.nan)
+        cv = std / mean * 100
+
+    missing = rows - count
+    return np.column_stack([
+        count, mean, std, minimum, quantiles[0], quantiles[1], quantiles[2], maximum,
+        skew, kurt, cv, maximum - minimum, missing, missing / max(rows, 1) * 100, unique,
+    ])
+
+
+def _frame_statistics(frame: pd.DataFrame, sketches: list = None) -> np.ndarray:
+    # Columns as contiguous rows, so every per-column pass is a sequential scan;
+    # filled one column at a time so no second full-size copy is made
+    block = np.empty((frame.shape[1], len(frame)), dtype=float)
+    for i in range(frame.shape[1]):
+        block[i] = frame.iloc[:, i].to_numpy(dtype=float, na_value=np.nan)
+    return _block_statistics(block, sketches)
+
+
+def block_columns_for(rows: int, workers: int = 1,
+                      budget_bytes: int = STATS_MEMORY_BUDGET_MB * 2 ** 20) -> int:
+    """Columns per block so that workers blocks of rows fit the memory budget together."""
+    per_column = max(rows, 1) * 8 * _BLOCK_BUFFERS * max(workers, 1)
+    return int(min(max(budget_bytes // per_column, 1), DEFAULT_BLOCK_COLUMNS))
+
+
+def numeric_statistics(data: pd.DataFrame, columns=None, block_columns: int = None,
+                       approximate: bool = False, workers: int = None) -> pd.DataFrame:
+    """Moments, quantiles, CV, range, missing and unique counts for numeric columns.
+
+    Returns one row per column and one column per entry of STAT_COLUMNS. Blocks
+    of columns are spread over the process pool for large frames. In
+    approximate mode quantiles and unique counts come from the column sketches,
+    which live in this process, so those blocks are computed here. block_columns
+    defaults to the widest block that keeps every concurrent block within
+    STATS_MEMORY_BUDGET_MB.
+    """
+    columns = list(data.select_dtypes(include=['number']).columns if columns is None else columns)
+    if block_columns is None:
+        concurrent = (workers or DEFAULT_WORKERS) if use_parallel(data, columns, workers) else 1
+        block_columns = block_columns_for(len(data), 1 if approximate else concurrent)
+    blocks = [columns[start:start + block_columns] for start in range(0, len(columns), block_columns)]
+    if approximate:
+        results = [_frame_statistics(data[names], [get_column_sketch(data, name) for name in names])
+                   for names in blocks]
+    else:
+        results = map_shards(_frame_statistics, data, blocks, workers)
+    values = np.vstack(results) if results else np.empty((0, len(STAT_COLUMNS)))
+    logger.info(f"Computed statistics for {len(columns)} numeric columns")
+    return pd.DataFrame(values, index=columns, columns=STAT_COLUMNS)
+
+
+@instrumented('stats')
+def get_numeric_statistics(data: pd.DataFrame, columns=None, approximate: bool = False) -> pd.DataFrame:
+    """numeric_statistics, memoized per dataset fingerprint and column list."""
+    fingerprint = dataset_fingerprint(data)
+    key = None if fingerprint is None else (
+        fingerprint, tuple(columns) if columns is not None else None, approximate)
+    table = _tables.get(key) if key is not None else None
+    if table is None:
+        table = numeric_statistics(data, columns, approximate=approximate)
+        if key is not None:
+            _tables.put(key, table)
+    return table
+
+
+def summary_table(stats: pd.DataFrame, decimals: int = 2) -> pd.DataFrame:
+    """Statistics laid out as the Numerical Stats summary: one row per statistic."""
+    return stats[SUMMARY_ROWS].T.round(decimals)
@@ -0,0 +1,124 @@
+import logging
+import os
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_DIR = os.getenv("DATASET_STORE_DIR", ".data_store")
+DEFAULT_STORE_BUDGET_MB = int(os.getenv("DATASET_STORE_MB", "20480"))
+
+# Strings stay in Arrow buffers instead of becoming one Python object per cell
+_STRING_TYPES = {
+    pa.string(): pd.StringDtype("pyarrow"),
+    pa.large_string(): pd.StringDtype("pyarrow"),
+}
+
+
+def to_frame(table) -> pd.DataFrame:
+    """Arrow table or record batch to pandas, keeping strings in Arrow buffers."""
+    return table.to_pandas(split_blocks=True, types_mapper=_STRING_TYPES.get)
+
+
+class ArrowStore:
+    """On-disk Arrow IPC copies of uploaded datasets, loaded via memory mapping.
+
+    Files are written uncompressed so they can be mapped directly: every session
+    loading the same dataset shares the pages through the OS cache.
+    """
+
+    def __init__(self, root: str = DEFAULT_STORE_DIR, budget_bytes: int = None):
+        self.root = root
+        self.budget_bytes = budget_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.arrow")
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self.path_for(key))
+
+    def write(self, key: str, data: pd.DataFrame) -> str:
+        path = self.path_for(key)
+        if os.path.exists(path):
+            return path
+        # Write under a temporary name so concurrent sessions never map a partial file
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            feather.write_feather(data, tmp_path, compression="uncompressed")
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        logger.info(f"Wrote Arrow copy of dataset {key} to {path}")
+        self._prune(keep=key)
+        return path
+
+    def write_tables(self, key: str, schema: pa.Schema, tables) -> str:
+        """Write an iterable of Arrow tables (e.g. converted CSV chunks) as one stored dataset."""
+        path = self.path_for(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+                for table in tables:
+                    writer.write_table(table)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        logger.info(f"Streamed Arrow copy of dataset {key} to {path}")
+        self._prune(keep=key)
+        return path
+
+    def iter_batches(self, key: str):
+        """Record batches of a stored dataset, read from the memory map one at a time."""
+        reader = pa.ipc.open_file(pa.memory_map(self.path_for(key), "r"))
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+
+    def read_table(self, key: str, columns=None) -> pa.Table:
+        source = pa.memory_map(self.path_for(key), "r")
+        table = pa.ipc.open_file(source).read_all()
+        # The mapped table is zero-copy, so selecting columns reads nothing else
+        return table if columns is None else table.select(list(columns))
+
+    def load(self, key: str, columns=None) -> pd.DataFrame:
+        """Load a stored dataset, or only the given columns, as a DataFrame backed by the mapped file."""
+        return to_frame(self.read_table(key, columns))
+
+    def _prune(self, keep: str):
+        if self.budget_bytes is None:
+            return
+        files = [os.path.join(self.root, name) for name in os.listdir(self.root)
+                 if name.endswith(".arrow")]
+        files.sort(key=os.path.getmtime)
+        total = sum(os.path.getsize(path) for path in files)
+        for path in files:
+            if total <= self.budget_bytes:
+                break
+            if path == self.path_for(keep):
+                continue
+            size = os.path.getsize(path)
+            try:
+                # Open memory maps stay valid after unlink on POSIX; Windows refuses to remove a mapped file
+                os.remove(path)
+            except OSError as e:
+                # Still in use (or already gone): left for a later prune
+                logger.warning(f"Could not prune stored dataset {path}: {e}")
+                continue
+            total -= size
+            logger.info(f"Pruned stored dataset {path}")
+
+
+_store = None
+
+
+def get_dataset_store() -> ArrowStore:
+    global _store
+    if _store is None:
+        _store = ArrowStore(DEFAULT_STORE_DIR, DEFAULT_STORE_BUDGET_MB * 1024 * 1024)
+    return _store
@@ -0,0 +1,349 @@
+import logging
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from graphs.profiling import CATEGORICAL_UNIQUE_RATIO, ColumnProfile, DatasetProfile
+from graphs.sketches import MAX_EXACT_DUPLICATE_ROWS, HyperLogLog, TDigest, estimated_duplicates
+from graphs.statistics import STAT_COLUMNS, kurtosis, skewness
+from graphs.storage import ArrowStore, to_frame
+from graphs.utils import is_datetime_parseable, is_text_dtype
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_ROWS = 250_000
+
+# Text columns stop tracking exact value counts beyond this many distinct values
+MAX_TRACKED_VALUES = 10_000
+
+PREVIEW_ROWS = 100
+
+@dataclass
+class ColumnAccumulator:
+    """Running aggregates of one column, updated one chunk at a time."""
+    name: str
+    numeric: bool
+    count: int = 0
+    null_count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    m3: float = 0.0
+    m4: float = 0.0
+    min: object = None
+    max: object = None
+    distinct: HyperLogLog = field(default_factory=HyperLogLog)
+    quantiles: TDigest = field(default_factory=TDigest)
+    value_counts: Counter = field(default_factory=Counter)
+    counts_truncated: bool = False
+
+    def update(self, series: pd.Series):
+        values = series.dropna()
+        self.null_count += len(series) - len(values)
+        if len(values) == 0:
+            return
+        self.distinct.update(values)
+        if self.numeric:
+            self._update_numeric(values.to_numpy(dtype=float))
+        else:
+            self.count += len(values)
+            self._update_counts(values)
+
+    def _update_numeric(self, x: np.ndarray):
+        # Chan/Pébay pairwise merge of the chunk's moments: Welford's update, one chunk at a time
+        n_b = len(x)
+        mean_b = x.mean()
+        centered = x - mean_b
+        squared = centered * centered
+        m2_b, m3_b, m4_b = squared.sum(), (squared * centered).sum(), (squared * squared).sum()
+
+        n_a, n = self.count, self.count + n_b
+        delta = mean_b - self.mean
+        self.m4 += (m4_b + delta ** 4 * n_a * n_b * (n_a * n_a - n_a * n_b + n_b * n_b) / n ** 3
+                    + 6 * delta ** 2 * (n_a * n_a * m2_b + n_b * n_b * self.m2) / n ** 2
+                    + 4 * delta * (n_a * m3_b - n_b * self.m3) / n)
+        self.m3 += (m3_b + delta ** 3 * n_a * n_b * (n_a - n_b) / n ** 2
+                    + 3 * delta * (n_a * m2_b - n_b * self.m2) / n)
+        self.m2 += m2_b + delta ** 2 * n_a * n_b / n
+        self.mean += delta * n_b / n
+        self.count = n
+
+        chunk_min, chunk_max = x.min(), x.max()
+        self.min = chunk_min if self.min is None else min(self.min, chunk_min)
+        self.max = chunk_max if self.max is None else max(self.max, chunk_max)
+        self.quantiles.update(x)
+
+    def _update_counts(self, values: pd.Series):
+        if self.counts_truncated:
+            return
+        self.value_counts.update(values.value_counts().to_dict())
+        if len(self.value_counts) > MAX_TRACKED_VALUES:
+            self.value_counts.clear()
+            self.counts_truncated = True
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else float('nan')
+
+    def quantile(self, q: float) -> float:
+        """Approximate quantile from the t-digest."""
+        return self.quantiles.quantile(q)
+
+    def top_values(self) -> pd.Series:
+        """Value counts of a text column, most frequent first; empty once truncated."""
+        return pd.Series(dict(self.value_counts.most_common()), dtype='int64', name='count')
+
+
+@dataclass
+class StreamSummary:
+    key: str
+    rows: int
+    dtypes: pd.Series
+    preview: pd.DataFrame
+    columns: dict
+    row_distinct: HyperLogLog
+    chunks: int = 0
+    row_hashes: list = field(default_factory=list)
+    _duplicates: int = None
+
+    def add_row_hashes(self, hashes: np.ndarray):
+        self.row_distinct.update_hashes(hashes)
+        if self.row_hashes is None:
+            return
+        if self.rows > MAX_EXACT_DUPLICATE_ROWS:
+            self.row_hashes = None
+        else:
+            self.row_hashes.append(hashes)
+
+    @property
+    def duplicates_exact(self) -> bool:
+        return self.row_hashes is not None
+
+    @property
+    def numeric_columns(self) -> list:
+        return [name for name, acc in self.columns.items() if acc.numeric]
+
+    @property
+    def duplicates(self) -> int:
+        """Duplicate rows: exact from row hashes, or estimated for very long files."""
+        if self._duplicates is None:
+            if self.row_hashes is not None:
+                hashes = np.concatenate(self.row_hashes) if self.row_hashes else np.empty(0, np.uint64)
+                self._duplicates = self.rows - len(np.unique(hashes))
+                # The count is all that is needed; release the hashes
+                self.row_hashes = []
+            else:
+                self._duplicates = estimated_duplicates(self.rows, self.row_distinct)
+        return self._duplicates
+
+    @property
+    def total_nulls(self) -> int:
+        return sum(acc.null_count for acc in self.columns.values())
+
+    def numeric_table(self) -> pd.DataFrame:
+        """Running aggregates laid out like graphs.statistics.numeric_statistics."""
+        rows = []
+        for name in self.numeric_columns:
+            acc = self.columns[name]
+            n = np.float64(acc.count)
+            mean = acc.mean if acc.count else np.nan
+            col_min = np.nan if acc.min is None else acc.min
+            col_max = np.nan if acc.max is None else acc.max
+            rows.append([
+                acc.count, mean, acc.std, col_min,
+                acc.quantile(0.25), acc.quantile(0.5), acc.quantile(0.75), col_max,
+                float(skewness(n, acc.m2, acc.m3)), float(kurtosis(n, acc.m2, acc.m4)),
+                acc.std / mean * 100 if mean else np.nan, col_max - col_min,
+                acc.null_count, acc.null_count / max(self.rows, 1) * 100, acc.distinct.estimate,
+            ])
+        return pd.DataFrame(rows, index=self.numeric_columns, columns=STAT_COLUMNS, dtype=float)
+
+    def missing_table(self) -> pd.DataFrame:
+        nulls = [self.columns[name].null_count for name in self.columns]
+        return pd.DataFrame({
+            'Column': list(self.columns),
+            'Missing Values': nulls,
+            'Missing Percentage': [n / max(self.rows, 1) * 100 for n in nulls],
+        }, index=list(self.columns))
+
+    @cached_property
+    def profile(self) -> DatasetProfile:
+        """Column profile derived from the running aggregates, without rescanning the data."""
+        profile = DatasetProfile(rows=self.rows)
+        for name, acc in self.columns.items():
+            dtype = self.dtypes[name]
+            sample = self.preview[name]
+            text = is_text_dtype(sample)
+            nunique = acc.distinct.estimate
+            profile.columns[name] = ColumnProfile(
+                name=name, dtype=str(dtype), count=self.rows, null_count=acc.null_count,
+                nunique=nunique,
+                dtype_numeric=acc.numeric,
+                dtype_datetime=pd.api.types.is_datetime64_any_dtype(dtype),
+                numeric_parseable=acc.numeric,
+                datetime_parseable=is_datetime_parseable(sample, exact=True),
+                is_categorical=text and self.rows > 0 and nunique / self.rows < CATEGORICAL_UNIQUE_RATIO,
+                min=acc.min, max=acc.max,
+            )
+        return profile
+
+
+# Next dtype to try when a later chunk holds values its column's probed dtype can't
+_WIDER_DTYPES = {'boolean': 'string', 'Int64': 'float64', 'float64': 'string'}
+
+
+class _DtypeDrift(Exception):
+    """A chunk past the probe doesn't fit the dtypes chosen for some of its columns."""
+
+    def __init__(self, columns: dict):
+        super().__init__(", ".join(f"column {col} no longer fits {dtype}" for col, dtype in columns.items()))
+        self.columns = columns
+
+
+def _stream_dtypes(probe: pd.DataFrame) -> dict:
+    """Dtypes every chunk is cast to, so later chunks can't drift from the first one."""
+    dtypes = {}
+    for col, dtype in probe.dtypes.items():
+        if pd.api.types.is_bool_dtype(dtype):
+            dtypes[col] = 'boolean'
+        elif pd.api.types.is_integer_dtype(dtype):
+            dtypes[col] = 'Int64'  # Nullable: a later chunk may contain missing values
+        elif pd.api.types.is_float_dtype(dtype):
+            dtypes[col] = 'float64'
+        else:
+            dtypes[col] = 'string'
+    return dtypes
+
+
+def _cast_chunks(chunks, dtypes: dict):
+    """Chunks cast to the stream dtypes; raises _DtypeDrift naming every column of a chunk that doesn't fit."""
+    for chunk in chunks:
+        drifted = {}
+        for col, dtype in dtypes.items():
+            if dtype == 'string':
+                continue  # Read as text by read_csv already
+            try:
+                chunk[col] = chunk[col].astype(dtype)
+            except (TypeError, ValueError):
+                drifted[col] = dtype
+        if drifted:
+            raise _DtypeDrift(drifted)
+        yield chunk
+
+
+def _accumulate(chunks, key: str):
+    """Update running aggregates over DataFrame chunks, yielding each chunk after it is counted."""
+    summary = None
+    for chunk in chunks:
+        if summary is None:
+            summary = StreamSummary(
+                key=key, rows=0, dtypes=chunk.dtypes, preview=chunk.head(PREVIEW_ROWS),
+                columns={col: ColumnAccumulator(col, pd.api.types.is_numeric_dtype(chunk[col])
+                                                and not pd.api.types.is_bool_dtype(chunk[col]))
+                         for col in chunk.columns},
+                row_distinct=HyperLogLog())
+        summary.rows += len(chunk)
+        summary.chunks += 1
+        for col, acc in summary.columns.items():
+            acc.update(chunk[col])
+        summary.add_row_hashes(pd.util.hash_pandas_object(chunk, index=False).to_numpy())
+        yield summary, chunk
+
+
+def stream_csv(source, key: str, store: ArrowStore,
+               chunk_rows: int = DEFAULT_CHUNK_ROWS) -> StreamSummary:
+    """Convert a CSV to a stored Arrow file chunk by chunk, keeping only running aggregates.
+
+    Column dtypes come from a probe of the first rows. A later chunk that doesn't fit
+    widens its column (Int64 -> float64 -> string, boolean -> string) and restarts the stream.
+    """
+    source.seek(0)
+    probe = pd.read_csv(source, nrows=min(chunk_rows, 10_000))
+    dtypes = _stream_dtypes(probe)
+    while True:
+        try:
+            return _stream_pass(source, key, store, chunk_rows, probe, dtypes)
+        except _DtypeDrift as drift:
+            for col, dtype in drift.columns.items():
+                dtypes[col] = _WIDER_DTYPES[dtype]
+            logger.warning(f"Re-streaming dataset {key} with wider dtypes: {drift}")
+
+
+def _stream_pass(source, key: str, store: ArrowStore, chunk_rows: int, probe: pd.DataFrame,
+                 dtypes: dict) -> StreamSummary:
+    source.seek(0)
+    # Text columns are pinned; the rest are inferred per chunk and cast, so drift is caught per column
+    text = {col: dtype for col, dtype in dtypes.items() if dtype == 'string'}
+    schema = pa.Schema.from_pandas(probe.astype(dtypes).head(0), preserve_index=False)
+    state = {}
+
+    def tables(reader):
+        for summary, chunk in _accumulate(_cast_chunks(reader, dtypes), key):
+            state['summary'] = summary
+            yield pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+
+    # Closed explicitly: an abandoned reader closes the upload's buffer when collected
+    with pd.read_csv(source, chunksize=chunk_rows, dtype=text) as reader:
+        store.write_tables(key, schema, tables(reader))
+    summary = state.get('summary') or _empty_summary(key, probe)
+    logger.info(f"Streamed {summary.rows} rows in {summary.chunks} chunks into dataset {key}")
+    return summary
+
+
+def summarize_stored(key: str, store: ArrowStore) -> StreamSummary:
+    """Rebuild the running aggregates of an already stored dataset, batch by batch."""
+    summary = None
+    for summary, _ in _accumulate((to_frame(batch) for batch in store.iter_batches(key)), key):
+        pass
+    return summary or _empty_summary(key, store.load(key))
+
+
+def _empty_summary(key: str, frame: pd.DataFrame) -> StreamSummary:
+    return StreamSummary(key=key, rows=0, dtypes=frame.dtypes, preview=frame.head(0),
+                         columns={col: ColumnAccumulator(col, pd.api.types.is_numeric_dtype(frame[col]))
+                                  for col in frame.columns},
+                         row_distinct=HyperLogLog())
+
+
+class SummaryCache:
+    """Process-wide LRU of stream summaries keyed by dataset key."""
+
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            return None
+
+    def put(self, key: str, summary: StreamSummary):
+        with self._lock:
+            self._entries[key] = summary
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_summaries = SummaryCache()
+
+
+def get_stream_summary(source, key: str, store: ArrowStore,
+                       chunk_rows: int = DEFAULT_CHUNK_ROWS) -> StreamSummary:
+    """Summary of a streamed upload, reusing the stored Arrow copy when one exists."""
+    summary = _summaries.get(key)
+    if summary is None:
+        if key in store:
+            summary = summarize_stored(key, store)
+        else:
+            summary = stream_csv(source, key, store, chunk_rows)
+        _summaries.put(key, summary)
+    return summary
@@ -1,46 +1,101 @@
 import pandas as pd
+import numpy as np
 import logging
-import os
+from graphs.datetimes import parse_datetimes
+from graphs.instrumentation import instrumented
+from graphs.sketches import HyperLogLog
 
-# Create logs directory if it doesn't exist
-os.makedirs('logs', exist_ok=True)
+# Get logger for this module
+logger = logging.getLogger(__name__)
 
-# Clear previous log file contents
-open('logs/data_analysis.log', 'w').close()
+# Rows tested by sampled type inference before escalating to a full-column parse
+DEFAULT_SAMPLE_SIZE = 1000
 
-# Configure logging to write to file
-logging.basicConfig(
-    filename='logs/data_analysis.log',
-    filemode='w',  # 'w' mode overwrites the file each time
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
+def sample_series(series: pd.Series, sample_size: int = DEFAULT_SAMPLE_SIZE,
+                  random_state: int = 0) -> pd.Series:
+    """Stratified sample of a series: head, tail and random rows in between, nulls dropped"""
+    n = len(series)
+    if n <= sample_size:
+        return series.dropna()
+    edge = max(sample_size // 3, 1)
+    rng = np.random.default_rng(random_state)
+    middle = rng.choice(np.arange(edge, n - edge), size=sample_size - 2 * edge, replace=False)
+    positions = np.concatenate([np.arange(edge), np.sort(middle), np.arange(n - edge, n)])
+    return series.iloc[positions].dropna()
 
-# Get logger for this module
-logger = logging.getLogger(__name__)
+def _parses(parse, series: pd.Series) -> bool:
+    try:
+        parse(series)
+        return True
+    except (ValueError, TypeError, OverflowError, pd.errors.OutOfBoundsDatetime):
+        return False
+
+def _parses_sampled(parse, series: pd.Series, sample_size: int, exact: bool) -> bool:
+    """Decide parse-ability from a sample, parsing the full column only when it is ambiguous"""
+    if exact or len(series) <= sample_size:
+        return _parses(parse, series)
+    sample = sample_series(series, sample_size)
+    if sample.empty:
+        return _parses(parse, series)
+    try:
+        parsed = parse(sample, errors='coerce')
+    except (ValueError, TypeError, OverflowError):
+        return False
+    ok = int(parsed.notna().sum())
+    if ok == len(sample):
+        return True
+    if ok == 0:
+        return False
+    logger.debug(f"Sample of {series.name} is ambiguous ({ok}/{len(sample)} parsed), "
+                 f"escalating to full parse")
+    return _parses(parse, series)
 
-def is_numeric(series: pd.Series) -> bool:
+@instrumented('detect')
+def is_numeric(series: pd.Series, sample_size: int = DEFAULT_SAMPLE_SIZE,
+               exact: bool = False) -> bool:
     """Enhanced numeric type detection"""
     if pd.api.types.is_numeric_dtype(series):
         return True
-    try:
-        pd.to_numeric(series)
-        logger.info(f"Converted series to numeric: {series.name}")
+    result = _parses_sampled(pd.to_numeric, series, sample_size, exact)
+    if result:
+        logger.debug(f"Series can be converted to numeric: {series.name}")
+    return result
+
+@instrumented('detect')
+def is_datetime_parseable(series: pd.Series, sample_size: int = DEFAULT_SAMPLE_SIZE,
+                          exact: bool = False) -> bool:
+    """Whether the series parses as datetimes, tested on a sample unless exact"""
+    if pd.api.types.is_datetime64_any_dtype(series):
         return True
-    except (ValueError, TypeError):
-        return False
+    return _parses_sampled(parse_datetimes, series, sample_size, exact)
+
+def is_text_dtype(series: pd.Series) -> bool:
+    """True for object columns, Arrow-backed string columns and categories of text"""
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        dtype = dtype.categories.dtype
+    return pd.api.types.is_object_dtype(dtype) or isinstance(dtype, pd.StringDtype)
 
-def is_categorical(series: pd.Series) -> bool:
-    if pd.api.types.is_object_dtype(series):
-        unique_ratio = series.nunique() / len(series)
+@instrumented('detect')
+def is_categorical(series: pd.Series, approximate: bool = False) -> bool:
+    """Low-cardinality text column; approximate counts distinct values with HyperLogLog"""
+    if is_text_dtype(series):
+        if approximate:
+            hll = HyperLogLog()
+            hll.update(series.dropna())
+            nunique = hll.estimate
+        else:
+            nunique = series.nunique()
+        unique_ratio = nunique / len(series)
         result = unique_ratio < 0.05  # Less than 5% unique values
-        logger.info(f"Checked if series is categorical: {result}")
+        logger.debug(f"Checked if series is categorical: {result}")
         return result
     return False
 
+@instrumented('detect')
 def is_datetime(series: pd.Series) -> bool:
     result = pd.api.types.is_datetime64_any_dtype(series)
-    logger.info(f"Checked if series is datetime: {result}")
+    logger.debug(f"Checked if series is datetime: {result}")
     return result
 
 def is_suitable_for_pie_chart(series):
@@ -50,38 +105,43 @@ def is_suitable_for_pie_chart(series):
     unique_values = series.nunique()
     return unique_values <= 10 and unique_values > 1
 
-def validate_time_series(data, column):
-    try:
-        if pd.api.types.is_datetime64_any_dtype(data[column]):
-            return True
-        # Try converting to datetime
-        pd.to_datetime(data[column])
-        return True
-    except:
-        return False
+def validate_time_series(data, column, sample_size: int = DEFAULT_SAMPLE_SIZE,
+                         exact: bool = False):
+    return is_datetime_parseable(data[column], sample_size, exact)
 
-def suggest_plot_type(x_series: pd.Series, y_series: pd.Series = None) -> list:
-    plots = []
+@instrumented('detect')
+def suggest_plot_type(x_series: pd.Series, y_series: pd.Series = None,
+                      x_profile=None, y_profile=None) -> list:
+    """Suggest plot types; column profiles, when given, replace re-scanning the series."""
+    x_numeric = x_profile.is_numeric if x_profile is not None else is_numeric(x_series)
     if y_series is None:
-        if is_numeric(x_series):
-            plots.extend(["Histogram", "Box Plot"])
-        elif is_categorical(x_series):
-            plots.append("Pie Chart")
+        if x_numeric:
+            plots = ["Histogram", "Box Plot"]
+        elif (x_profile.is_categorical if x_profile is not None else is_categorical(x_series)):
+            plots = ["Pie Chart"]
+        else:
+            plots = []
         logger.info(f"Suggested plot types for single series: {plots}")
         return plots
     
-    if is_numeric(x_series) and is_numeric(y_series):
+    plots = []
+    y_numeric = y_profile.is_numeric if y_profile is not None else is_numeric(y_series)
+    if x_numeric and y_numeric:
         plots.extend(["Scatter Plot", "Line Graph"])
-        if x_series.nunique() < 50:  # Not too many unique values
+        x_nunique = x_profile.nunique if x_profile is not None else x_series.nunique()
+        if x_nunique < 50:  # Not too many unique values
             plots.append("Bar Graph")
-    elif is_categorical(x_series) and is_numeric(y_series):
+    elif (x_profile.is_categorical if x_profile is not None else is_categorical(x_series)) and y_numeric:
         plots.extend(["Bar Graph", "Box Plot"])
     
     logger.info(f"Suggested plot types for paired series: {plots}")
     return plots
 
-def get_column_type(series: pd.Series) -> str:
-    if is_numeric(series):
+@instrumented('detect')
+def get_column_type(series: pd.Series, profile=None) -> str:
+    if profile is not None:
+        col_type = profile.kind
+    elif is_numeric(series):
         col_type = "numeric"
     elif is_datetime(series):
         col_type = "datetime"
@@ -89,26 +149,31 @@ def get_column_type(series: pd.Series) -> str:
         col_type = "categorical"
     else:
         col_type = "text"
-    logger.info(f"Determined column type: {col_type}")
+    logger.debug(f"Determined column type: {col_type}")
     return col_type
 
-def detect_timeseries_columns(df: pd.DataFrame) -> list:
-    """Detect possible time series columns including string dates."""
+@instrumented('detect')
+def detect_timeseries_columns(df: pd.DataFrame, profile=None,
+                              sample_size: int = DEFAULT_SAMPLE_SIZE, exact: bool = False) -> list:
+    """Detect possible time series columns including string dates.
+
+    Columns are tested on a stratified sample and only fully parsed when the
+    sample is ambiguous; pass exact=True to always parse the whole column.
+    """
+    if profile is not None:
+        return profile.datetime_columns
     timeseries_cols = []
     for col in df.columns:
-        try:
-            # Try converting to datetime
-            pd.to_datetime(df[col])
+        if is_datetime_parseable(df[col], sample_size, exact):
             timeseries_cols.append(col)
             logger.info(f"Detected time series column: {col}")
-        except:
-            continue
     return timeseries_cols
 
+@instrumented('detect')
 def extract_time_features(series: pd.Series) -> pd.DataFrame:
     """Extract time-based features from a datetime series."""
     df = pd.DataFrame()
-    series = pd.to_datetime(series)
+    series = parse_datetimes(series)
     
     df['year'] = series.dt.year
     df['month'] = series.dt.month